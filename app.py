@@ -19,21 +19,38 @@ st.set_page_config(page_title="ESG Report AI Agent", layout="wide")
 from mongo_handler import MongoHandler
 # Shared utilities and config
 from utils import (
-    get_significant_token, is_likely_official_domain, clean_title,
+    is_likely_official_domain, clean_title,
     extract_year, is_report_link, filter_relevant_links, robust_get,
+    inspect_pdf, inspect_parsed_pdf,
 )
 from config import (
     REQUESTS_TIMEOUT_S, REQUESTS_HUB_TIMEOUT_S, REQUESTS_DOWNLOAD_TIMEOUT_S,
     MIN_PDF_SIZE_BYTES, SKIP_VERIFY_SIZE_BYTES, USER_AGENT,
     REPORT_VERIFICATION_KEYWORDS, BLOCKED_DOMAINS,
-    MAX_REPORTS_TOTAL, MAX_HUBS_TO_VISIT, THREAD_POOL_WORKERS,
-    MAX_SCAN_URLS_STRICT, MAX_SCAN_URLS_NORMAL, MAX_DEEP_SCAN_REPORTS,
+    MAX_SCAN_URLS_STRICT, MAX_SCAN_URLS_NORMAL,
+    SCREENSHOTS_ENABLED, RANGE_VERIFY_MIN_BYTES, RANGE_BLOCK_SIZE,
+    SEARCH_DEADLINE_S, SEARCH_TARGET_REPORTS, CRAWL_TIME_BUDGET_S, CRAWL_TARGET_PDFS,
 )
+from crawl_frontier import CrawlFrontier
+from search_pipeline import SearchPipeline, SearchRun, stream_events
+from http_session import session_stats
+from http_cache import cache_stats, get_http_cache
+from range_file import supports_ranges, inspect_pdf_ranges
+from verify_cache import get_verification_cache, validator_for
+from pdf_pool import get_pdf_pool
+from pdf_download import spool_response, PdfTooLargeError
+from pdf_store import get_pdf_store
+from pdf_sidecar import load_sidecar
+from rate_limiter import get_rate_limiter
+from circuit_breaker import get_circuit_breaker
 
 # Initialize MongoDB Handler
 if "mongo" not in st.session_state:
     st.session_state.mongo = MongoHandler()
 mongo_db = st.session_state.mongo
+if mongo_db.client:
+    # Verification results shared with the batch scanner
+    get_verification_cache().attach(mongo_db.db.verification_cache)
 
 st.title("ESG Report AI Agent 🤖")
 st.markdown("---")
@@ -86,12 +103,21 @@ def load_sbti_data():
             print(f"Mongo Query Error: {e}")
             return []
     return []
+
+@st.cache_data(ttl=300)
+def load_recent_search_metrics():
+    # Sidebar stat; re-read after each search (record_search_metrics) or every 5 minutes
+    if "mongo" in st.session_state and st.session_state.mongo.client:
+        return st.session_state.mongo.get_recent_search_metrics()
+    return []
 # --- Web Search Helper ---
 def search_web(query, max_results, ddgs_instance=None):
     """
     Wrapper for DuckDuckGo search.
     Returns list of dicts: {'title': str, 'href': str, 'body': str}
+    Queries are paced by the shared per-host rate limiter.
     """
+    get_rate_limiter().acquire("duckduckgo.com")
     if not ddgs_instance:
         with DDGS() as ddgs:
             try:
@@ -108,7 +134,7 @@ def search_web(query, max_results, ddgs_instance=None):
 
 
 
-# NOTE: is_likely_official_domain, get_significant_token imported from utils.py
+# NOTE: is_likely_official_domain imported from utils.py
 
 def verify_pdf_content(url, title, company_name, context="report"):
     """
@@ -116,21 +142,73 @@ def verify_pdf_content(url, title, company_name, context="report"):
     1. File size > 50KB
     2. Company name on Page 1-3
     3. "Report" keywords on Page 1-3
+    Big PDFs on servers with byte ranges are read in blocks (range_file.py).
+    Outcomes, including rejections, are cached (verify_cache.py).
+    """
+    cache = get_verification_cache()
+    entry, fresh = cache.lookup(url, company_name)
+    if entry and fresh:
+        print(f"[VERIFY] Cached ({entry['outcome']}): {url}")
+        return entry["result"]
+
+    outcome = _check_pdf(url, title, company_name, context, stale=entry)
+    if outcome.get("revalidated"):
+        return cache.revalidated(entry)["result"]
+    result = outcome.get("result")
+    cache.put(url, company_name, outcome["outcome"], reason=outcome.get("reason"), result=result,
+              validator=outcome.get("validator"), pages=outcome.get("pages"),
+              year=extract_year(f"{result['title']} {url}") if result else None)
+    return result
+
+
+def _check_pdf(url, title, company_name, context, stale=None):
+    """
+    verify_pdf_content's uncached check. Returns {"outcome", "result",
+    "reason", "validator", "pages"}, or {"revalidated": True} when `stale`
+    (an expired cache entry) still matches the response's ETag/length.
     """
-    import io
-    import pypdf
-    
     # Helper for logging (print to stdout for now, handled by main loop logging usually)
     def log_v(msg):
         print(f"[VERIFY] {msg}")
 
     try:
         log_v(f"Verifying ({context}): {url}")
+
+        # Already downloaded by another pipeline (pdf_store.py): no request at all
+        store = get_pdf_store()
+        entry = store.lookup(url)
+        stored = store.path(sha256=entry["sha256"]) if entry else None
+        if stored:
+            # Its text sidecar, if one was made, saves parsing it again
+            sidecar = load_sidecar(entry["sha256"])
+            if sidecar:
+                result, reason, pages = inspect_parsed_pdf(sidecar, url, title, company_name)
+            else:
+                result, reason, pages = inspect_pdf(stored, url, title, company_name)
+            return {"outcome": reason or "verified", "result": result, "reason": reason,
+                    "validator": entry["validator"], "pages": pages}
         
         try:
-            response = robust_get(url, timeout=10, stream=True)
-        except Exception:
-            return None
+            # Cached PDFs come from disk; uncached ones are streamed so big files can be range-read
+            cached = get_http_cache().lookup(url) is not None
+            response = robust_get(url, timeout=10, stream=True, use_cache=cached)
+        except Exception as e:
+            return {"outcome": "fetch_error", "reason": type(e).__name__}
+
+        validator = validator_for(response.headers)
+        if stale and validator and stale.get("validator") == validator:
+            response.close()
+            log_v(f"Unchanged since last check ({stale['outcome']}): {url}")
+            return {"revalidated": True}
+
+        def reject(outcome, reason=None, pages=None):
+            response.close()
+            return {"outcome": outcome, "reason": reason, "validator": validator, "pages": pages}
+
+        if response.status_code in (404, 410):
+            return reject("not_found", f"HTTP {response.status_code}")
+        if response.status_code >= 400:
+            return reject("http_error", f"HTTP {response.status_code}")
 
         # Content Type Check
         c_type = response.headers.get('Content-Type', '').lower()
@@ -140,129 +218,95 @@ def verify_pdf_content(url, title, company_name, context="report"):
         is_html = 'text/html' in c_type
         
         if not is_pdf and not is_html:
-            response.close()
-            return None
+            return reject("not_pdf", c_type or "no content type")
             
         # If HTML, just verify it's reachable and return (don't parse PDF)
         if is_html:
              response.close()
              # We trust the link text filtering done before this call
-             return {
+             return {"outcome": "webpage", "validator": validator, "result": {
                  "title": title,
                  "href": url,
                  "body": "Webpage Report / Resource"
-             }
+             }}
 
         # Size Check
         content_length = response.headers.get('Content-Length')
-        if content_length:
-            size_bytes = int(content_length)
-            if size_bytes < 50000: # 50KB
+        size_bytes = int(content_length) if content_length and content_length.isdigit() else None
+        if size_bytes is not None and size_bytes < MIN_PDF_SIZE_BYTES:
+            return reject("too_small", f"{size_bytes} bytes")
+
+        # Big PDF on a server with byte ranges: read only the trailer, xref and first pages
+        if size_bytes and size_bytes >= RANGE_VERIFY_MIN_BYTES and supports_ranges(response.headers):
+            try:
+                head = response.raw.read(RANGE_BLOCK_SIZE)
+                if not head.startswith(b'%PDF'):
+                    return reject("not_pdf", "no %PDF header")
                 response.close()
-                return None
-            # OPTIMIZATION: If > 20MB, assume it's a report (save bandwidth)
-            if size_bytes > 20 * 1024 * 1024:
-                 response.close()
-                 return {
-                     "title": title,
-                     "href": url,
-                     "body": "Verified Large PDF Report"
-                 }
+                result, reason, pages = inspect_pdf_ranges(url, size_bytes, head, title, company_name)
+                return {"outcome": reason or "verified", "result": result, "reason": reason,
+                        "validator": validator, "pages": pages}
+            except Exception as e:
+                response.close()
+                log_v(f"Range reads failed ({e}), falling back: {url}")
+                if size_bytes <= SKIP_VERIFY_SIZE_BYTES:
+                    response = robust_get(url, timeout=10, stream=True, use_cache=False)
+
+        # OPTIMIZATION: If > 20MB, assume it's a report (save bandwidth)
+        if size_bytes and size_bytes > SKIP_VERIFY_SIZE_BYTES:
+            response.close()
+            return {"outcome": "large_unverified", "validator": validator, "result": {
+                "title": title,
+                "href": url,
+                "body": "Verified Large PDF Report"
+            }}
         
         # Content Download
         try:
             # Read only start to check magic bytes
             chunk = response.raw.read(4)
             if chunk != b'%PDF':
-                response.close()
-                return None
+                return reject("not_pdf", "no %PDF header")
             
-            # Read rest
-            pdf_data = chunk + response.raw.read()
-            f = io.BytesIO(pdf_data)
-        except Exception as e:
+            # Stream the rest to a spool file (big bodies go to disk, not memory)
+            pdf = spool_response(response, max_bytes=SKIP_VERIFY_SIZE_BYTES, prefix=chunk)
+        except PdfTooLargeError:
+            # No Content-Length, but past the size cap: same as a large PDF
             response.close()
-            return None
+            return {"outcome": "large_unverified", "validator": validator, "result": {
+                "title": title,
+                "href": url,
+                "body": "Verified Large PDF Report"
+            }}
+        except Exception as e:
+            return reject("fetch_error", type(e).__name__)
         
         response.close()
-        
-        try:
-            reader = pypdf.PdfReader(f)
-        except Exception:
-            return None
-        
-        if len(reader.pages) == 0:
-            return None
-        
-        # --- TITLE ENHANCEMENT LOGIC ---
-        final_title = title # Default to link text
-        
-        # 1. Try PDF Metadata
-        pdf_title = None
-        try:
-            if reader.metadata and reader.metadata.title:
-                meta_t = reader.metadata.title.strip()
-                if len(meta_t) > 5 and "micros" not in meta_t.lower() and "untitled" not in meta_t.lower():
-                     pdf_title = meta_t
-        except Exception:
-            pass
-        
-        # 2. Try Filename from URL
-        url_filename = os.path.basename(urlparse(url).path)
-        clean_filename = url_filename.replace('.pdf', '').replace('-', ' ').replace('_', ' ').title()
-        
-        # 3. Decision Logic
-        # Is the original link text generic?
-        generic_terms = ['report', 'download', 'pdf', 'click here', 'view', 'full report', 'read more', 'file']
-        is_generic = False
-        if len(title) < 10 or any(title.lower() == g for g in generic_terms):
-            is_generic = True
-            
-        if pdf_title:
-            # Metadata is usually best if it exists
-            final_title = pdf_title
-        elif is_generic and len(clean_filename) > 5:
-            # Fallback to filename if link text is bad
-            final_title = clean_filename
-            
-        # Refine: Ensure year is present if possible
-        import re
-        year_match = re.search(r'(20[12][0-9])', final_title)
-        if not year_match:
-             # Try to find year in URL or Original Text to append
-             y_url = re.search(r'(20[12][0-9])', url)
-             if y_url:
-                 final_title = f"{final_title} ({y_url.group(1)})"
-        
-        # Check first 3 pages
-        pages_to_check = min(3, len(reader.pages))
-        text_content = ""
-        for i in range(pages_to_check):
-            try:
-                text_content += reader.pages[i].extract_text().lower() + " "
-            except Exception:
-                pass
-        
-        # Check Company Name (SMARTER)
-        sig_token = get_significant_token(company_name)
-        if sig_token not in text_content:
-            log_v(f"[SKIP] Company token '{sig_token}' not found.")
-            return None
-            
-        # Check Keywords (Context specific)
-        report_keywords = ['report', 'sustainability', 'esg', 'annual', 'review', 'fiscal', 'summary']
-        if not any(k in text_content for k in report_keywords):
-            return None
-        
-        log_v(f"[MATCH] Verified: {url}")
-        return {
-            "title": final_title,
-            "href": url,
-            "body": "Verified PDF Report"
-        }
+
+        with pdf:
+            result, reason, pages = inspect_pdf(pdf.source(), url, title, company_name)
+            if result:
+                # Keep verified reports for the batch scanner, exports and extraction
+                store.put(url, pdf, validator)
+        return {"outcome": reason or "verified", "result": result, "reason": reason,
+                "validator": validator, "pages": pages}
 
     except Exception as e:
-        return None
+        return {"outcome": "fetch_error", "reason": type(e).__name__}
+
+def add_download_to_zip(zip_file, arcname, url, source):
+    """
+    Add one item to a ZIP export. `source` is a local PDF store path or a
+    streamed response; PDF responses are kept in the store for next time.
+    """
+    if isinstance(source, str):
+        zip_file.write(source, arcname)
+        return
+    with source, spool_response(source) as body:
+        # Into the ZIP first: storing moves the spool file away, even if the store write fails
+        body.add_to_zip(zip_file, arcname)
+        if arcname.endswith(".pdf") and body.peek(4) == b"%PDF":
+            get_pdf_store().put(url, body, validator_for(source.headers))
 
 # NOTE: clean_title imported from utils.py
 
@@ -343,18 +387,166 @@ def delete_link_by_url(target_url):
     print(f"[DEBUG] NO MATCH FOUND for '{target_clean}'. Count remains {initial_count}.")
     return False
 
-# --- Main Search Engine ---
-def search_esg_info(company_name, fetch_reports=True, known_website=None, symbol=None, strict_mode=False, pdfs_only=False):
+# --- Official-site hub scan helpers ---
+def _collect_hub_links(page_url, html_text, primary_domain):
+    """Report links (candidates to verify) and hub links to follow on one page of the official site."""
+    scheme = urlparse(page_url).scheme
 
-    import concurrent.futures
-    import datetime
-    import io
-    import pypdf
+    def normalize_href(base, href):
+        if not href:
+            return None
+        if href.startswith("mailto:") or href.startswith("javascript:"):
+            return None
+        if href.startswith("#"):
+            return None
+        if href.startswith("//"):
+            return f"{scheme}:{href}"
+        if href.startswith("http"):
+            return href
+        return urljoin(base, href)
+
+    soup = BeautifulSoup(html_text, 'html.parser')
+    pdf_candidates = []
+    hubs = []
+    for link in soup.find_all('a', href=True):
+        raw_href = link['href']
+        normalized = normalize_href(page_url, raw_href)
+        if not normalized:
+            continue
+
+        link_domain = urlparse(normalized).netloc
+        if link_domain and primary_domain and primary_domain not in link_domain:
+            continue
+
+        # --- Enhanced Name Extraction with Year Detection & Headers ---
+        import re
+
+        def extract_year_bs(text):
+            years = re.findall(r'\b(202[0-9]|203[0])\b', str(text))
+            return years[0] if years else None
+
+        def get_preceding_header_bs(element):
+            """Traverses backwards/up to find nearest header"""
+            try:
+                current = element.parent
+                for _ in range(4): # Limit depth
+                    if not current: break
+                    prev = current.find_previous_sibling()
+                    while prev:
+                        if prev.name and prev.name.startswith('h') and len(prev.name) == 2:
+                            return prev.get_text(strip=True)
+                        prev = prev.find_previous_sibling()
+                    current = current.parent
+            except Exception:
+                return None
+            return None
+
+        def get_parent_context_bs(element):
+            """Get parent context for year/info extraction"""
+            parent = element.parent
+            for _ in range(2):  # Go up 2 levels
+                if parent and parent.name in ['div', 'p', 'li', 'td', 'section', 'article']:
+                    parent_text = parent.get_text(strip=True)
+                    if parent_text and len(parent_text) < 200:
+                        return parent_text
+                parent = parent.parent if parent else None
+            return ""
+
+        visible_text = link.get_text(strip=True)
+        aria = link.get('aria-label', '').strip()
+        title_attr = link.get('title', '').strip()
+
+        alt_text = ""
+        img_tag = link.find('img')
+        if img_tag:
+            alt_text = img_tag.get('alt', '').strip()
+
+        # Pick the most descriptive name
+        generic_terms = ["download", "pdf", "click here", "read more", "view", "report", "file", "link", "sustainability", "esg", "annual", "environmental", "social", "governance", "annual report", "sustainability report"]
+
+        is_text_generic = not visible_text or visible_text.lower() in generic_terms or len(visible_text) < 4
+
+        # 1. Base Name Selection
+        candidate_text = visible_text
+        if is_text_generic:
+            if aria: candidate_text = aria
+            elif title_attr: candidate_text = title_attr
+            elif alt_text: candidate_text = alt_text
+        elif aria and len(aria) > len(visible_text) + 5:
+            candidate_text = aria
+
+        if not candidate_text: candidate_text = "Unknown Web Resource"
+
+        # 2. Contextual Enhancement Pipeline
+        # A. Check URL for Year
+        year_url = extract_year_bs(normalized)
+        if year_url and year_url not in candidate_text:
+            candidate_text = f"{candidate_text} ({year_url})"
+
+        # B. Check Preceding Header (if generic)
+        if len(candidate_text) < 30 or any(t in candidate_text.lower() for t in generic_terms):
+            header = get_preceding_header_bs(link)
+            if header and len(header) < 50:
+                header = re.sub(r'\s+', ' ', header).strip()
+                if header.lower() not in candidate_text.lower():
+                    candidate_text = f"{header} - {candidate_text}"
+
+        # C. Check Parent Content (last resort for year)
+        if not extract_year_bs(candidate_text):
+            context = get_parent_context_bs(link)
+            year = extract_year_bs(context)
+            if year and year not in candidate_text:
+                candidate_text = f"{candidate_text} ({year})"
+
+        text = clean_title(candidate_text)
+        if not text: text = "Unknown Web Resource"
+
+        # BROADENED SCOPE: Check both PDF and HTML for relevance
+        is_pdf = normalized.lower().endswith('.pdf') or normalized.lower().endswith('pdf')
+
+        # 1. Relevance Check (Keywords)
+        if is_report_link(text, normalized):
+
+            # 2. Negative Filter
+            is_negative = False
+            neg_terms = ['policy', 'charter', 'code of conduct', 'guidelines', 'presentation']
+            for n in neg_terms:
+                if n in text.lower(): is_negative = True
+
+            if not is_negative:
+                pdf_candidates.append({'href': normalized, 'title': text})
+
+            # If it's a report link, we don't treat it as a hub to traverse?
+            # Actually, maybe we should still traverse if it's a hub-like page?
+            # But for now, let's capture it.
+            continue
+
+        if is_pdf:
+             # If it is a PDF but failed is_report_link (maybe missing keyword?), 
+             # we might still want it if we are desperate, but is_report_link is the gatekeeper.
+             pass
+
+        lower_text = text.lower()
+        hub_keywords = ['report', 'archive', 'download', 'library', 'sustainability', 'esg', 'impact', 'responsibility', 'csr']
+        if any(k in lower_text for k in hub_keywords):
+            hubs.append({'url': normalized, 'text': text})
+
+    return pdf_candidates, hubs
 
-    def log(msg):
-        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {msg}")
 
-    # ... (proceed to web search) ...
+# --- Main Search Engine ---
+def search_esg_info(company_name, fetch_reports=True, known_website=None, symbol=None, strict_mode=False, pdfs_only=False,
+                    deadline_s=SEARCH_DEADLINE_S, target_reports=SEARCH_TARGET_REPORTS, on_event=None):
+    """
+    Find a company's ESG site and reports. The stages run on a SearchPipeline
+    (search_pipeline.py): each starts once the stages it needs are done, so the
+    description search, the official-site stages and the fallback searches overlap.
+    Returns after `deadline_s` seconds with what was found so far ("partial": True);
+    the fallback searches are skipped once `target_reports` reports are in.
+    `on_event` receives progress as it happens (search_pipeline.SearchRun.emit).
+    """
+    import datetime
+
     results = {
         "company": company_name,
         "description": None,
@@ -364,733 +556,467 @@ def search_esg_info(company_name, fetch_reports=True, known_website=None, symbol
         "symbol": symbol,
         "search_log": []
     }
-    
-    official_domain = None
-    esg_hub_urls = [] 
-
-
-    log("Starting search...")
+    run = SearchRun(results, deadline_s=deadline_s, target=target_reports, on_event=on_event)
+    run.log("Starting search...")
     # Add initial context to log
-    results["search_log"].append(f"Starting search for: {company_name} (Known Symbol: {symbol}, Fetch Reports: {fetch_reports})")
+    run.note(f"Starting search for: {company_name} (Known Symbol: {symbol}, Fetch Reports: {fetch_reports}, "
+             f"Deadline: {deadline_s or 'none'}s, Target: {target_reports or 'none'} reports)")
 
-    with DDGS() as ddgs:
-        # NOTE: is_report_link imported from utils.py
+    def verify(href, title):
+        return verify_pdf_content(href, title, company_name)
 
-        # --- 0.5 Load Company Map (Known Hubs) ---
+    pipeline = SearchPipeline()
+
+    # --- 0.5 Load Company Map (Known Hubs) ---
+    @pipeline.stage("hub_lookup")
+    def hub_lookup(run):
         known_url = None
         resolved_name = None
-        
         if known_website:
-            results["website"] = known_website
             # Handle both string URL and dict with 'href' key
             if isinstance(known_website, str):
                 known_url = known_website
             elif isinstance(known_website, dict):
                 known_url = known_website.get('href')
             resolved_name = company_name
-            log(f"Using known website: {known_url}")
+            run.log(f"Using known website: {known_url}")
         else:
             # --- OVERRIDE: Check Custom MongoDB Hubs FIRST ---
-            custom_hub = None
-            if "mongo" in st.session_state:
-                custom_hub = st.session_state.mongo.get_company_hub(company_name)
-            
+            custom_hub = mongo_db.get_company_hub(company_name) if mongo_db else None
             if custom_hub:
                 known_url = custom_hub
                 resolved_name = company_name
-                log(f"Found CUSTOM verified hub (Database Override): {known_url}")
+                run.log(f"Found CUSTOM verified hub (Database Override): {known_url}")
             else:
                 try:
                     with open("company_map.json", "r") as f:
                         cmap = json.load(f)
-                    
+
                     # 1. Exact Match
                     if company_name.lower() in cmap:
                         known_url = cmap[company_name.lower()]
                         resolved_name = company_name
-                        log(f"Found known sustainability hub (exact): {known_url}")
+                        run.log(f"Found known sustainability hub (exact): {known_url}")
                     else:
                         # 2. Fuzzy Match
                         matches = difflib.get_close_matches(company_name.lower(), cmap.keys(), n=1, cutoff=0.6)
                         if matches:
                             resolved_name = matches[0]
                             known_url = cmap[resolved_name]
-                            log(f"Found known sustainability hub (fuzzy '{resolved_name}'): {known_url}")
-                            
+                            run.log(f"Found known sustainability hub (fuzzy '{resolved_name}'): {known_url}")
                 except Exception as e:
-                    log(f"Map lookup error: {e}")
+                    run.log(f"Map lookup error: {e}")
 
-        # [MOVED] Saved links display logic moved to main UI loop
-
-        # --- 1. Official Domain Identification ---
-        domain_query = f"{company_name} official corporate website"
-        official_homepage_url = None
-        
+        run.state["known_url"] = known_url
         if known_url:
-             # Fast Path: Use known URL as the "official domain" for hub scanning
-             official_domain = urlparse(known_url).netloc
-             # Add to domain results to ensure it gets processed in hub scan
-             domain_results = [{'href': known_url, 'title': f"{resolved_name.title()} Sustainability Hub"}]
-        else:
-            log(f"Searching for domain: {domain_query}")
-            results["search_log"].append(f"Domain Search: \"{domain_query}\"")
-            try:
-                domain_results = search_web(domain_query, max_results=5, ddgs_instance=ddgs)
-            except Exception:
-                domain_results = []
-        
-        # Process domain results (either from Search or Fast Path)
-        for res in domain_results:
-                url = res['href']
-                title = res['title']
-                
-                if url.lower().endswith('.pdf'): continue
-                if not is_likely_official_domain(url, company_name): continue
-                
-                domain_str = urlparse(url).netloc.lower()
-                company_parts = company_name.lower().split()
-                
-                is_domain_match = False
-                for part in company_parts:
-                    if len(part) > 2 and part in domain_str:
-                        is_domain_match = True
-                        break
-                
-                if not is_domain_match: continue
-
-                if company_name.split()[0].lower() in title.lower():
-                     official_domain = domain_str
-                     official_homepage_url = url
-                     log(f"Identified official domain: {official_domain}")
-                     break
-
-
-
-        # --- 2. Find ESG Website (Refined) ---
-        website_query = None
-        if known_url:
-            # Trusted Source
-            results["website"] = {
+            # Trusted Source; its domain is the "official domain" for the later stages
+            run.state["official_domain"] = urlparse(known_url).netloc
+            run.set("website", {
                 "title": f"{resolved_name} Sustainability Hub (Verified Site)",
                 "href": known_url,
                 "body": "Official verified sustainability page."
-            }
+            })
+            return f"known hub {known_url}"
+        return "no known hub"
+
+    # --- 1. Official Domain Identification ---
+    @pipeline.stage("domain_search", after=["hub_lookup"],
+                    skip=lambda run: "known hub" if run.state["known_url"] else None)
+    def domain_search(run):
+        domain_query = f"{company_name} official corporate website"
+        run.log(f"Searching for domain: {domain_query}")
+        run.note(f"Domain Search: \"{domain_query}\"")
+        for res in search_web(domain_query, max_results=5):
+            url = res['href']
+            title = res['title']
+
+            if url.lower().endswith('.pdf'): continue
+            if not is_likely_official_domain(url, company_name): continue
+
+            domain_str = urlparse(url).netloc.lower()
+            if not any(len(part) > 2 and part in domain_str for part in company_name.lower().split()):
+                continue
+
+            if company_name.split()[0].lower() in title.lower():
+                run.state["official_domain"] = domain_str
+                run.state["official_homepage_url"] = url
+                run.log(f"Identified official domain: {domain_str}")
+                return domain_str
+        return "not identified"
+
+    # --- 2. Find ESG Website (Refined) ---
+    @pipeline.stage("website_search", after=["domain_search"],
+                    skip=lambda run: "known hub" if run.state["known_url"] else "strict mode" if strict_mode else None)
+    def website_search(run):
+        official_domain = run.state.get("official_domain")
+        if official_domain:
+            website_query = f"site:{official_domain} ESG sustainability"
         else:
-            # Discovery
-            if official_domain:
-                website_query = f"site:{official_domain} ESG sustainability"
-            else:
-                website_query = f"{company_name} official ESG sustainability website"
-                
-    # If we have a KNOWN WEBSITE, use the hybrid scraper FIRST for best results
-    if known_website:
-        print(f"   🔍 Using Hybrid Scraper for known website: {known_website}")
-        try:
+            website_query = f"{company_name} official ESG sustainability website"
+        run.log(f"Searching for website query: {website_query}")
+        run.state["website_results"] = search_web(website_query, max_results=3)
+        return f"{len(run.state['website_results'])} results"
+
+    # --- 2.5 Find Company Description (independent of everything else) ---
+    @pipeline.stage("description", skip=lambda run: "strict mode" if strict_mode else None)
+    def description(run):
+        desc_query = f"{company_name} company description summary"
+        run.note(f"Description Search: \"{desc_query}\"")
+        desc_results = search_web(desc_query, max_results=1)
+        if desc_results:
+            run.set("description", desc_results[0]['body'])
+            return "found"
+        return "none"
+
+    # --- 3. Deep Scan - Hybrid Scraper on the hub and the best search results, concurrently ---
+    @pipeline.stage("deep_scan", after=["website_search"])
+    def deep_scan(run):
+        urls = []
+        if run.state["known_url"]:
+            urls.append(run.state["known_url"])
+        for res in run.state.get("website_results", []):
+            if res['href'] not in urls and is_likely_official_domain(res['href'], company_name):
+                urls.append(res['href'])
+        urls = urls[:MAX_SCAN_URLS_STRICT if strict_mode else MAX_SCAN_URLS_NORMAL]
+        if not urls:
+            return "nothing to scan"
+
+        def scan(url):
+            run.touch(url)
             from esg_scraper import ESGScraper
-            
-            scraper = ESGScraper(headless=True)
-            # Use the new hybrid scan_url method (tries requests first, falls back to Playwright)
-            print(f"   🚀 Invoking scraper.scan_url('{known_website}')...")
-            links = scraper.scan_url(known_website)
-            
-            if links:
-                pdf_links, relevant_non_pdfs = filter_relevant_links(links, pdfs_only)
-                all_links = pdf_links + relevant_non_pdfs
-
-                if all_links:
-                    print(f"   ✅ Hybrid scraper found {len(pdf_links)} PDFs + {len(relevant_non_pdfs)} relevant webpages")
-
-                    candidates = []
-                    for l in all_links:
-                        is_pdf = l['url'].lower().endswith('.pdf')
-                        candidates.append({
-                            'title': l.get('text', 'Report'),
-                            'href': l['url'],
-                            'body': 'PDF Report' if is_pdf else 'Webpage Report / Resource'
-                        })
-
-                    return {
-                        "reports": candidates,
-                        "website": {"title": "Verified Site", "href": known_website, "body": "Scanned via Hybrid Scraper"},
-                        "search_log": [f"Hybrid Scraper: Found {len(pdf_links)} PDFs + {len(relevant_non_pdfs)} webpages"]
-                    }
-                else:
-                    print(f"   ⚠️ Scraper found {len(links)} links but none relevant. Trying fallback...")
-            else:
-                print("   ⚠️ Scraper found no links. Trying fallback...")
-
-        except Exception as e:
-            print(f"   ⚠️ Hybrid Scraper failed: {e}. Falling back to standard requests.")
-            # Fall through to standard requests logic below
-
-    # --- Standard Requests Logic (Fallback or Normal Mode) ---
-    search_results = []
-    if not strict_mode and website_query:
-        log(f"Searching for website query: {website_query}")
-        # Only do web search if we are NOT in strict mode and have a query
-        search_results = search_web(website_query, max_results=3, ddgs_instance=ddgs)
-    
-    # If strict mode, we start with just the known website
-    if strict_mode and known_website:
-        search_results = [{'href': known_website, 'title': 'Verified Site'}]
-
-    potential_domains = []
-    
-    # If we have a known website, prioritize it
-    if known_website and not strict_mode: # If strict mode, we ALREADY handled it above OR we are falling back to it
-         potential_domains.append(known_website) # We will scan it below
-    
-    # Add search results
-    for res in search_results:
-        potential_domains.append(res['href'])
-
-    # Deduplicate
-    # Keep order
-    unique_domains = []
-    seen = set()
-    for d in potential_domains:
-        if d not in seen:
-            unique_domains.append(d)
-            seen.add(d)
-
-    # --- SCREENSHOT CAPTURE (Always attempt for first URL) ---
-    if unique_domains:
-        target_url = unique_domains[0]
-        try:
-            from playwright.sync_api import sync_playwright
-            import tempfile
-            import uuid
-            
-            screenshot_path = None
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                
-                # Set reasonable timeout and viewport
-                page.set_viewport_size({"width": 1280, "height": 1024})
-                
-                try:
-                    # Load page with timeout
-                    page.goto(target_url, wait_until='networkidle', timeout=10000)
-                    
-                    # Generate unique filename
-                    temp_dir = tempfile.gettempdir()
-                    screenshot_filename = f"esg_screenshot_{uuid.uuid4().hex[:8]}.png"
-                    screenshot_path = f"{temp_dir}/{screenshot_filename}"
-                    
-                    # Capture screenshot
-                    page.screenshot(path=screenshot_path, full_page=False)
-                    results['screenshot'] = screenshot_path
-                    log(f"Screenshot captured: {screenshot_path}")
-                    
-                except Exception as page_error:
-                    log(f"Screenshot page load failed: {page_error}")
-                finally:
-                    browser.close()
-                    
-        except Exception as screenshot_error:
-            log(f"Screenshot capture failed: {screenshot_error}")
-            # Continue without screenshot
-
-    # 3. Deep Scan - Use Hybrid Scraper for ALL URLs
-    all_reports = []
-    max_scan = 1 if strict_mode else 3
-    
-    for url in unique_domains[:max_scan]:
-        try:
-            domain = urlparse(url).netloc
-            if not strict_mode:
-                if not is_likely_official_domain(url, company_name):
-                    continue
-            
-            print(f"   🔍 Scanning: {url}...")
-            
-            # USE HYBRID SCRAPER FOR ALL URLS
-            try:
-                from esg_scraper import ESGScraper
-                scraper = ESGScraper(headless=True)
-                
-                print(f"   🚀 Using hybrid scraper on {url}")
-                links = scraper.scan_url(url)
-                
-                if links:
-                    pdf_links, relevant_non_pdfs = filter_relevant_links(links, pdfs_only)
-
-                    if pdf_links or relevant_non_pdfs:
-                        print(f"   ✅ Found {len(pdf_links)} PDFs + {len(relevant_non_pdfs)} relevant webpages")
-                        for l in pdf_links:
-                            all_reports.append({
-                                'title': l.get('text', 'Report'),
-                                'href': l['url'],
-                                'body': 'PDF Report'
-                            })
-                        for l in relevant_non_pdfs:
-                            all_reports.append({
-                                'title': l.get('text', 'Resource'),
-                                'href': l['url'],
-                                'body': 'Webpage Report / Resource'
-                            })
-                    else:
-                        print(f"   ⚠️ Found {len(links)} links but none relevant on {url}")
-                else:
-                    print(f"   ⚠️ No links found on {url}")
-                    
-            except Exception as scraper_error:
-                print(f"   ⚠️ Hybrid scraper failed for {url}: {scraper_error}")
-                # Could add fallback to old requests logic here if needed
-                
-        except Exception as e:
-            log(f"  Error processing domain {url}: {e}")
-    
-    # If we found reports via hybrid scraper, return them
-    if all_reports:
-        # Deduplicate by URL
+            # Page preview comes from the first URL's own browser scan (if it needs one)
+            scraper = ESGScraper(headless=True, screenshots=SCREENSHOTS_ENABLED and url == urls[0])
+            print(f"   🚀 Using hybrid scraper on {url}")
+            return scraper.scan_url(url), scraper.written_screenshot(url)
+
+        found = {}
+        for url, scanned in run.map(scan, urls):
+            if not scanned:
+                continue
+            links, screenshot = scanned
+            if screenshot:
+                run.set("screenshot", screenshot)
+                run.log(f"Screenshot captured: {screenshot}")
+            if not links:
+                print(f"   ⚠️ No links found on {url}")
+                continue
+            pdf_links, relevant_non_pdfs = filter_relevant_links(links, pdfs_only)
+            if not (pdf_links or relevant_non_pdfs):
+                print(f"   ⚠️ Found {len(links)} links but none relevant on {url}")
+                continue
+            print(f"   ✅ Found {len(pdf_links)} PDFs + {len(relevant_non_pdfs)} relevant webpages")
+            found[url] = ([{'title': l.get('text', 'Report'), 'href': l['url'], 'body': 'PDF Report'}
+                           for l in pdf_links] +
+                          [{'title': l.get('text', 'Resource'), 'href': l['url'], 'body': 'Webpage Report / Resource'}
+                           for l in relevant_non_pdfs])
+
+        # Keep scan order (hub first); deduplicate by URL without the trailing slash
         seen_urls = set()
-        unique_reports = []
-        for r in all_reports:
-            # Normalize URL for deduplication (strip trailing slash)
-            u = r['href'].strip().rstrip('/')
-            if u not in seen_urls:
-                seen_urls.add(u)
-                unique_reports.append(r)
-                
-        return {
-            "reports": unique_reports,
-            "website": {"title": "Scanned Site", "href": unique_domains[0] if unique_domains else known_website, "body": "Scanned via Hybrid Scraper"},
-            "search_log": [f"Hybrid Scraper: Found {len(unique_reports)} unique reports (from {len(all_reports)} total)"]
-        }
-    
-    # Fallback to homepage if no ESG site found
-    if not results.get("website") and official_homepage_url and not strict_mode:
-        log(f"ESG specific site not found. Falling back to homepage: {official_homepage_url}")
-        results["website"] = {
-            "title": f"{company_name} Official Homepage",
-            "href": official_homepage_url,
-            "body": "Official company homepage (ESG section not explicitly found)."
-        }
-            
-        # --- 2.5 Find Company Description ---
-        try:
-            desc_query = f"{company_name} company description summary"
-            results["search_log"].append(f"Description Search: \"{desc_query}\"")
-            desc_results = search_web(desc_query, max_results=1, ddgs_instance=ddgs)
-            if desc_results:
-                results['description'] = desc_results[0]['body']
-        except Exception as e:
-            log(f"Description search error: {e}")
-
-        # --- 3. Report Discovery ---
+        total = 0
+        for url in urls:
+            for r in found.get(url, []):
+                total += 1
+                u = r['href'].strip().rstrip('/')
+                if u not in seen_urls:
+                    seen_urls.add(u)
+                    run.add_report(r)
+        if not seen_urls:
+            return f"{len(urls)} URLs, nothing relevant"
+
+        if not results.get("website"):
+            run.set("website", {"title": "Scanned Site", "href": urls[0], "body": "Scanned via Hybrid Scraper"})
+        run.note(f"Hybrid Scraper: Found {len(seen_urls)} unique reports (from {total} total)")
+        run.stop("deep scan found reports")
+        return f"{len(urls)} URLs, {len(seen_urls)} reports"
+
+    # --- 4. Report Discovery on the official site ---
+    def no_site(run):
         if not fetch_reports:
-             log("Skipping report discovery (Step 1 complete).")
-             return results
-             
-        print("Starting Report Discovery...")
-
-        # PRIORITY STRATEGY: Scan The Official Hub (Verified Site)
-        # We do this FIRST to ensure authoritative reports are top of list.
-        if results.get("website"):
-            log("Strategy Priority: Scanning ESG Website for Reports...")
-            try:
-                web_url = results["website"]["href"]
-                parsed_base = urlparse(web_url)
-                primary_domain = parsed_base.netloc
-
-                def normalize_href(base, href):
-                    if not href:
-                        return None
-                    if href.startswith("mailto:") or href.startswith("javascript:"):
-                        return None
-                    if href.startswith("#"):
-                        return None
-                    if href.startswith("//"):
-                        return f"{parsed_base.scheme}:{href}"
-                    if href.startswith("http"):
-                        return href
-                    return urljoin(base, href)
-
-                def collect_links(page_url, html_text):
-                    soup = BeautifulSoup(html_text, 'html.parser')
-                    pdf_candidates = []
-                    hubs = []
-                    for link in soup.find_all('a', href=True):
-                        raw_href = link['href']
-                        normalized = normalize_href(page_url, raw_href)
-                        if not normalized:
-                            continue
-
-                        link_domain = urlparse(normalized).netloc
-                        if link_domain and primary_domain and primary_domain not in link_domain:
-                            continue
-
-                        # --- Enhanced Name Extraction with Year Detection & Headers ---
-                        import re
-                        
-                        def extract_year_bs(text):
-                            years = re.findall(r'\b(202[0-9]|203[0])\b', str(text))
-                            return years[0] if years else None
-                        
-                        def get_preceding_header_bs(element):
-                            """Traverses backwards/up to find nearest header"""
-                            try:
-                                current = element.parent
-                                for _ in range(4): # Limit depth
-                                    if not current: break
-                                    prev = current.find_previous_sibling()
-                                    while prev:
-                                        if prev.name and prev.name.startswith('h') and len(prev.name) == 2:
-                                            return prev.get_text(strip=True)
-                                        prev = prev.find_previous_sibling()
-                                    current = current.parent
-                            except Exception:
-                                return None
-                            return None
-
-                        def get_parent_context_bs(element):
-                            """Get parent context for year/info extraction"""
-                            parent = element.parent
-                            for _ in range(2):  # Go up 2 levels
-                                if parent and parent.name in ['div', 'p', 'li', 'td', 'section', 'article']:
-                                    parent_text = parent.get_text(strip=True)
-                                    if parent_text and len(parent_text) < 200:
-                                        return parent_text
-                                parent = parent.parent if parent else None
-                            return ""
-                        
-                        visible_text = link.get_text(strip=True)
-                        aria = link.get('aria-label', '').strip()
-                        title_attr = link.get('title', '').strip()
-                        
-                        alt_text = ""
-                        img_tag = link.find('img')
-                        if img_tag:
-                            alt_text = img_tag.get('alt', '').strip()
-
-                        # Pick the most descriptive name
-                        generic_terms = ["download", "pdf", "click here", "read more", "view", "report", "file", "link", "sustainability", "esg", "annual", "environmental", "social", "governance", "annual report", "sustainability report"]
-                        
-                        is_text_generic = not visible_text or visible_text.lower() in generic_terms or len(visible_text) < 4
-                        
-                        # 1. Base Name Selection
-                        candidate_text = visible_text
-                        if is_text_generic:
-                            if aria: candidate_text = aria
-                            elif title_attr: candidate_text = title_attr
-                            elif alt_text: candidate_text = alt_text
-                        elif aria and len(aria) > len(visible_text) + 5:
-                            candidate_text = aria
-                        
-                        if not candidate_text: candidate_text = "Unknown Web Resource"
-
-                        # 2. Contextual Enhancement Pipeline
-                        # A. Check URL for Year
-                        year_url = extract_year_bs(normalized)
-                        if year_url and year_url not in candidate_text:
-                            candidate_text = f"{candidate_text} ({year_url})"
-
-                        # B. Check Preceding Header (if generic)
-                        if len(candidate_text) < 30 or any(t in candidate_text.lower() for t in generic_terms):
-                            header = get_preceding_header_bs(link)
-                            if header and len(header) < 50:
-                                header = re.sub(r'\s+', ' ', header).strip()
-                                if header.lower() not in candidate_text.lower():
-                                    candidate_text = f"{header} - {candidate_text}"
-
-                        # C. Check Parent Content (last resort for year)
-                        if not extract_year_bs(candidate_text):
-                            context = get_parent_context_bs(link)
-                            year = extract_year_bs(context)
-                            if year and year not in candidate_text:
-                                candidate_text = f"{candidate_text} ({year})"
-                            
-                        text = clean_title(candidate_text)
-                        if not text: text = "Unknown Web Resource"
-
-                        # BROADENED SCOPE: Check both PDF and HTML for relevance
-                        is_pdf = normalized.lower().endswith('.pdf') or normalized.lower().endswith('pdf')
-                        
-                        # 1. Relevance Check (Keywords)
-                        if is_report_link(text, normalized):
-                            
-                            # 2. Negative Filter
-                            is_negative = False
-                            neg_terms = ['policy', 'charter', 'code of conduct', 'guidelines', 'presentation']
-                            for n in neg_terms:
-                                if n in text.lower(): is_negative = True
-                            
-                            if not is_negative:
-                                pdf_candidates.append({'href': normalized, 'title': text})
-                            
-                            # If it's a report link, we don't treat it as a hub to traverse?
-                            # Actually, maybe we should still traverse if it's a hub-like page?
-                            # But for now, let's capture it.
-                            continue
-
-                        if is_pdf:
-                             # If it is a PDF but failed is_report_link (maybe missing keyword?), 
-                             # we might still want it if we are desperate, but is_report_link is the gatekeeper.
-                             pass
-
-                        lower_text = text.lower()
-                        hub_keywords = ['report', 'archive', 'download', 'library', 'sustainability', 'esg', 'impact', 'responsibility', 'csr']
-                        if any(k in lower_text for k in hub_keywords):
-                            hubs.append(normalized)
-
-                    return pdf_candidates, hubs
-
-                hubs_to_visit = [web_url]
-                visited_hubs = set()
-                found_on_main = 0
-                max_hubs = 5
-
-                while hubs_to_visit and len(visited_hubs) < max_hubs:
-                    current_hub = hubs_to_visit.pop(0)
-                    if current_hub in visited_hubs:
-                        continue
-                    visited_hubs.add(current_hub)
-
-                    try:
-                        log(f"  Scanning hub: {current_hub}")
-                        resp = robust_get(current_hub, timeout=6)
-                    except Exception as e:
-                        log(f"  Hub request failed: {e}")
-                        continue
-
-                    if resp.status_code != 200:
-                        continue
-
-                    scan_candidates, hub_links_to_follow = collect_links(current_hub, resp.text)
-
-                    if scan_candidates:
-                        log(f"    Found {len(scan_candidates)} potential PDFs on {current_hub}")
-                        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                            futures = {executor.submit(verify_pdf_content, c['href'], c['title'], company_name): c for c in scan_candidates}
-                            for future in concurrent.futures.as_completed(futures):
-                                v = future.result()
-                                if v and v['href'] not in [r['href'] for r in results['reports']]:
-                                    v['source'] = "Official Site"
-                                    results["reports"].append(v)
-                                    found_on_main += 1
-
-                    if found_on_main < 5:
-                        for h in hub_links_to_follow:
-                            if h not in visited_hubs and h not in hubs_to_visit and len(hubs_to_visit) < max_hubs:
-                                hubs_to_visit.append(h)
-
-            except Exception as e:
-                print(f"Priority Strategy Error: {e}")
-                
-            # FALLBACK: If scraping failed (403) or found nothing, search THE SITE via Google/DDG.
-            # This handles blocked sites (like CBRE) where we know the domain is correct.
-            if len(results["reports"]) == 0 and results.get("website"):
-                 log("Priority Strategy Fallback: Site is blocked or empty. Searching SITE via engine...")
-                 try:
-                     web_url = results["website"]["href"]
-                     domain = urlparse(web_url).netloc
-                     # Targeted search on the specific trusted domain
-                     site_query = f"site:{domain} ESG sustainability report pdf"
-                     log(f"  Fallback Site Search: {site_query}")
-                     results["search_log"].append(f"Hub Fallback Search: \"{site_query}\"")
-                     
-                     site_results = search_web(site_query, max_results=6, ddgs_instance=ddgs)
-                     
-                     fallback_candidates = []
-                     for res in site_results:
-                         if is_report_link(res['title'], res['href']):
-                             fallback_candidates.append(res)
-                             
-                     if fallback_candidates:
-                         # Use ThreadPool for faster verification
-                         with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                            futures = {executor.submit(verify_pdf_content, c['href'], c['title'], company_name): c for c in fallback_candidates}
-                            for future in concurrent.futures.as_completed(futures):
-                                v = future.result()
-                                if v:
-                                    if v['href'] not in [r['href'] for r in results['reports']]:
-                                        v['source'] = "Official Site Search" # Trusted source
-                                        results["reports"].append(v)
-                 except Exception as e:
-                     log(f"Fallback Site Search Error: {e}")
- 
-        if strict_mode and results.get("website"):
-            log("Strict Mode: Skipping external search strategies (B, C, D). Returning only direct findings.")
-            
-            # --- STRICT MODE ENHANCEMENT: Playwright Scraper ---
-            # If standard scraper found nothing (e.g. 403 or JS site), use Playwright
-            if len(results["reports"]) == 0:
-                log("Strict Mode: Basic scraper returned 0 results. Attempting Deep Browser Scan (Playwright)...")
-                try:
-                    # Initialize Playwright Scraper (Headless)
-                    from esg_scraper import ESGScraper
-                    scraper = ESGScraper(headless=True)
-                    
-                    # Create a "dummy" config for this specific on-the-fly scan
-                    temp_config = {
-                        "url": results["website"]["href"],
-                        "name": company_name,
-                        "wait_until": "domcontentloaded",
-                        "wait_for": "body" 
-                    }
-                    
-                    # Use a synchronized call - we might need to handle the loop if already running?
-                    # Streamlit runs in a thread, so sync_playwright should be fine.
-                    # We reuse the logic from esg_scraper.py but we need a context.
-                    # Actually ESGScraper.run uses sync_playwright() context manager. 
-                    # We can't easily jump into the middle of it without refactoring esg_scraper OR just instantiating it.
-                    # Let's use the .run() method but with just ONE site.
-                    
-                    scrape_results = scraper.run(sites_config=[temp_config])
-                    
-                    if scrape_results and company_name in scrape_results:
-                         # It found something!
-                         found_links = scrape_results[company_name]
-                         
-                         # Deduplicate and Limit
-                         seen_urls = set(r['href'] for r in results["reports"])
-                         count_added = 0
-                         
-                         # Filter out obvious duplicates and limit count
-                         unique_found = []
-                         for link in found_links:
-                             if link['url'] not in seen_urls:
-                                 unique_found.append(link)
-                                 seen_urls.add(link['url'])
-                         
-                         # Iterate through unique found links (limited to top 20)
-                         for link in unique_found[:20]:
-                             pw_report = {
-                                 "title": link['text'],
-                                 "href": link['url'],
-                                 "body": "Detected via Deep Browser Scan",
-                                 "source": "Deep Browser Scan"
-                             }
-                             results["reports"].append(pw_report)
-                             log(f"Playwright found report: {pw_report['title']}")
-                             
-                         log(f"Deep Scan: Added {len(unique_found[:20])} unique reports (filtered from {len(found_links)})")
-                         
-                except Exception as e:
-                    log(f"Playwright Scan Error: {e}")
-
-            return results
- 
-        # SECONDARY STRATEGY: Direct Search (Fill gaps)
-        # Optimization: SKIP if we already have good results (> 3)
-        if len(results["reports"]) < 4:
-            report_queries = []
-            if symbol:
-                # Prioritize recent report years individually for clearer matches
-                report_queries = [
-                    f"{symbol} ESG report 2024",
-                    f"{symbol} ESG report 2023"
-                ]
-                log("Strategy B: Direct Search by Symbol (year-by-year)")
-            elif official_domain:
-                report_queries = [f"site:{official_domain} ESG sustainability report pdf"]
-            else:
-                report_queries = [f"{company_name} ESG sustainability report pdf"]
-            try:
-                for report_query in report_queries:
-                    if len(results["reports"]) >= 8:
-                        break
-
-                    log(f"Strategy B: Direct Search ({report_query})")
-                    results["search_log"].append(f"Direct Report Search: \"{report_query}\"")
-                    report_search_results = search_web(report_query, max_results=8, ddgs_instance=ddgs)
-
-                    candidates = []
-                    for res in report_search_results:
-                        if is_report_link(res['title'], res['href']):
-                             # Don't re-add what we already found
-                             if res['href'] not in [r['href'] for r in results['reports']]:
-                                candidates.append(res)
-
-                    if candidates:
-                        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                            futures = {executor.submit(verify_pdf_content, c['href'], c['title'], company_name): c for c in candidates}
-                            for future in concurrent.futures.as_completed(futures):
-                                verified_item = future.result()
-                                if verified_item:
-                                    if verified_item['href'] not in [r['href'] for r in results['reports']]:
-                                        verified_item['source'] = "Web Search"
-                                        results["reports"].append(verified_item)
-                                        if len(results["reports"]) >= 8: break # Cap total
-                    # Avoid hammering the API; respect one-query-at-a-time intent
-                    time.sleep(0.3)
-            except Exception as e:
-                print(f"Strategy B error: {e}")
+            return "report discovery off"
+        if not results.get("website") and (strict_mode or not run.state.get("official_homepage_url")):
+            return "no official site"
+        return None
 
-        # Strategy C: ResponsibilityReports.com
-        if len(results["reports"]) < 4:  
-             log("Strategy C: ResponsibilityReports.com Fallback")
-             rr_query = f"site:responsibilityreports.com {company_name} ESG report"
-             results["search_log"].append(f"ResponsibilityReports Search: \"{rr_query}\"")
-             try:
-                 rr_results = search_web(rr_query, max_results=3, ddgs_instance=ddgs)
-                 for res in rr_results:
-                     if res['href'] not in [r['href'] for r in results['reports']]:
-                         results["reports"].append({
-                             "title": f"ResponsibilityReports: {res['title']}",
-                             "href": res['href'],
-                             "body": "Sourced from ResponsibilityReports.com",
-                             "source": "ResponsibilityReports"
-                         })
-                         if len(results["reports"]) >= 6: break
-             except Exception as e:
-                 print(f"Strategy C error: {e}")
-        
-
-
-        # --- 5. UN Global Compact (COP) ---
-        if len(results["reports"]) < 8:
-             ungc_query = f"site:unglobalcompact.org {company_name} Communication on Progress pdf"
-             log(f"Searching UN Global Compact: {ungc_query}")
-             results["search_log"].append(f"UNGC Search: \"{ungc_query}\"")
-             try:
-                 ungc_results = search_web(ungc_query, max_results=4, ddgs_instance=ddgs)
-                 
-                 ungc_candidates = []
-                 for res in ungc_results:
-                     if res['href'].lower().endswith('.pdf'):
-                         ungc_candidates.append(res)
-                 
-                 # Verify UNGC
-                 with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-                     futures = {executor.submit(verify_pdf_content, c['href'], c['title'], company_name): c for c in ungc_candidates}
-                     for future in concurrent.futures.as_completed(futures):
-                         verified_item = future.result()
-                         if verified_item:
-                             if verified_item['href'] not in [r['href'] for r in results['reports']]:
-                                 verified_item['source'] = "UN Global Compact"
-                                 results["reports"].append(verified_item)
-             except Exception as e:
-                 log(f"UNGC search error: {e}")
+    # PRIORITY STRATEGY: Scan The Official Hub (Verified Site)
+    # We do this FIRST to ensure authoritative reports are top of list.
+    @pipeline.stage("hub_crawl", after=["deep_scan"], skip=no_site)
+    def hub_crawl(run):
+        if not results.get("website"):
+            homepage = run.state["official_homepage_url"]
+            run.log(f"ESG specific site not found. Falling back to homepage: {homepage}")
+            run.set("website", {
+                "title": f"{company_name} Official Homepage",
+                "href": homepage,
+                "body": "Official company homepage (ESG section not explicitly found)."
+            })
+        run.log("Strategy Priority: Scanning ESG Website for Reports...")
+        web_url = results["website"]["href"]
+        primary_domain = urlparse(web_url).netloc
+
+        def visit_hub(current_hub, depth):
+            run.touch(current_hub)
+            resp = robust_get(current_hub, timeout=REQUESTS_HUB_TIMEOUT_S)
+            if resp.status_code != 200:
+                return 0, []
+            scan_candidates, hub_links_to_follow = _collect_hub_links(current_hub, resp.text, primary_domain)
+            if scan_candidates:
+                run.log(f"    Found {len(scan_candidates)} potential PDFs on {current_hub}")
+            verified = run.verify(scan_candidates, verify, source="Official Site")
+            run.emit("hub", url=current_hub, depth=depth, candidates=len(scan_candidates), verified=verified)
+            return verified, hub_links_to_follow
+
+        # Hubs are crawled best-first, concurrently, within the crawl budget and the search's
+        # deadline, until the reports still missing from the target are found
+        budget = CRAWL_TIME_BUDGET_S if run.time_left() is None else min(CRAWL_TIME_BUDGET_S, run.time_left())
+        target = min(CRAWL_TARGET_PDFS, max(1, run.target - run.report_count())) if run.target else CRAWL_TARGET_PDFS
+        frontier = CrawlFrontier(visit_hub, time_budget_s=budget, target=target,
+                                 allowed_domain=primary_domain, log=run.log)
+        frontier.add(web_url, depth=0)
+        crawl_stats = frontier.run()
+        run.note(
+            f"Hub Crawl: {crawl_stats['pages']} pages (depth {crawl_stats['max_depth']}), "
+            f"{crawl_stats['found']} verified PDFs in {crawl_stats['elapsed_s']}s ({crawl_stats['stop_reason']})")
+        pool = session_stats()
+        run.log(f"  HTTP pool: {pool['connections_reused']}/{pool['requests']} requests reused a connection "
+                f"({pool['hosts']} hosts)")
+        cached = cache_stats()
+        run.log(f"  HTTP cache: {cached['hits']} hits, {cached['revalidated']} revalidated (304), "
+                f"{cached['misses']} misses")
+        verified = get_verification_cache().stats
+        run.log(f"  Verification cache: {verified['local_hits'] + verified['db_hits']} hits, "
+                f"{verified['revalidated']} unchanged, {verified['misses']} misses")
+        parsed = get_pdf_pool().stats
+        run.log(f"  PDF parsing: {parsed['parsed']} in workers, {parsed['timeouts']} timed out")
+        return f"{crawl_stats['found']} reports"
+
+    # FALLBACK: If scraping failed (403) or found nothing, search THE SITE via Google/DDG.
+    # This handles blocked sites (like CBRE) where we know the domain is correct.
+    @pipeline.stage("site_search", after=["hub_crawl"],
+                    skip=lambda run: no_site(run) or ("hub crawl found reports" if run.report_count() else None))
+    def site_search(run):
+        run.log("Priority Strategy Fallback: Site is blocked or empty. Searching SITE via engine...")
+        domain = urlparse(results["website"]["href"]).netloc
+        # Targeted search on the specific trusted domain
+        site_query = f"site:{domain} ESG sustainability report pdf"
+        run.log(f"  Fallback Site Search: {site_query}")
+        run.note(f"Hub Fallback Search: \"{site_query}\"")
+        fallback_candidates = [res for res in search_web(site_query, max_results=6)
+                               if is_report_link(res['title'], res['href'])]
+        added = run.verify(fallback_candidates, verify, source="Official Site Search")  # Trusted source
+        return f"{added} reports"
+
+    # --- STRICT MODE: no external search strategies; a Playwright scan if the site gave nothing ---
+    @pipeline.stage("browser_scan", after=["site_search"],
+                    skip=lambda run: "not strict mode" if not strict_mode else (
+                        no_site(run) or ("site scan found reports" if run.report_count() else None)))
+    def browser_scan(run):
+        run.log("Strict Mode: Basic scraper returned 0 results. Attempting Deep Browser Scan (Playwright)...")
+        from esg_scraper import ESGScraper
+        scraper = ESGScraper(headless=True)
+        # Create a "dummy" config for this specific on-the-fly scan
+        temp_config = {
+            "url": results["website"]["href"],
+            "name": company_name,
+            "wait_until": "domcontentloaded",
+            "wait_for": "body"
+        }
+        scrape_results = scraper.run(sites_config=[temp_config])
+        found_links = (scrape_results or {}).get(company_name) or []
+
+        # Deduplicate and limit to the top 20
+        added = 0
+        for link in found_links:
+            if added >= 20:
+                break
+            pw_report = {
+                "title": link['text'],
+                "href": link['url'],
+                "body": "Detected via Deep Browser Scan",
+            }
+            if run.add_report(pw_report, source="Deep Browser Scan"):
+                added += 1
+                run.log(f"Playwright found report: {pw_report['title']}")
+        run.log(f"Deep Scan: Added {added} unique reports (filtered from {len(found_links)})")
+        return f"{added} reports"
+
+    def fallback_skip(min_reports):
+        def skip(run):
+            if not fetch_reports:
+                return "report discovery off"
+            if strict_mode:
+                return "strict mode"
+            count = run.report_count()
+            if run.target_met():
+                return f"target of {run.target} reports met"
+            if count >= min_reports:
+                return f"{count} reports already"
+            return None
+        return skip
+
+    # SECONDARY STRATEGY: Direct Search (Fill gaps); the per-year queries run concurrently
+    @pipeline.stage("year_queries", after=["site_search"], skip=fallback_skip(4))
+    def year_queries(run):
+        official_domain = run.state.get("official_domain")
+        if symbol:
+            # Prioritize recent report years individually for clearer matches
+            report_queries = [f"{symbol} ESG report 2024", f"{symbol} ESG report 2023"]
+        elif official_domain:
+            report_queries = [f"site:{official_domain} ESG sustainability report pdf"]
+        else:
+            report_queries = [f"{company_name} ESG sustainability report pdf"]
+        for report_query in report_queries:
+            run.log(f"Strategy B: Direct Search ({report_query})")
+            run.note(f"Direct Report Search: \"{report_query}\"")
+
+        candidates = []
+        for _, found in run.map(lambda q: search_web(q, max_results=8), report_queries):
+            candidates.extend(res for res in found or [] if is_report_link(res['title'], res['href']))
+        added = run.verify(candidates, verify, source="Web Search", cap=8)  # Cap total
+        return f"{added} reports"
+
+    # Strategy C: ResponsibilityReports.com
+    @pipeline.stage("responsibility_reports", after=["site_search"], skip=fallback_skip(4))
+    def responsibility_reports(run):
+        run.log("Strategy C: ResponsibilityReports.com Fallback")
+        rr_query = f"site:responsibilityreports.com {company_name} ESG report"
+        run.note(f"ResponsibilityReports Search: \"{rr_query}\"")
+        added = 0
+        for res in search_web(rr_query, max_results=3):
+            report = {
+                "title": f"ResponsibilityReports: {res['title']}",
+                "href": res['href'],
+                "body": "Sourced from ResponsibilityReports.com",
+            }
+            if run.add_report(report, source="ResponsibilityReports", cap=6):
+                added += 1
+        return f"{added} reports"
+
+    # --- 5. UN Global Compact (COP) ---
+    @pipeline.stage("ungc", after=["site_search"], skip=fallback_skip(8))
+    def ungc(run):
+        ungc_query = f"site:unglobalcompact.org {company_name} Communication on Progress pdf"
+        run.log(f"Searching UN Global Compact: {ungc_query}")
+        run.note(f"UNGC Search: \"{ungc_query}\"")
+        ungc_candidates = [res for res in search_web(ungc_query, max_results=4)
+                           if res['href'].lower().endswith('.pdf')]
+        added = run.verify(ungc_candidates, verify, source="UN Global Compact")
+        return f"{added} reports"
+
+    started = time.monotonic()
+    try:
+        pipeline.run(run)
+        run.note(f"Search finished in {time.monotonic() - started:.2f}s")
+
+        # Domains this search requested that the circuit breaker cut off (repeated 403s/timeouts)
+        breakers = {d: b for d, b in get_circuit_breaker().snapshot().items() if d in run.domains}
+        if breakers:
+            run.set("circuit_breakers", breakers)
+            for d, b in breakers.items():
+                run.note(f"Circuit {b['state']}: {d} ({b['failures']} failures, last {b['last_reason']}, "
+                         f"{b['short_circuited']} requests skipped)")
+    finally:
+        # Notes and fields after this are dropped, so everything above is logged and streamed first
+        run.close()
 
     # --- Sorting: Newest First ---
     def extract_year(text):
         if not text: return 0
         import re
-        
+
         # 1. Full Year (e.g. 2023, 2024)
         match = re.search(r'20[12][0-9]', text)
         if match:
             return int(match.group(0))
-            
+
         # 2. Fiscal Year Short (e.g. FY23, FY24)
         match_fy = re.search(r'FY([2-9][0-9])', text, re.IGNORECASE)
         if match_fy:
             return 2000 + int(match_fy.group(1))
-            
+
         return 0
-    
+
     # Sort reports by year descending (newest on top)
     results["reports"].sort(key=lambda x: extract_year(x['title']), reverse=True)
-    
-
 
     return results
 
 
 
+# --- Live Search View ---
+def iter_search_esg_info(company_name, **kwargs):
+    """search_esg_info as a generator of progress events, ending with {"kind": "done", "results": ...}."""
+    return stream_events(search_esg_info, company_name, **kwargs)
+
+
+def record_search_metrics(data, total_s):
+    """Keep time-to-first-result and stage timings for a UI search (MongoDB search_metrics)."""
+    metrics = {
+        "company": data.get("company"),
+        "time_to_first_report_s": data.get("time_to_first_report_s"),
+        "total_s": total_s,
+        "reports": len(data.get("reports") or []),
+        "partial": bool(data.get("partial")),
+        "stage_timings": data.get("stage_timings") or {},
+    }
+    print(f"[Search] {metrics['company']}: first report after {metrics['time_to_first_report_s']}s, "
+          f"{metrics['reports']} reports in {total_s}s")
+    if mongo_db and mongo_db.client:
+        if mongo_db.save_search_metrics(metrics):
+            load_recent_search_metrics.clear()
+
+
+def run_search_live(target_label, company_name, **kwargs):
+    """
+    search_esg_info with results shown as they arrive: stage progress, the
+    ESG site, each report and the latest log lines. Returns the results.
+    """
+    status = st.status(f"Scanning {target_label}...", expanded=True)
+    with status:
+        progress = st.progress(0.0, text="Starting search...")
+        site_slot = st.empty()
+        first_slot = st.empty()
+        reports_box = st.container()
+        log_slot = st.empty()
+
+    stages, finished, lines = [], set(), []
+    data, total_s, found = {}, 0.0, 0
+    for event in iter_search_esg_info(company_name, **kwargs):
+        kind = event["kind"]
+        if kind == "start":
+            stages = event["stages"]
+        elif kind == "stage":
+            if event["status"] != "running":
+                finished.add(event["name"])
+            progress.progress(len(finished) / max(1, len(stages)),
+                              text=f"{event['name']}: {event['status']} ({len(finished)}/{len(stages)} stages)")
+        elif kind == "field" and event["key"] == "website" and event["value"]:
+            site = event["value"]
+            site_slot.markdown(f"🌐 **{site.get('title', 'ESG site')}**: {site.get('href')}")
+        elif kind == "report":
+            found += 1
+            if found == 1:
+                first_slot.caption(f"⚡ First report after {event['t']:.1f}s")
+            report = event["report"]
+            reports_box.markdown(f"📄 [{report.get('title') or report['href']}]({report['href']}) · "
+                                 f"{report.get('source') or report.get('body', '')}")
+        elif kind == "hub":
+            lines.append(f"Hub page (depth {event['depth']}): {event['url']} -> {event['verified']} verified")
+        elif kind == "log":
+            lines.append(event["line"])
+        elif kind == "done":
+            data, total_s = event["results"], event["t"]
+        if kind in ("hub", "log"):
+            log_slot.code("\n".join(lines[-8:]), language=None)
+
+    first = data.get("time_to_first_report_s")
+    label = f"Found {len(data.get('reports') or [])} reports in {total_s:.1f}s"
+    if first is not None:
+        label += f" (first after {first:.1f}s)"
+    status.update(label=label, state="complete", expanded=False)
+    record_search_metrics(data, total_s)
+    return data
+
+
 # Function to load S&P 500 companies
 def load_sp500_companies():
     if mongo_db and mongo_db.client:
@@ -1206,6 +1132,11 @@ with st.sidebar:
                 report_count = st.session_state.mongo.db.esg_reports.count_documents({"type": {"$ne": "scan_marker"}})
                 companies_scanned = len(st.session_state.mongo.db.esg_reports.distinct("symbol"))
                 st.caption(f"📊 {report_count} reports found across {companies_scanned} companies")
+                recent = load_recent_search_metrics()
+                firsts = sorted(m["time_to_first_report_s"] for m in recent if m.get("time_to_first_report_s") is not None)
+                if firsts:
+                    st.caption(f"⚡ Median time to first result: {firsts[len(firsts) // 2]:.1f}s "
+                               f"over the last {len(recent)} searches")
             except Exception:
                 pass
 
@@ -1382,16 +1313,17 @@ if selected_tab == "🔍 Search & Analyze":
                 else:
                     st.session_state.esg_data = {'reports': []}
                 
-                with st.spinner(f"Scanning {final_target_website}..."):
-                    sym = company_symbol if company_symbol else None
-                    data = search_esg_info(
-                        company_name, 
-                        fetch_reports=True, 
-                        symbol=sym,
-                        known_website=final_target_website,
-                        pdfs_only=pdfs_only  # Pass PDFs only flag
-                    )
-                    st.session_state.esg_data = data
+                # Reports and progress are shown as the search finds them
+                sym = company_symbol if company_symbol else None
+                data = run_search_live(
+                    final_target_website,
+                    company_name,
+                    fetch_reports=True,
+                    symbol=sym,
+                    known_website=final_target_website,
+                    pdfs_only=pdfs_only  # Pass PDFs only flag
+                )
+                st.session_state.esg_data = data
     
     with col2:
         if st.button("📂 Show Saved Links", use_container_width=True, help="Display your saved links for this company"):
@@ -1430,16 +1362,17 @@ if selected_tab == "🔍 Search & Analyze":
                 st.session_state.show_saved_links = True
                 st.session_state.esg_data = {} # Clear prior results
                 
-                with st.spinner(f"Scanning {final_target_website}..."):
-                    sym = company_symbol if company_symbol else None
-                    data = search_esg_info(
-                        company_name, 
-                        fetch_reports=True, 
-                        symbol=sym,
-                        known_website=final_target_website,
-                        pdfs_only=pdfs_only  # Pass PDFs only flag
-                    )
-                    st.session_state.esg_data = data
+                # Reports and progress are shown as the search finds them
+                sym = company_symbol if company_symbol else None
+                data = run_search_live(
+                    final_target_website,
+                    company_name,
+                    fetch_reports=True,
+                    symbol=sym,
+                    known_website=final_target_website,
+                    pdfs_only=pdfs_only  # Pass PDFs only flag
+                )
+                st.session_state.esg_data = data
     
     # Add Clear Results button below action buttons
     if st.button("🗑️ Clear Results", use_container_width=True, help="Clear current scan results"):
@@ -1647,7 +1580,16 @@ if selected_tab == "🔍 Search & Analyze":
         if web and data.get('screenshot') and os.path.exists(data['screenshot']):
             st.markdown("**📸 Page Preview:**")
             st.image(data['screenshot'], use_column_width=True)
-        
+
+        # Sites that blocked us during the search (circuit breaker open)
+        if data.get("circuit_breakers"):
+            blocked = ", ".join(f"{d} ({b['last_reason']})" for d, b in data["circuit_breakers"].items())
+            st.warning(f"⛔ Stopped fetching from sites that kept failing: {blocked}. They will be retried after a cool-down.")
+
+        # Search hit its time budget (SEARCH_DEADLINE_S) before every stage finished
+        if data.get("partial"):
+            st.info("⏱️ The search reached its time limit; these are the reports found so far. Search again to keep looking.")
+
 
 
         
@@ -2230,11 +2172,13 @@ if selected_tab == "📂 User Saved Links":
                             if not item_url: continue
                             
                             try:
-                                # Fetch content
-                                response = robust_get(item_url, timeout=10)
-                                if response.status_code == 200:
+                                # Reports already in the local PDF store skip the download
+                                stored = get_pdf_store().path(item_url)
+                                # Fetch content (streamed; PDFs are spooled, not held in memory)
+                                response = None if stored else robust_get(item_url, timeout=10, stream=True, use_cache=False)
+                                if stored or response.status_code == 200:
                                     # Determine Extension
-                                    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                                    content_type = 'application/pdf' if stored else response.headers.get('Content-Type', '').split(';')[0].strip().lower()
                                     ext = mimetypes.guess_extension(content_type)
                                     if not ext:
                                         if 'pdf' in content_type: ext = '.pdf'
@@ -2247,6 +2191,7 @@ if selected_tab == "📂 User Saved Links":
                                         notebooklm_urls.append(item_url)
 
                                     if ext != '.pdf':
+                                        response.close()
                                         fail_count += 1
                                         continue
                                     
@@ -2256,13 +2201,14 @@ if selected_tab == "📂 User Saved Links":
                                     year_hint = str(row.get('label', ''))
                                     filename = f"{safe_company}_{year_hint}_{safe_title}{ext}"
                                     
-                                    zip_file.writestr(filename, response.content)
+                                    add_download_to_zip(zip_file, filename, item_url, stored or response)
                                     success_count += 1
                                     
                                     # Add to MD
                                     md_line = f"| {row.get('company', '')} | {row.get('title', '')} | {year_hint} | `{filename}` | {item_url} |"
                                     md_lines.append(md_line)
                                 else:
+                                    response.close()
                                     fail_count += 1
                             except Exception as e:
                                 fail_count += 1
@@ -2628,22 +2574,27 @@ if selected_tab == "📊 All Resources":
                         debug_info.append(f"🔄 Downloading: {item_url[:50]}...")
                         
                         try:
-                            # Use CloudScraper to bypass Cloudflare/bot protection
-                            import cloudscraper
-                            scraper = cloudscraper.create_scraper()
-                            
-                            response = scraper.get(
-                                item_url, 
-                                timeout=30,
-                                allow_redirects=True
-                            )
-                            
-                            print(f"[ZIP] Status {response.status_code} for {item_url}")
+                            # Reports already in the local PDF store skip the download
+                            stored = get_pdf_store().path(item_url)
+                            response = None
+                            if not stored:
+                                # Use CloudScraper to bypass Cloudflare/bot protection
+                                import cloudscraper
+                                scraper = cloudscraper.create_scraper()
+                                
+                                response = scraper.get(
+                                    item_url, 
+                                    timeout=30,
+                                    allow_redirects=True,
+                                    stream=True
+                                )
+                                
+                                print(f"[ZIP] Status {response.status_code} for {item_url}")
 
                             
-                            if response.status_code == 200:
+                            if stored or response.status_code == 200:
                                 # Determine Extension
-                                content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                                content_type = 'application/pdf' if stored else response.headers.get('Content-Type', '').split(';')[0].strip().lower()
                                 ext = mimetypes.guess_extension(content_type)
                                 if not ext:
                                     if 'pdf' in content_type: ext = '.pdf'
@@ -2660,7 +2611,7 @@ if selected_tab == "📊 All Resources":
                                 # Ensure unique filename in zip
                                 filename_ar = f"{safe_co}_{safe_ti}{ext}"
                                 
-                                zip_file_ar.writestr(filename_ar, response.content)
+                                add_download_to_zip(zip_file_ar, filename_ar, item_url, stored or response)
                                 success_count_ar += 1
                                 debug_info.append(f"✅ Saved: {filename_ar}")
                                 
@@ -2669,6 +2620,7 @@ if selected_tab == "📊 All Resources":
                                 md_lines_ar.append(md_line)
                                 
                             else:
+                                response.close()
                                 fail_count_ar += 1
                                 download_errors.append(f"HTTP {response.status_code}: {item_url}")
                                 debug_info.append(f"❌ HTTP {response.status_code}: {item_url[:50]}...")
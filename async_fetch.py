@@ -0,0 +1,243 @@
+"""
+Asyncio fetch engine alongside robust_get.
+
+Same behaviour as robust_get (rotating user-agents, realistic headers,
+retry on 403/429/503, per-host rate limiting, circuit breaker, retry
+without certificate verification on SSL errors), but on aiohttp, so a
+single thread can keep hundreds of requests in flight. Memory stays
+bounded: bodies are read up to a byte cap, and PDF downloads for
+verification take one of ASYNC_PDF_SLOTS slots.
+
+    async with AsyncFetcher() as fetcher:
+        results = await asyncio.gather(*(verify_pdf_content(fetcher, u, t, name) for u, t in links))
+"""
+
+import asyncio
+import random
+import ssl
+
+import aiohttp
+import certifi
+
+from config import (
+    USER_AGENTS, REQUEST_HEADERS_BASE, MAX_RETRIES, REQUESTS_TIMEOUT_S,
+    MIN_PDF_SIZE_BYTES, SKIP_VERIFY_SIZE_BYTES,
+    ASYNC_MAX_IN_FLIGHT, ASYNC_PER_HOST_LIMIT, ASYNC_MAX_BODY_BYTES, ASYNC_PDF_SLOTS,
+)
+from rate_limiter import get_rate_limiter
+from circuit_breaker import get_circuit_breaker
+from tls_policy import get_tls_policy
+from utils import verify_pdf_bytes, find_report_pdf_links
+
+RETRY_STATUSES = (403, 429, 503)
+
+
+class AsyncResponse:
+    """A fully read (or capped) response; safe to use after the connection is released."""
+
+    __slots__ = ("url", "status", "headers", "body", "truncated")
+
+    def __init__(self, url, status, headers, body=b"", truncated=False):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.truncated = truncated
+
+    @property
+    def status_code(self):
+        return self.status
+
+    def text(self):
+        content_type = self.headers.get("Content-Type", "")
+        charset = "utf-8"
+        if "charset=" in content_type:
+            charset = content_type.split("charset=", 1)[1].split(";")[0].strip() or charset
+        try:
+            return self.body.decode(charset, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+
+class AsyncFetcher:
+    """aiohttp session with robust_get's retry, pacing and breaker semantics."""
+
+    def __init__(self, max_in_flight=ASYNC_MAX_IN_FLIGHT, per_host=ASYNC_PER_HOST_LIMIT,
+                 pdf_slots=ASYNC_PDF_SLOTS, timeout=REQUESTS_TIMEOUT_S):
+        self.max_in_flight = max_in_flight
+        self.per_host = per_host
+        self.pdf_slots = pdf_slots
+        self.timeout = timeout
+        self.stats = {"requests": 0, "retries": 0, "ssl_fallbacks": 0, "failed": 0}
+        self._session = None
+        self._in_flight = None
+        self._pdf_slots = None
+        self._ssl = ssl.create_default_context(cafile=certifi.where())
+
+    async def __aenter__(self):
+        # Created here so they bind to the running event loop
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.per_host,
+                                         ttl_dns_cache=300)
+        self._session = aiohttp.ClientSession(connector=connector)
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._pdf_slots = asyncio.Semaphore(self.pdf_slots)
+        return self
+
+    def pdf_slot(self):
+        """Semaphore bounding concurrent PDF downloads: `async with fetcher.pdf_slot():`."""
+        return self._pdf_slots
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        self._session = None
+
+    async def get(self, url, timeout=None, max_bytes=ASYNC_MAX_BODY_BYTES, want_body=None):
+        """
+        GET a URL and return an AsyncResponse. `want_body(status, headers)`
+        can decline the body after the headers arrive (nothing is read).
+        Raises like robust_get (CircuitOpenError, connection errors).
+        """
+        breaker = get_circuit_breaker()
+        breaker.before_request(url)
+        try:
+            resp = await self._get_with_retries(url, timeout or self.timeout, max_bytes, want_body)
+        except Exception as e:
+            self.stats["failed"] += 1
+            status = getattr(e, "status_code", None)
+            breaker.record_failure(url, f"HTTP {status}" if status else type(e).__name__)
+            raise
+        if resp.status >= 500:
+            breaker.record_failure(url, f"HTTP {resp.status}")
+        else:
+            breaker.record_success(url)
+        return resp
+
+    async def _get_with_retries(self, url, timeout, max_bytes, want_body):
+        headers = {**REQUEST_HEADERS_BASE, "User-Agent": random.choice(USER_AGENTS)}
+        limiter = get_rate_limiter()
+        tls = get_tls_policy()
+        ssl_context = self._ssl if tls.should_verify(url) else False
+        last_exc = None
+        last_status = None
+        attempt = 0
+        counted = 0
+        while attempt <= MAX_RETRIES:
+            if attempt > counted:
+                counted = attempt
+                self.stats["retries"] += 1
+            wait = limiter.reserve(url)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                resp = await self._request(url, headers, timeout, max_bytes, want_body, ssl_context)
+                if ssl_context and resp.status < 500:
+                    tls.record_verified(url)
+                if resp.status in RETRY_STATUSES:
+                    last_status = resp.status
+                    pause = limiter.penalize(url, resp.status, resp.headers.get("Retry-After"), attempt)
+                    print(f"[async_fetch] {resp.status} on {url}, host paused {pause:.1f}s")
+                    headers["User-Agent"] = random.choice(USER_AGENTS)
+                    attempt += 1
+                    continue
+                limiter.record_success(url)
+                return resp
+            except aiohttp.ClientSSLError as e:
+                if ssl_context is not False:
+                    # Broken certificate chain: repeat this attempt without verification,
+                    # through the same pacing and status handling
+                    tls.record_insecure(url, e)
+                    ssl_context = False
+                    self.stats["ssl_fallbacks"] += 1
+                    continue
+                last_exc = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_exc = e
+                if attempt < MAX_RETRIES:
+                    limiter.penalize(url, attempt=attempt)
+            attempt += 1
+        if last_exc is None and last_status:
+            blocked = aiohttp.ClientConnectionError(f"HTTP {last_status} after {MAX_RETRIES + 1} attempts: {url}")
+            blocked.status_code = last_status
+            raise blocked
+        raise last_exc or aiohttp.ClientConnectionError(f"Failed after {MAX_RETRIES + 1} attempts: {url}")
+
+    async def _request(self, url, headers, timeout, max_bytes, want_body, ssl_context):
+        async with self._in_flight:
+            self.stats["requests"] += 1
+            async with self._session.get(url, headers=headers, ssl=ssl_context,
+                                         timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                result = AsyncResponse(str(resp.url), resp.status, resp.headers)
+                if resp.status in RETRY_STATUSES or (want_body and not want_body(resp.status, resp.headers)):
+                    return result
+                chunks = []
+                size = 0
+                async for chunk in resp.content.iter_chunked(65536):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if max_bytes and size > max_bytes:
+                        result.truncated = True
+                        break
+                result.body = b"".join(chunks)
+                if result.truncated:
+                    result.body = result.body[:max_bytes]
+                return result
+
+
+async def verify_pdf_content(fetcher, url, title, company_name):
+    """Async app.verify_pdf_content: header checks, bounded download, then verify_pdf_bytes."""
+    verdict = {}
+
+    def want_body(status, headers):
+        if status >= 400:
+            # Error pages are not resources, whatever their type (as in app._check_pdf)
+            return False
+        c_type = headers.get("Content-Type", "").lower()
+        if "text/html" in c_type:
+            # We trust the link text filtering done before this call
+            verdict["result"] = {"title": title, "href": url, "body": "Webpage Report / Resource"}
+            return False
+        if "pdf" not in c_type and "application/octet-stream" not in c_type:
+            return False
+        content_length = headers.get("Content-Length")
+        if content_length and content_length.isdigit():
+            size_bytes = int(content_length)
+            if size_bytes < MIN_PDF_SIZE_BYTES:
+                return False
+            if size_bytes > SKIP_VERIFY_SIZE_BYTES:
+                # Large files are assumed to be reports (save bandwidth)
+                verdict["result"] = {"title": title, "href": url, "body": "Verified Large PDF Report"}
+                return False
+        return True
+
+    print(f"[VERIFY] Verifying (async): {url}")
+    try:
+        async with fetcher.pdf_slot():
+            resp = await fetcher.get(url, max_bytes=SKIP_VERIFY_SIZE_BYTES, want_body=want_body)
+    except Exception:
+        return None
+    if "result" in verdict:
+        return verdict["result"]
+    if resp.status != 200 or not resp.body.startswith(b"%PDF"):
+        return None
+    if resp.truncated:
+        # No Content-Length, but past the size cap: same as a large PDF
+        return {"title": title, "href": url, "body": "Verified Large PDF Report"}
+    # Parsing runs in the PDF worker pool; wait for it off the event loop
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, verify_pdf_bytes, resp.body, url, title, company_name)
+
+
+async def find_pdfs_on_page(fetcher, page_url, company_name, limit=5):
+    """Async landing-page scan: direct report-PDF links as {title, url} dicts."""
+    try:
+        resp = await fetcher.get(page_url, timeout=12,
+                                 want_body=lambda status, headers: status == 200
+                                 and "html" in headers.get("Content-Type", "").lower())
+    except Exception as e:
+        print(f"      Landing-page scan error ({page_url[:60]}): {e}")
+        return []
+    if not resp.body:
+        return []
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, find_report_pdf_links, resp.text(), page_url,
+                                      f"{company_name} ESG Report", limit)
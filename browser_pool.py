@@ -0,0 +1,244 @@
+"""
+Long-lived Playwright browser pool shared by the scraper and the app.
+
+Launching Chromium costs 1-3s and ~150MB of RSS churn, so instead of opening
+a fresh `sync_playwright()` for every scan we keep a few warm browsers around.
+Playwright's sync API is bound to the thread that started it, so each pool
+worker is a thread that owns one browser + one warm context; callers submit
+a job `fn(page, ...)` and get its result back. Browsers are recycled after
+BROWSER_POOL_MAX_NAVIGATIONS main-frame navigations to contain leaks.
+"""
+
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+
+from config import (
+    USER_AGENT, VIEWPORT, BROWSER_ARGS,
+    BROWSER_POOL_SIZE, BROWSER_POOL_MAX_NAVIGATIONS, BROWSER_POOL_JOB_TIMEOUT_S,
+)
+from resource_blocker import ResourceBlocker
+
+STEALTH_INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+class _BrowserWorker:
+    """One Playwright instance + browser + warm context, used by a single thread."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.navigations = 0
+        self.blocker = ResourceBlocker() if pool.block_resources else None
+        if self.blocker:
+            pool._register_blocker(self.blocker)
+
+    def _launch(self):
+        if self.playwright is None:
+            from playwright.sync_api import sync_playwright
+            self.playwright = sync_playwright().start()
+        self.browser = self.playwright.chromium.launch(
+            headless=self.pool.headless, args=BROWSER_ARGS,
+        )
+        self.context = self.browser.new_context(
+            user_agent=USER_AGENT,
+            viewport=VIEWPORT,
+            ignore_https_errors=True,
+            java_script_enabled=True,
+        )
+        self.context.add_init_script(STEALTH_INIT_SCRIPT)
+        if self.blocker:
+            self.blocker.attach(self.context)
+        self.navigations = 0
+        self.pool._bump("launches")
+
+    def _close_browser(self):
+        try:
+            if self.browser is not None:
+                self.browser.close()
+        except Exception:
+            pass
+        self.browser = None
+        self.context = None
+
+    def new_page(self):
+        if self.browser is not None and not self.browser.is_connected():
+            print("[BrowserPool] Browser disconnected, relaunching")
+            self._close_browser()
+        if self.browser is not None and self.navigations >= self.pool.max_navigations:
+            print(f"[BrowserPool] Recycling browser after {self.navigations} navigations")
+            self._close_browser()
+            self.pool._bump("recycles")
+        if self.browser is None:
+            self._launch()
+
+        page = self.context.new_page()
+        page.on("framenavigated", lambda frame: self._on_navigated(page, frame))
+        self.pool._bump("pages")
+        return page
+
+    def _on_navigated(self, page, frame):
+        if frame == page.main_frame:
+            self.navigations += 1
+            self.pool._bump("navigations")
+
+    def release(self, page):
+        if self.blocker:
+            self.blocker.forget(page)
+        try:
+            page.close()
+        except Exception:
+            pass
+
+    def shutdown(self):
+        self._close_browser()
+        try:
+            if self.playwright is not None:
+                self.playwright.stop()
+        except Exception:
+            pass
+        self.playwright = None
+
+
+class BrowserPool:
+    """
+    Hands out pages from warm browsers running on dedicated worker threads.
+
+    Usage:
+        pool = get_browser_pool()
+        html = pool.run(lambda page, url: (page.goto(url), page.content())[1], url)
+
+    Jobs run on a pool thread, so they must not submit further jobs to the
+    same pool and wait on them (that can deadlock when every worker is busy).
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, headless=True,
+                 max_navigations=BROWSER_POOL_MAX_NAVIGATIONS, block_resources=False):
+        self.size = max(1, size)
+        self.headless = headless
+        self.max_navigations = max_navigations
+        self.block_resources = block_resources
+        self._blockers = []
+        self._local = threading.local()
+        self.stats = {"launches": 0, "recycles": 0, "pages": 0, "navigations": 0, "jobs": 0}
+        self._jobs = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _bump(self, key, n=1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def _register_blocker(self, blocker):
+        with self._lock:
+            self._blockers.append(blocker)
+
+    def blocking_stats(self):
+        """Totals from every worker's ResourceBlocker (zeros if blocking is off)."""
+        total = {"blocked_requests": 0, "blocked_bytes_est": 0, "by_type": {}, "by_domain": {}}
+        with self._lock:
+            blockers = list(self._blockers)
+        for b in blockers:
+            with b._lock:
+                total["blocked_requests"] += b.stats["blocked_requests"]
+                total["blocked_bytes_est"] += b.stats["blocked_bytes_est"]
+                for key in ("by_type", "by_domain"):
+                    for k, v in b.stats[key].items():
+                        total[key][k] = total[key].get(k, 0) + v
+        return total
+
+    def page_blocking_stats(self, page):
+        """Blocking stats for a page, callable from inside a job running on this pool."""
+        worker = getattr(self._local, "worker", None)
+        if worker is None or worker.blocker is None:
+            return None
+        return worker.blocker.page_stats(page)
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BrowserPool is closed")
+            while len(self._workers) < self.size:
+                t = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"browser-pool-{len(self._workers)}",
+                    daemon=True,
+                )
+                self._workers.append(t)
+                t.start()
+
+    def _worker_loop(self):
+        worker = _BrowserWorker(self)
+        self._local.worker = worker
+        try:
+            while True:
+                item = self._jobs.get()
+                if item is None:
+                    break
+                future, fn, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    page = worker.new_page()
+                    try:
+                        result = fn(page, *args, **kwargs)
+                    finally:
+                        worker.release(page)
+                    future.set_result(result)
+                except BaseException as e:
+                    future.set_exception(e)
+                finally:
+                    self._bump("jobs")
+        finally:
+            worker.shutdown()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue `fn(page, *args, **kwargs)` on a pool worker. Returns a Future."""
+        self._ensure_workers()
+        future = Future()
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def run(self, fn, *args, timeout=BROWSER_POOL_JOB_TIMEOUT_S, **kwargs):
+        """Run `fn(page, *args, **kwargs)` on a pool worker and wait for the result."""
+        return self.submit(fn, *args, **kwargs).result(timeout=timeout)
+
+    def close(self):
+        """Stop all workers and close their browsers."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        for _ in workers:
+            self._jobs.put(None)
+        for t in workers:
+            t.join(timeout=10)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_browser_pool(headless=True, block_resources=False):
+    """Return the process-wide pool for this headless/blocking mode, creating it on first use."""
+    key = (headless, block_resources)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = BrowserPool(headless=headless, block_resources=block_resources)
+            _pools[key] = pool
+        return pool
+
+
+@atexit.register
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,147 @@
+"""
+Per-domain circuit breaker for the robust_get fetch path.
+
+When a corporate site starts blocking us (403s, timeouts, 5xx), a single
+search used to keep hitting it from the hub crawl, the verify_pdf_content
+threads and the site: search candidates, paying retries and backoff every
+time. After CIRCUIT_FAILURE_THRESHOLD consecutive failed fetches the
+domain's breaker opens and further fetches fail fast with CircuitOpenError.
+After CIRCUIT_COOLDOWN_S one probe request is let through (half-open): a
+success closes the breaker, a failure opens it again.
+"""
+
+import threading
+import time
+
+import requests
+
+from config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN_S, CIRCUIT_MAX_COOLDOWN_S
+from fetch_strategy import domain_key
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of fetching while a domain's breaker is open."""
+
+
+class DomainCircuitBreaker:
+    """Thread-safe breaker table keyed by domain."""
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown_s=CIRCUIT_COOLDOWN_S,
+                 max_cooldown_s=CIRCUIT_MAX_COOLDOWN_S, log=print):
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.log = log
+        self._lock = threading.Lock()
+        self._domains = {}
+
+    def _entry(self, domain):
+        entry = self._domains.get(domain)
+        if entry is None:
+            entry = {"state": CLOSED, "failures": 0, "last_reason": None, "opened_at": None,
+                     "cooldown_s": self.cooldown_s, "probe_in_flight": False, "short_circuited": 0}
+            self._domains[domain] = entry
+        return entry
+
+    def _take_probe(self, domain, entry, now):
+        """Past the cool-down, go half-open; True if the caller may send the probe (lock held)."""
+        if entry["state"] == OPEN and now - entry["opened_at"] >= entry["cooldown_s"]:
+            entry["state"] = HALF_OPEN
+            entry["probe_in_flight"] = False
+            self.log(f"[CircuitBreaker] {domain} HALF-OPEN: sending one probe request")
+        if entry["state"] == HALF_OPEN and not entry["probe_in_flight"]:
+            entry["probe_in_flight"] = True
+            return True
+        return False
+
+    def before_request(self, url):
+        """Raise CircuitOpenError if the domain is open (or its half-open probe is taken)."""
+        domain = domain_key(url)
+        with self._lock:
+            entry = self._domains.get(domain)
+            if entry is None or entry["state"] == CLOSED:
+                return
+            now = time.monotonic()
+            if self._take_probe(domain, entry, now):
+                return
+            entry["short_circuited"] += 1
+            remaining = max(0, entry["cooldown_s"] - (now - entry["opened_at"]))
+            reason = entry["last_reason"]
+        raise CircuitOpenError(f"Circuit open for {domain} ({reason}); retry in {remaining:.0f}s")
+
+    def is_open(self, url):
+        """
+        Whether before_request would refuse `url` now, for fetches that don't
+        go through robust_get (the Playwright scan). A refusal is counted as
+        short-circuited. Past the cool-down the breaker goes half-open and the
+        caller's fetch is the probe: its record_success/record_failure
+        closes or reopens the breaker.
+        """
+        domain = domain_key(url)
+        with self._lock:
+            entry = self._domains.get(domain)
+            if entry is None or entry["state"] == CLOSED:
+                return False
+            if self._take_probe(domain, entry, time.monotonic()):
+                return False
+            entry["short_circuited"] += 1
+            return True
+
+    def record_success(self, url):
+        domain = domain_key(url)
+        with self._lock:
+            entry = self._domains.get(domain)
+            if entry is None:
+                return
+            if entry["state"] != CLOSED:
+                self.log(f"[CircuitBreaker] {domain} CLOSED: probe succeeded")
+            entry.update(state=CLOSED, failures=0, probe_in_flight=False, cooldown_s=self.cooldown_s)
+
+    def record_failure(self, url, reason):
+        domain = domain_key(url)
+        if not domain:
+            return
+        with self._lock:
+            entry = self._entry(domain)
+            entry["failures"] += 1
+            entry["last_reason"] = reason
+            if entry["state"] == HALF_OPEN:
+                # Failed probe: open again with a longer cool-down
+                entry["cooldown_s"] = min(self.max_cooldown_s, entry["cooldown_s"] * 2)
+                entry.update(state=OPEN, opened_at=time.monotonic(), probe_in_flight=False)
+                self.log(f"[CircuitBreaker] {domain} OPEN again: probe failed ({reason}), "
+                         f"cooling down {entry['cooldown_s']:.0f}s")
+            elif entry["state"] == CLOSED and entry["failures"] >= self.failure_threshold:
+                entry.update(state=OPEN, opened_at=time.monotonic())
+                self.log(f"[CircuitBreaker] {domain} OPEN after {entry['failures']} failures ({reason}), "
+                         f"cooling down {entry['cooldown_s']:.0f}s")
+
+    def state(self, url):
+        with self._lock:
+            entry = self._domains.get(domain_key(url))
+            return entry["state"] if entry else CLOSED
+
+    def snapshot(self, include_closed=False):
+        """{domain: {"state", "failures", "last_reason", "short_circuited", "retry_in_s"}}"""
+        now = time.monotonic()
+        with self._lock:
+            out = {}
+            for domain, e in self._domains.items():
+                if e["state"] == CLOSED and not include_closed:
+                    continue
+                retry_in = max(0, e["cooldown_s"] - (now - e["opened_at"])) if e["opened_at"] and e["state"] == OPEN else 0
+                out[domain] = {"state": e["state"], "failures": e["failures"], "last_reason": e["last_reason"],
+                               "short_circuited": e["short_circuited"], "retry_in_s": round(retry_in)}
+            return out
+
+
+_breaker = DomainCircuitBreaker()
+
+
+def get_circuit_breaker():
+    """Process-wide breaker used by robust_get."""
+    return _breaker
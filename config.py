@@ -3,6 +3,10 @@ Centralized configuration for the ESG Report AI Agent.
 All magic numbers, keyword lists, and thresholds in one place.
 """
 
+import os
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # --- Timeouts (milliseconds for Playwright, seconds for requests) ---
 PLAYWRIGHT_NAV_TIMEOUT_MS = 90000
 PLAYWRIGHT_HUB_TIMEOUT_MS = 45000
@@ -11,19 +15,81 @@ PLAYWRIGHT_CLICK_TIMEOUT_MS = 3000
 PLAYWRIGHT_NETWORKIDLE_TIMEOUT_MS = 5000
 PLAYWRIGHT_COOKIE_TIMEOUT_MS = 2000
 
+# Screenshots are a by-product of the scan's own page (viewport only, JPEG).
+# Playwright can only encode PNG/JPEG, so JPEG is the compressed option.
+SCREENSHOTS_ENABLED = True
+SCREENSHOT_DIR = os.path.join(PROJECT_DIR, "screenshots")
+SCREENSHOT_QUALITY = 60               # JPEG quality (0-100)
+SCREENSHOT_WRITE_TIMEOUT_S = 5        # how long a caller waits for the background file write
+
+# scan_url: one navigation, links extracted at each checkpoint until the deadline.
+# Checkpoints: "domcontentloaded" | "load" | "networkidle" (load states),
+# "settled" (adaptive readiness wait), "expanded" (scroll/expand/frames).
+SCAN_URL_DEADLINE_S = 45
+SCAN_URL_CHECKPOINTS = ["domcontentloaded", "load", "settled", "expanded"]
+
 REQUESTS_TIMEOUT_S = 10
 REQUESTS_HUB_TIMEOUT_S = 6
 REQUESTS_DOWNLOAD_TIMEOUT_S = 30
 
 # --- Page Load Delays (seconds) ---
+# Upper bounds for the adaptive readiness waits (see page_readiness.py);
+# pages that settle sooner return immediately.
 LAZY_LOAD_WAIT_S = 2
 PAGE_SETTLE_WAIT_S = 3
 DYNAMIC_CONTENT_WAIT_S = 5
 
+# --- Page Readiness ---
+READINESS_MAX_WAIT_MS = 8000          # hard cap for any single readiness wait
+READINESS_QUIET_MS = 400              # DOM + anchors + network quiet this long = ready
+READINESS_POLL_MS = 100
+READINESS_STALE_REQUEST_MS = 3000     # in-flight longer than this = long-poll, ignored
+
 # --- Size Thresholds (bytes) ---
 MIN_PDF_SIZE_BYTES = 50_000           # 50KB - skip tiny "PDFs"
 SKIP_VERIFY_SIZE_BYTES = 20_971_520   # 20MB - assume large files are valid
 
+# --- PDF Downloads (pdf_download.py: streamed to a spool file, capped) ---
+PDF_SPOOL_THRESHOLD = 8_388_608       # 8MB - bigger bodies roll over from memory to a temp file
+PDF_MAX_DOWNLOAD_BYTES = 419_430_400  # 400MB - refuse anything bigger
+PDF_SPOOL_DIR = None                  # temp file directory (None = system default)
+
+# --- Local PDF Store (pdf_store.py: content-addressed, shared by all pipelines) ---
+PDF_STORE_DIR = os.path.join(PROJECT_DIR, "pdf_store")
+PDF_STORE_MAX_BYTES = 3_000_000_000   # least recently used PDFs evicted past this
+PDF_STORE_URL_TTL_S = 30 * 86400      # a URL's stored copy is reused this long (one scan cycle)
+
+# --- Range Reads (range_file.py: verify big PDFs without downloading them) ---
+RANGE_VERIFY_MIN_BYTES = 2_000_000    # smaller PDFs are simply downloaded
+RANGE_BLOCK_SIZE = 131_072            # bytes per block / range request (128KB)
+RANGE_MAX_BLOCKS = 64                 # blocks kept in memory per file (LRU)
+RANGE_MAX_FETCH_BYTES = 8_000_000     # past this, fall back to the old size-based shortcut
+
+# --- PDF Parsing (pdf_pool.py: pypdf text extraction in worker processes) ---
+PDF_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+PDF_PARSE_TIMEOUT_S = 30              # per document; a stuck worker is killed and the pool rebuilt
+PDF_PARSE_IN_PROCESS = True           # False parses in the calling thread (debugging, restricted hosts)
+PDF_SIDECAR_TIMEOUT_S = 300           # full-text extraction for a text sidecar (pdf_sidecar.py)
+
+# --- Verification Result Cache (verify_cache.py, MongoDB `verification_cache`) ---
+# How long each verify_pdf_content outcome is trusted without any request.
+VERIFY_CACHE_TTL_S = {
+    "verified": 30 * 86400,           # company report confirmed on pages 1-3
+    "webpage": 7 * 86400,             # HTML page accepted as a resource
+    "large_unverified": 7 * 86400,    # too big to check, assumed a report
+    "wrong_company": 30 * 86400,      # another company's PDF
+    "no_keywords": 30 * 86400,        # not a report
+    "unreadable": 7 * 86400,          # pypdf couldn't open it
+    "not_pdf": 7 * 86400,             # other content type / bad magic bytes
+    "too_small": 30 * 86400,
+    "too_large": 7 * 86400,           # past PDF_MAX_DOWNLOAD_BYTES
+    "not_found": 86400,               # 404/410
+    "http_error": 6 * 3600,           # other 4xx/5xx
+    "fetch_error": 3600,              # timeouts, connection errors, open circuit
+}
+VERIFY_CACHE_STALE_KEEP_S = 30 * 86400    # expired entries kept this long for ETag/length checks
+VERIFY_CACHE_LOCAL_SIZE = 5000        # in-process LRU entries in front of MongoDB
+
 # --- Search Limits ---
 MAX_REPORTS_TOTAL = 8
 MAX_HUBS_TO_VISIT = 5
@@ -33,6 +99,19 @@ MAX_SEARCH_RESULTS = 8
 MAX_DEEP_SCAN_REPORTS = 20
 THREAD_POOL_WORKERS = 3
 
+# --- Search Pipeline (search_pipeline.py: stages of app.search_esg_info) ---
+SEARCH_WORKERS = 6                    # shared pool for page scans and candidate verification
+SEARCH_DEADLINE_S = 90                # return what was found by then (None: no deadline)
+SEARCH_TARGET_REPORTS = MAX_REPORTS_TOTAL  # enough verified reports: fallback searches are skipped
+
+# --- Crawl Frontier (hub traversal in scrape_site / search_esg_info) ---
+CRAWL_MAX_PAGES = 12                  # pages fetched per company (main page included)
+CRAWL_MAX_DEPTH = 3                   # main page is depth 0
+CRAWL_TIME_BUDGET_S = 60              # wall-clock budget for the whole crawl
+CRAWL_TARGET_PDFS = 10                # stop once this many (verified) PDFs are found
+CRAWL_WORKERS = 4                     # concurrent page fetches (browser crawls use the pool size)
+CRAWL_PER_DOMAIN_LIMIT = 2            # concurrent fetches against one domain
+
 # --- Scoring ---
 MIN_LINK_SCORE = 1
 MIN_NON_PDF_SCORE = 2
@@ -70,6 +149,95 @@ REQUEST_HEADERS_BASE = {
 MAX_RETRIES = 2
 RETRY_BACKOFF_S = 2
 
+# --- Per-host Rate Limiting (rate_limiter.py) ---
+RATE_LIMIT_DEFAULT_RPS = 2.0          # steady requests/second per host
+RATE_LIMIT_BURST = 4                  # requests allowed back-to-back before pacing kicks in
+RATE_LIMIT_MIN_RPS = 0.1              # floor after repeated 429/503s
+RATE_LIMIT_DECREASE = 0.5             # rate multiplier on 429/503
+RATE_LIMIT_RECOVERY_RPS = 0.1         # rate regained per successful response
+RATE_LIMIT_MAX_PAUSE_S = 120          # cap on Retry-After / backoff pauses
+RATE_LIMIT_HOST_RPS = {
+    "duckduckgo.com": 1.0,            # search queries (was a fixed sleep between queries)
+}
+
+# --- Circuit Breaker (circuit_breaker.py, per domain in robust_get) ---
+CIRCUIT_FAILURE_THRESHOLD = 3         # consecutive failed fetches before a domain is cut off
+CIRCUIT_COOLDOWN_S = 120              # fail fast this long, then allow one probe
+CIRCUIT_MAX_COOLDOWN_S = 900          # cool-down doubles after each failed probe, up to this
+
+# --- HTTP Connection Pools (http_session.py) ---
+HTTP_POOL_CONNECTIONS = 32            # per-host pools kept alive (LRU beyond this)
+HTTP_POOL_MAXSIZE = 8                 # keep-alive connections kept per host
+HTTP_POOL_BLOCK = False               # True = wait for a free connection instead of opening extra
+
+# --- HTTP Cache (http_cache.py, conditional GETs in robust_get) ---
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_DIR = os.path.join(PROJECT_DIR, "http_cache")
+HTTP_CACHE_MAX_BYTES = 500_000_000    # least recently used bodies evicted past this
+HTTP_CACHE_MAX_ENTRY_BYTES = 25_000_000   # bigger bodies are streamed, not cached
+HTTP_CACHE_HTML_TTL_S = 6 * 3600      # pages served without revalidation this long
+HTTP_CACHE_PDF_TTL_S = 7 * 86400      # PDFs rarely change in place
+
+# --- Async Fetch Engine (async_fetch.py, batch scanner) ---
+ASYNC_MAX_IN_FLIGHT = 200             # requests in flight across all hosts
+ASYNC_PER_HOST_LIMIT = 8              # open connections per host
+ASYNC_MAX_BODY_BYTES = 5_000_000      # HTML/JSON bodies are cut off past this
+ASYNC_PDF_SLOTS = 16                  # PDF bodies buffered at once (bounds memory)
+
+# --- Sub-frame Scanning (scrape_page_content) ---
+FRAME_PARSE_WORKERS = 4               # threads parsing frame HTML while the next frame is fetched
+FRAME_MIN_AREA_PX = 2500              # smaller (or hidden) frames are pixels/beacons
+FRAME_MAX_HTML_BYTES = 3_000_000      # don't parse giant frame documents
+# Frames whose URL contains any of these are skipped (ads, video, consent, captcha, social).
+# Hosts in BLOCKED_REQUEST_DOMAINS are skipped as well.
+FRAME_SKIP_PATTERNS = [
+    "doubleclick", "googlesyndication", "adservice", "/ads/", "recaptcha", "hcaptcha",
+    "cookielaw", "onetrust", "cookiebot", "consent", "trustarc",
+    "youtube.com/embed", "player.vimeo", "brightcove", "wistia",
+    "facebook.com/plugins", "platform.twitter.com", "linkedin.com/embed",
+    "googletagmanager", "livechat", "intercom",
+]
+
+# --- Fetch Strategy Memory (per-domain tier choice for scan_url) ---
+FETCH_STRATEGY_FILE = os.path.join(PROJECT_DIR, "fetch_strategies.json")
+FETCH_STRATEGY_REPROBE_EVERY = 10     # browser-only domains: retry HTTP every N scans
+FETCH_STRATEGY_REPROBE_DAYS = 14      # ...or when the last HTTP probe is older than this
+FETCH_STRATEGY_STATIC_MIN_SUCCESSES = 3   # HTTP successes before a domain counts as static
+
+# --- TLS Policy Memory (hosts whose certificates don't verify) ---
+TLS_POLICY_FILE = os.path.join(PROJECT_DIR, "tls_policy.json")
+TLS_POLICY_REPROBE_DAYS = 30          # retry verified TLS on insecure hosts after this
+
+# --- JSON/XHR Capture (report lists loaded client-side) ---
+JSON_CAPTURE = True                   # harvest links from XHR/fetch JSON during browser scans
+JSON_CAPTURE_MAX_RESPONSES = 40       # per page
+JSON_CAPTURE_MAX_BYTES = 2_000_000    # skip larger payloads
+JSON_ENDPOINTS_PER_DOMAIN = 3         # remembered endpoints replayed over HTTP on later scans
+JSON_ENDPOINT_MAX_FAILURES = 2        # forget an endpoint after this many failed replays
+
+# --- Browser Pool ---
+BROWSER_POOL_SIZE = 2                 # warm browsers (one worker thread each)
+BROWSER_POOL_MAX_NAVIGATIONS = 50     # recycle a browser after this many page loads
+BROWSER_POOL_JOB_TIMEOUT_S = 300      # max time a caller waits on a pooled job
+
+# --- Resource Blocking (opt-in Playwright route interception) ---
+BLOCK_RESOURCES = False               # scraper default; link discovery only needs the DOM
+BLOCKED_RESOURCE_TYPES = ["image", "media", "font", "texttrack", "ping"]
+BLOCKED_REQUEST_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "facebook.net", "connect.facebook.net",
+    "hotjar.com", "clarity.ms", "bat.bing.com", "ads.linkedin.com",
+    "px.ads.linkedin.com", "segment.io", "optimizely.com", "newrelic.com",
+    "nr-data.net", "demdex.net", "omtrdc.net", "qualtrics.com",
+    "intercom.io", "drift.com", "zdassets.com", "livechatinc.com",
+    "youtube.com", "vimeo.com", "brightcove.net",
+]
+# Rough per-request sizes used to estimate bytes saved by aborted requests
+BLOCKED_RESOURCE_EST_BYTES = {
+    "image": 60_000, "media": 500_000, "font": 40_000,
+    "script": 80_000, "texttrack": 5_000, "other": 10_000,
+}
+
 # --- Keyword Lists ---
 REPORT_KEYWORDS = [
     "report", "esg", "sustainability", "csr", "annual", "impact",
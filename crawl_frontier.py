@@ -0,0 +1,161 @@
+"""
+Budgeted, concurrent hub crawl shared by ESGScraper.scrape_site (browser)
+and the hub scan in app.search_esg_info (plain HTTP).
+
+Callers supply a `visit(url, depth)` function that fetches one page and
+returns `(found, hubs)`: the number of useful results on that page (report
+PDFs, or verified PDFs) and the hub links worth following. The frontier
+keeps a score-ordered queue of hubs, runs visits concurrently with a cap
+per domain, and stops once the time, page or result budget is spent.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+import concurrent.futures
+
+from config import (
+    HUB_KEYWORDS, CRAWL_MAX_PAGES, CRAWL_MAX_DEPTH, CRAWL_TIME_BUDGET_S,
+    CRAWL_TARGET_PDFS, CRAWL_WORKERS, CRAWL_PER_DOMAIN_LIMIT,
+)
+from fetch_strategy import domain_key
+from link_classifier import get_link_classifier
+
+
+def score_hub(url, text=""):
+    """Priority for a hub candidate: hub terms in the link text plus report keywords."""
+    text_lower = (text or "").lower()
+    url_lower = (url or "").lower()
+    hub_hits = sum(1 for kw in HUB_KEYWORDS if kw in text_lower)
+    return hub_hits * 2 + get_link_classifier().keyword_score(text_lower, url_lower)
+
+
+class CrawlFrontier:
+    """Priority crawl of hub pages with time/page/result budgets."""
+
+    def __init__(self, visit, max_pages=CRAWL_MAX_PAGES, max_depth=CRAWL_MAX_DEPTH,
+                 time_budget_s=CRAWL_TIME_BUDGET_S, target=CRAWL_TARGET_PDFS,
+                 workers=CRAWL_WORKERS, per_domain=CRAWL_PER_DOMAIN_LIMIT,
+                 allowed_domain=None, log=print):
+        self.visit = visit
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.time_budget_s = time_budget_s
+        self.target = target
+        self.workers = max(1, workers)
+        self.per_domain = max(1, per_domain)
+        # Only follow hubs whose host contains this (a URL or bare host)
+        if allowed_domain and "//" not in allowed_domain:
+            allowed_domain = f"//{allowed_domain}"
+        self.allowed_domain = domain_key(allowed_domain) if allowed_domain else None
+        self.log = log
+
+        self._heap = []
+        self._seq = itertools.count()
+        self._seen = set()
+        self._lock = threading.Lock()
+        self.stats = {"pages": 0, "failed": 0, "found": 0, "max_depth": 0,
+                      "queued": 0, "elapsed_s": 0.0, "stop_reason": None}
+
+    def add(self, url, text="", depth=0, score=None):
+        """Queue a page (ignored if already seen, too deep or off-domain)."""
+        if not url or depth > self.max_depth:
+            return False
+        key = url.split("#")[0].rstrip("/")
+        if self.allowed_domain and self.allowed_domain not in domain_key(url):
+            return False
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            if score is None:
+                score = score_hub(url, text)
+            heapq.heappush(self._heap, (-score, depth, next(self._seq), url, text))
+            self.stats["queued"] += 1
+        return True
+
+    def _next(self, in_flight_by_domain):
+        # Best-scored entry whose domain still has a free slot
+        deferred = []
+        picked = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if in_flight_by_domain.get(domain_key(entry[3]), 0) < self.per_domain:
+                picked = entry
+                break
+            deferred.append(entry)
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+        return picked
+
+    def run(self):
+        """Crawl until the queue is empty or a budget runs out. Returns stats."""
+        start = time.monotonic()
+        deadline = start + self.time_budget_s
+        in_flight = {}            # future -> (url, depth, domain)
+        by_domain = {}
+        stop_reason = None
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                # Fill free worker slots
+                while stop_reason is None and len(in_flight) < self.workers:
+                    if time.monotonic() >= deadline:
+                        stop_reason = "time budget"
+                    elif self.stats["pages"] + len(in_flight) >= self.max_pages:
+                        stop_reason = "page budget"
+                    elif self.stats["found"] >= self.target:
+                        stop_reason = "target reached"
+                    if stop_reason:
+                        break
+                    with self._lock:
+                        entry = self._next(by_domain)
+                    if entry is None:
+                        break
+                    neg_score, depth, _, url, text = entry
+                    domain = domain_key(url)
+                    by_domain[domain] = by_domain.get(domain, 0) + 1
+                    self.log(f"  Crawl d{depth} (score {-neg_score}): {url}")
+                    future = executor.submit(self.visit, url, depth)
+                    in_flight[future] = (url, depth, domain)
+
+                if not in_flight:
+                    break
+
+                remaining = deadline - time.monotonic()
+                done, _ = concurrent.futures.wait(
+                    in_flight, timeout=max(0.05, remaining),
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done:
+                    # Deadline hit with pages still loading; leave them behind
+                    stop_reason = stop_reason or "time budget"
+                    break
+
+                for future in done:
+                    url, depth, domain = in_flight.pop(future)
+                    by_domain[domain] -= 1
+                    self.stats["pages"] += 1
+                    self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+                    try:
+                        found, hubs = future.result()
+                    except Exception as e:
+                        self.stats["failed"] += 1
+                        self.log(f"  Crawl failed for {url}: {str(e)[:100]}")
+                        continue
+                    self.stats["found"] += found or 0
+                    for hub in hubs or []:
+                        if isinstance(hub, str):
+                            self.add(hub, depth=depth + 1)
+                        else:
+                            self.add(hub.get("url"), hub.get("text", ""), depth + 1, hub.get("score"))
+        finally:
+            # Don't block on pages abandoned at the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        self.stats["stop_reason"] = stop_reason or "frontier exhausted"
+        self.stats["elapsed_s"] = round(time.monotonic() - start, 2)
+        self.log(f"  Crawl done: {self.stats['pages']} pages, depth {self.stats['max_depth']}, "
+                 f"{self.stats['found']} found in {self.stats['elapsed_s']}s ({self.stats['stop_reason']})")
+        return self.stats
@@ -3,23 +3,51 @@ import time
 import re
 import os
 import logging
-from playwright.sync_api import sync_playwright
+import threading
+import concurrent.futures
 from selectolax.parser import HTMLParser
 from urllib.parse import urljoin
 
+from browser_pool import get_browser_pool
+from page_readiness import wait_for_ready
+from fetch_strategy import get_strategy_store, TIER_HTTP, TIER_BROWSER
+from link_classifier import get_link_classifier, DomContext, has_child_elements
+from crawl_frontier import CrawlFrontier
+from circuit_breaker import get_circuit_breaker, CircuitOpenError
+from json_links import JsonResponseCapture, extract_links_from_json, parse_json_text, is_pdf_url
+
 from config import (
-    REPORT_KEYWORDS, EXCLUDE_KEYWORDS, HUB_KEYWORDS,
-    EXPAND_SELECTORS, GENERIC_LINK_TERMS, JUNK_PATTERNS,
-    USER_AGENT, VIEWPORT, BROWSER_ARGS,
+    HUB_KEYWORDS, EXPAND_SELECTORS,
     PLAYWRIGHT_NAV_TIMEOUT_MS, PLAYWRIGHT_HUB_TIMEOUT_MS,
     PLAYWRIGHT_CLICK_TIMEOUT_MS, PLAYWRIGHT_NETWORKIDLE_TIMEOUT_MS,
-    PLAYWRIGHT_COOKIE_TIMEOUT_MS,
+    PLAYWRIGHT_COOKIE_TIMEOUT_MS, PLAYWRIGHT_SCREENSHOT_TIMEOUT_MS,
+    SCREENSHOTS_ENABLED, SCREENSHOT_DIR, SCREENSHOT_QUALITY, SCREENSHOT_WRITE_TIMEOUT_S,
+    FRAME_PARSE_WORKERS, FRAME_MIN_AREA_PX, FRAME_MAX_HTML_BYTES, FRAME_SKIP_PATTERNS,
+    BLOCKED_REQUEST_DOMAINS,
     LAZY_LOAD_WAIT_S, PAGE_SETTLE_WAIT_S, DYNAMIC_CONTENT_WAIT_S,
-    REQUESTS_DOWNLOAD_TIMEOUT_S, MIN_LINK_SCORE, PDF_SCORE_BOOST,
+    REQUESTS_DOWNLOAD_TIMEOUT_S,
+    BLOCK_RESOURCES, SCAN_URL_DEADLINE_S, SCAN_URL_CHECKPOINTS, JSON_CAPTURE,
 )
 
 logger = logging.getLogger(__name__)
 
+# Screenshot files are written off the browser thread
+_screenshot_writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshot")
+# Frame/page HTML is parsed here while the Playwright thread keeps fetching
+_parse_pool = concurrent.futures.ThreadPoolExecutor(max_workers=FRAME_PARSE_WORKERS, thread_name_prefix="parse")
+
+
+def _expired(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _seconds_left(deadline, cap):
+    """`cap` seconds, or what is left until `deadline` (a time.monotonic() value) if sooner; never negative."""
+    if deadline is None:
+        return cap
+    return max(0.0, min(cap, deadline - time.monotonic()))
+
+
 # --- CONFIGURATION: The "Brain" of the Tool ---
 # This is where you adapt to new sites without rewriting the engine.
 SITES = [
@@ -61,64 +89,137 @@ SITES = [
 # REPORT_KEYWORDS imported from config.py
 
 class ESGScraper:
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, pool=None, block_resources=BLOCK_RESOURCES, capture_json=JSON_CAPTURE,
+                 screenshots=SCREENSHOTS_ENABLED):
         self.headless = headless
+        self.pool = pool
+        self.block_resources = block_resources
+        self.capture_json = capture_json
+        self.screenshots = screenshots
+        # url -> screenshot path, for pages scanned in a browser (the file may still be being written)
+        self.screenshot_paths = {}
+        # url -> future of the screenshot's file write (see written_screenshot)
+        self.screenshot_writes = {}
+        # One entry per sub-frame seen: {"url", "skipped", "fetch_ms", "parse_ms", "links"}
+        self.frame_stats = []
+        # One entry per readiness wait: {"url", "step", "waited_ms", "reason", ...}
+        self.readiness_stats = []
+
+    def get_pool(self):
+        """Browser pool used for Playwright work (shared process-wide by default)."""
+        if self.pool is None:
+            self.pool = get_browser_pool(headless=self.headless, block_resources=self.block_resources)
+        return self.pool
+
+    def log_blocked_resources(self, page):
+        """Print what the resource blocker aborted for this page (no-op when blocking is off)."""
+        stats = self.get_pool().page_blocking_stats(page)
+        if stats and stats["blocked_requests"]:
+            print(f"      🚫 Blocked {stats['blocked_requests']} requests "
+                  f"(~{stats['blocked_bytes_est'] / 1024:.0f} KB est.): {stats['by_type']}")
+        return stats
+
+    def start_json_capture(self, page):
+        """Start recording XHR/fetch JSON on `page` (before navigating). None when disabled."""
+        if not self.capture_json:
+            return None
+        try:
+            return JsonResponseCapture(page)
+        except Exception as e:
+            logger.debug(f"JSON capture unavailable: {e}")
+            return None
+
+    def finish_json_capture(self, capture, url):
+        """Stop capturing and remember endpoints that produced PDF links for this domain."""
+        if capture is None:
+            return
+        capture.detach()
+        if capture.endpoint_hits:
+            store = get_strategy_store()
+            for endpoint, pdf_count in capture.endpoint_hits.items():
+                store.record_endpoint(url, endpoint, pdf_count)
+            print(f"      🧩 Remembered {len(capture.endpoint_hits)} JSON endpoint(s) for next scan")
+
+    def capture_screenshot(self, page, url):
+        """
+        Viewport JPEG of the page as it is now (no extra navigation).
+        The browser encodes on the page thread; the file is written in the
+        background. Returns the path, or None when disabled/failed.
+        """
+        if not self.screenshots:
+            return None
+        try:
+            from urllib.parse import urlparse
+
+            data = page.screenshot(type="jpeg", quality=SCREENSHOT_QUALITY, full_page=False,
+                                   timeout=PLAYWRIGHT_SCREENSHOT_TIMEOUT_MS)
+            # Generate filename from URL
+            parsed = urlparse(url)
+            domain = parsed.netloc.replace(".", "_")
+            path = parsed.path.replace("/", "_").strip("_") or "home"
+            screenshot_path = os.path.join(SCREENSHOT_DIR, f"{domain}_{path}"[:150] + ".jpg")
+        except Exception as e:
+            print(f"      Screenshot capture failed: {e}")
+            return None
+
+        def write():
+            os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+            with open(screenshot_path, "wb") as f:
+                f.write(data)
+
+        def report(future):
+            if future.exception() is not None:
+                print(f"      Screenshot write failed ({screenshot_path}): {future.exception()}")
+
+        future = _screenshot_writer.submit(write)
+        future.add_done_callback(report)
+        self.screenshot_paths[url] = screenshot_path
+        self.screenshot_writes[url] = future
+        print(f"      📸 Screenshot queued: {screenshot_path} ({len(data) // 1024} KB)")
+        return screenshot_path
+
+    def written_screenshot(self, url, timeout=SCREENSHOT_WRITE_TIMEOUT_S):
+        """The screenshot path for `url` once its file is written; None if there is none or the write failed."""
+        future = self.screenshot_writes.get(url)
+        if future is None:
+            return None
+        try:
+            future.result(timeout=timeout)
+        except Exception:
+            # Failures are logged by the write's done-callback; a slow write just isn't shown
+            return None
+        return self.screenshot_paths[url]
+
+    def wait_until_ready(self, page, step, max_wait_s=PAGE_SETTLE_WAIT_S):
+        """Adaptive settle: returns once the page is quiescent (bounded by max_wait_s)."""
+        stats = wait_for_ready(page, max_wait_ms=int(max_wait_s * 1000))
+        try:
+            stats["url"] = page.url
+        except Exception:
+            stats["url"] = None
+        stats["step"] = step
+        self.readiness_stats.append(stats)
+        print(f"      ⏱️ {step}: ready in {stats['waited_ms']}ms ({stats['reason']}, {stats['anchors']} anchors)")
+        return stats
 
     def get_report_links(self, page_content, base_url):
         """
         Parses HTML and finds PDF links.
         Uses 'Heuristic Scoring' to prioritize likely ESG reports.
+        Keyword matching is precompiled (link_classifier.py) and DOM lookups
+        are memoized per node, so large hub pages stay cheap.
         """
         tree = HTMLParser(page_content)
         candidates = []
+        classifier = get_link_classifier()
+        dom = DomContext()
         
-        # GENERIC_LINK_TERMS and EXCLUDE_KEYWORDS imported from config.py
+        # GENERIC_LINK_TERMS and EXCLUDE_KEYWORDS compiled into the classifier
         from utils import extract_year
-            
-        def get_preceding_header(node):
-            """
-            Traverses backwards to find the nearest header (h1-h6).
-            Useful for lists like: 
-            <h3>2024 Reports</h3> 
-            <ul><li><a...>Report</a></li></ul>
-            """
-            current = node.parent
-            for _ in range(5): # Limit traversal depth
-                if not current: break
-                
-                # Check previous siblings
-                prev = current.prev
-                while prev:
-                    if prev.tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                        return prev.text(strip=True)
-                    prev = prev.prev
-                
-                current = current.parent
-            return None
 
-        def get_parent_context(node):
-            """Get text from parent elements for context"""
-            context_text = ""
-            parent = node.parent
-            
-            # Go up 2 levels max to find context
-            for _ in range(2):
-                if parent and parent.tag in ['div', 'p', 'li', 'td', 'section', 'article']:
-                    parent_text = parent.text(strip=True)
-                    if parent_text and len(parent_text) < 200:  # Don't get huge blocks
-                        context_text = parent_text
-                        break
-                if parent:
-                    parent = parent.parent
-                else:
-                    break
-            
-            return context_text
-
-        def get_best_text(node):
+        def get_best_text(node, href):
             # 1. Visible Text
             text = node.text(strip=True) or ""
-            href = node.attributes.get("href", "") or ""
             
             # 2. Attributes (aria-label, title) - often has the full context
             aria = (node.attributes.get("aria-label") or "").strip()
@@ -131,7 +232,9 @@ class ESGScraper:
             #     <div><span>Impact Report</span></div>
             #   </div>
             # </a>
-            nested_role_link = node.css_first("div[role='link'], span[role='link']")
+            # (plain-text anchors have no children, so skip the CSS lookups)
+            has_children = has_child_elements(node)
+            nested_role_link = node.css_first("div[role='link'], span[role='link']") if has_children else None
             if nested_role_link:
                 nested_aria = (nested_role_link.attributes.get("aria-label") or "").strip()
                 # If nested aria-label is more descriptive than parent, use it
@@ -140,19 +243,19 @@ class ESGScraper:
             
             # 3. Image Alt Text (if link wraps an image)
             alt_text = ""
-            img = node.css_first("img")
+            img = node.css_first("img") if has_children else None
             if img:
                 alt_text = (img.attributes.get("alt") or "").strip()
 
             # Enhanced Name Selection with URL Parsing
-            is_text_generic = not text or any(term in text.lower() for term in GENERIC_LINK_TERMS) or len(text) < 4
+            is_text_generic = not text or classifier.is_generic(text.lower()) or len(text) < 4
             
             base_text = text
             if is_text_generic:
                 # Try attributes first
-                if aria and not any(term in aria.lower() for term in GENERIC_LINK_TERMS): 
+                if aria and not classifier.is_generic(aria.lower()): 
                     base_text = aria
-                elif title and not any(term in title.lower() for term in GENERIC_LINK_TERMS): 
+                elif title and not classifier.is_generic(title.lower()): 
                     base_text = title
                 elif alt_text: 
                     base_text = alt_text
@@ -177,8 +280,7 @@ class ESGScraper:
                 base_text = aria
             
             # Clean junk text using shared patterns from config
-            for pattern in JUNK_PATTERNS:
-                base_text = re.sub(pattern, '', base_text, flags=re.IGNORECASE)
+            base_text = classifier.clean_junk(base_text)
             base_text = re.sub(r'\s+', ' ', base_text).strip()
                 
             if not base_text or len(base_text) < 3: 
@@ -201,8 +303,8 @@ class ESGScraper:
 
             # B. Check Preceding Header (for grouped lists)
             # Only do this if text is somewhat generic or short
-            if len(base_text) < 30 or any(t in base_text.lower() for t in GENERIC_LINK_TERMS):
-                header = get_preceding_header(node)
+            if len(base_text) < 30 or classifier.is_generic(base_text.lower()):
+                header = dom.preceding_header(node)
                 if header and len(header) < 50: # Don't prepend massive headers
                     # Clean header
                     header = re.sub(r'\s+', ' ', header).strip()
@@ -212,7 +314,7 @@ class ESGScraper:
 
             # C. Check Parent Content (last resort for year)
             if not extract_year(base_text):
-                ctx = get_parent_context(node)
+                ctx = dom.parent_context(node)
                 y = extract_year(ctx)
                 if y and y not in base_text:
                      base_text = f"{base_text} ({y})"
@@ -221,30 +323,24 @@ class ESGScraper:
 
         for node in tree.css("a"):
             href = node.attributes.get("href")
-            text = get_best_text(node)
+            if not href:
+                continue
+            href_lower = href.lower()
+            # Excluded URLs never need a name
+            if classifier.is_excluded(href_lower):
+                continue
+
+            text = get_best_text(node, href)
             
             # Clean text (remove newlines, extra spaces)
             text = re.sub(r'\s+', ' ', text).strip()
             if not text: text = "Unknown Report Document"
             text_lower = text.lower()
-            
-            if not href:
-                continue
                 
             # 1. Score: Does the text look like a report?
-            score = 0
-            for kw in REPORT_KEYWORDS:
-                if kw in text_lower or kw in href.lower():
-                    score += 1
-            
             # Exclusion: Filter out non-report pages
-            excluded = False
-            for exc in EXCLUDE_KEYWORDS:
-                if exc in text_lower or exc in href.lower():
-                    excluded = True
-                    break
-            
-            if excluded:
+            score = classifier.score(text_lower, href_lower)
+            if score is None:
                 continue
             
             # Normalize URL
@@ -289,30 +385,34 @@ class ESGScraper:
         unique_hubs = {h['url']: h for h in hubs}.values()
         return list(unique_hubs)
 
-    def expand_page_interaction(self, page):
-        """Aggressive interaction: Click 'Load More', Year Tabs, etc."""
+    def expand_page_interaction(self, page, deadline=None):
+        """
+        Aggressive interaction: Click 'Load More', Year Tabs, etc.
+        Waits and clicks are cut short at `deadline` (time.monotonic()), after which nothing more is tried.
+        """
         print("   🔨 Attempting to expand page content...")
         try:
             # 0. Scroll to bottom to trigger lazy-loaded content
             try:
                 print("      Scrolling to page bottom to trigger lazy loading...")
                 page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                time.sleep(2)  # Wait for lazy-loaded content
+                self.wait_until_ready(page, "lazy-load scroll", _seconds_left(deadline, LAZY_LOAD_WAIT_S))
             except Exception as e:
                 print(f"      Scroll warning: {e}")
             
             # 1. Click "Load More" / "Show All" buttons (selectors from config)
             for selector in EXPAND_SELECTORS:
+                if _expired(deadline):
+                    print("      ⏰ Deadline reached, skipping the remaining expanders")
+                    return
                 try:
                     btn = page.locator(selector).first
                     if btn.count() > 0:
                         print(f"      Found expansion button with selector: {selector}")
-                        btn.click(timeout=3000)
-                        # Wait for network to settle after click
-                        try:
-                            page.wait_for_load_state("networkidle", timeout=5000)
-                        except Exception:
-                            time.sleep(2)  # Fallback wait
+                        btn.click(timeout=max(1, _seconds_left(deadline, PLAYWRIGHT_CLICK_TIMEOUT_MS / 1000) * 1000))
+                        # Wait for DOM + network to settle after click
+                        self.wait_until_ready(page, "expand click",
+                                              _seconds_left(deadline, PLAYWRIGHT_NETWORKIDLE_TIMEOUT_MS / 1000))
                         break
                 except Exception:
                     continue
@@ -321,20 +421,29 @@ class ESGScraper:
             # This is risky as it might navigate away, but we want aggressive.
             # We'll try to click text that is EXACTLY a year
             for year in ["2024", "2023", "2025"]:
+                if _expired(deadline):
+                    print("      ⏰ Deadline reached, skipping the remaining year filters")
+                    return
                 year_btn = page.locator(f"text=^{year}$")
                 if year_btn.count() > 0:
                     print(f"      Clicking year filter: {year}")
                     try:
-                        year_btn.first.click(timeout=3000)
-                        time.sleep(1.5)
+                        year_btn.first.click(timeout=max(1, _seconds_left(deadline, PLAYWRIGHT_CLICK_TIMEOUT_MS / 1000) * 1000))
+                        self.wait_until_ready(page, f"year filter {year}", _seconds_left(deadline, LAZY_LOAD_WAIT_S))
                     except Exception:
                         pass
                     
         except Exception as e:
             print(f"      Interaction warning: {e}")
 
-    def scrape_page_content(self, page, url):
-        """Helper to get links from a specific page state, scanning ALL FRAMES."""
+    def scrape_page_content(self, page, url, json_capture=None, deadline=None):
+        """
+        Helper to get links from a specific page state, scanning ALL FRAMES.
+        With `json_capture` (see start_json_capture), links found in XHR/fetch
+        JSON responses are included too. With `deadline` (time.monotonic()),
+        scrolling, expanding and frame scanning stop when it passes and the
+        links found so far are returned.
+        """
         links = []
         hubs = []
         
@@ -342,61 +451,127 @@ class ESGScraper:
             # Scroll to bottom first to trigger any lazy-loaded content
             try:
                 page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                time.sleep(2)
+                self.wait_until_ready(page, "scroll bottom", _seconds_left(deadline, LAZY_LOAD_WAIT_S))
                 page.evaluate("window.scrollTo(0, 0)")  # Scroll back to top
-                time.sleep(1)
             except Exception as e:
                 logger.debug(f"Scroll failed: {e}")
             
             # OPTIONAL: Interact to reveal content
-            self.expand_page_interaction(page)
+            self.expand_page_interaction(page, deadline)
             
-            # 1. Scan Main Frame
+            # 1. Scan Main Frame (parsed on the worker pool while frames are fetched)
             html_main = page.content()
-            l_main = self.get_report_links(html_main, url)
-            h_main = self.get_hub_links(HTMLParser(html_main), url)
+            main_future = _parse_pool.submit(self._parse_main_html, html_main, url)
+
+            # 1b. JSON payloads behind client-rendered lists
+            j_links = json_capture.harvest(url) if json_capture is not None else []
             
+            # 2. Scan Sub-Frames (Aggressive)
+            f_links = self.scan_frames(page, deadline)
+
+            l_main, h_main = main_future.result()
             links.extend(l_main)
             hubs.extend(h_main)
-            
-            # 2. Scan Sub-Frames (Aggressive)
-            frames = page.frames
-            if len(frames) > 1:
-                print(f"      Scanning {len(frames)-1} sub-frames...")
-                for frame in frames[1:]: # Skip main frame (index 0 usually)
-                    try:
-                        # Ensure frame is loaded
-                        if not frame.url or frame.url == "about:blank": continue
-                        
-                        f_html = frame.content()
-                        f_links = self.get_report_links(f_html, frame.url) # Use frame URL base
-                        
-                        if f_links:
-                            # Mark them coming from a frame
-                            for l in f_links: l['text'] += " [Frame]"
-                            links.extend(f_links)
-                    except Exception:
-                        pass
+            if j_links:
+                print(f"      🧩 {len(j_links)} links from JSON responses")
+                links.extend(j_links)
+            links.extend(f_links)
 
             return links, hubs
         except Exception as e:
             print(f"Error scraping content from {url}: {e}")
             return [], []
 
-    def scrape_site(self, site, browser_context):
+    def _parse_main_html(self, html, url):
+        return self.get_report_links(html, url), self.get_hub_links(HTMLParser(html), url)
+
+    def frame_skip_reason(self, frame):
+        """Why a sub-frame is not worth scanning (None = scan it)."""
+        frame_url = frame.url or ""
+        if not frame_url or frame_url == "about:blank" or frame_url.startswith(("data:", "javascript:")):
+            return "blank"
+        url_lower = frame_url.lower()
+        host = url_lower.split("//", 1)[-1].split("/", 1)[0].split(":")[0]
+        for d in BLOCKED_REQUEST_DOMAINS:
+            if host == d or host.endswith("." + d):
+                return f"origin:{d}"
+        for pattern in FRAME_SKIP_PATTERNS:
+            if pattern in url_lower:
+                return f"pattern:{pattern}"
+        try:
+            element = frame.frame_element()
+            box = element.bounding_box() if element else None
+        except Exception:
+            box = None
+        if box is None:
+            return "hidden"
+        if box["width"] * box["height"] < FRAME_MIN_AREA_PX:
+            return f"size:{int(box['width'])}x{int(box['height'])}"
+        return None
+
+    def scan_frames(self, page, deadline=None):
         """
-        Process a site with recursive Level 2 scanning for Hubs.
+        Links from the page's sub-frames. Frame HTML is fetched on the
+        Playwright thread (the sync API is thread-bound) and each frame is
+        parsed on the worker pool while the next one is fetched. Ad, video,
+        consent and tiny/hidden frames are skipped, and so are the frames
+        left once `deadline` (time.monotonic()) passes. Timings go to frame_stats.
         """
-        print(f"\n🌍 Processing: {site['name']}...")
-        page = browser_context.new_page()
-        all_links = []
-        visited_urls = set()
-        
+        frames = page.frames[1:]  # Skip main frame (index 0 usually)
+        if not frames:
+            return []
+
+        jobs = []
+        skipped = 0
+        for frame in frames:
+            stat = {"url": frame.url, "skipped": None, "fetch_ms": None, "parse_ms": None, "links": 0}
+            self.frame_stats.append(stat)
+            try:
+                reason = "deadline" if _expired(deadline) else self.frame_skip_reason(frame)
+                if reason:
+                    stat["skipped"] = reason
+                    skipped += 1
+                    continue
+                t0 = time.monotonic()
+                f_html = frame.content()
+                stat["fetch_ms"] = int((time.monotonic() - t0) * 1000)
+                if len(f_html) > FRAME_MAX_HTML_BYTES:
+                    stat["skipped"] = f"html:{len(f_html) // 1024}KB"
+                    skipped += 1
+                    continue
+                jobs.append((stat, _parse_pool.submit(self._parse_frame_html, f_html, frame.url)))
+            except Exception as e:
+                stat["skipped"] = f"error:{str(e)[:60]}"
+                skipped += 1
+
+        print(f"      Scanning {len(jobs)} of {len(frames)} sub-frames ({skipped} skipped)...")
+        links = []
+        for stat, future in jobs:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                f_links, stat["parse_ms"] = future.result(timeout=timeout)
+            except Exception:
+                continue
+            stat["links"] = len(f_links)
+            # Mark them coming from a frame
+            for l in f_links: l['text'] += " [Frame]"
+            links.extend(f_links)
+            print(f"      🪟 {stat['url'][:60]}: {stat['links']} links "
+                  f"(fetch {stat['fetch_ms']}ms, parse {stat['parse_ms']}ms)")
+        return links
+
+    def _parse_frame_html(self, html, frame_url):
+        t0 = time.monotonic()
+        f_links = self.get_report_links(html, frame_url)  # Use frame URL base
+        return f_links, int((time.monotonic() - t0) * 1000)
+
+    def _scrape_main_page(self, page, site):
+        """Pool job: load a site's main page and return (links, hubs)."""
+        json_capture = self.start_json_capture(page)
         try:
-            # 1. Visit Main Page
             wait_strategy = site.get("wait_until", "networkidle")
             print(f"   ➡️ Visiting Main: {site['url']}")
-            page.goto(site['url'], timeout=90000, wait_until=wait_strategy)
+            page.goto(site['url'], timeout=PLAYWRIGHT_NAV_TIMEOUT_MS, wait_until=wait_strategy)
             
             # Handle cookies/popups if possible (basic click)
             try:
@@ -404,230 +579,285 @@ class ESGScraper:
             except Exception:
                 pass
 
-            time.sleep(3) # Settle
-            
-            main_links, hubs = self.scrape_page_content(page, site['url'])
-            all_links.extend(main_links)
-            visited_urls.add(site['url'])
-
-            # 2. Level 2: Visit Hubs (Max 2)
-            if hubs:
-                print(f"   🔎 Found {len(hubs)} potential archives. Checking top 3...")
-                for hub in hubs[:3]:
-                    if hub['url'] in visited_urls: continue
-                    
-                    print(f"   ➡️ Visiting Hub: {hub['text'][:30]}...")
-                    try:
-                        page.goto(hub['url'], timeout=45000, wait_until="domcontentloaded")
-                        time.sleep(3)
-                        hub_links, _ = self.scrape_page_content(page, hub['url'])
-                        
-                        # Add new unique links
-                        existing_urls = {l['url'] for l in all_links}
-                        for hl in hub_links:
-                            if hl['url'] not in existing_urls:
-                                hl['text'] = f"[Hub: {hub['text']}] {hl['text']}" # Mark source
-                                all_links.append(hl)
-                                
-                        visited_urls.add(hub['url'])
-                    except Exception as e:
-                        print(f"   Failed to scrape hub {hub['url']}: {e}")
-            
-            print(f"   ✅ Found {len(all_links)} total reports.")
-            
-            # Return top result for basic compatibility, but actually we want all
-            # The original code returned 'result' (one link). 
-            # We should probably return LIST of links if called from app?
-            # Existing contract returns dictionary of results.
-            # Let's return the full list if possible, or just the best one if fitting old contract.
-            # BUT: app.py calls this logic? 
-            # App.py imports ESGScraper... wait. 
-            # App.py calls `search_esg_info` which calls `ESGScraper`? 
-            # No, `debug_amat.py` works, but app.py currently only uses ESGScraper for SCREENSHOTS (in strict mode).
-            # The MAIN scan in app.py uses `requests` + `collect_links`.
-            # AHH: Task `Fix Applied Materials Scanning` said: "Update app.py to use Playwright/ESGScraper for 'Deep Scan'".
-            # Let's check `app.py` to see if it actually USES ESGScraper for scanning content.
-            # I suspect it DOES NOT yet, or I missed it.
-            
-            # Re-reading `app.py`: 
-            # "new_data = search_esg_info(..., known_website=data['website'], strict_mode=True)"
-            # `search_esg_info` uses `requests` primarily.
-            
-            # WAIT. If I want "Better Scanning", I should ensure `app.py` uses `ESGScraper` (Playwright) 
-            # when `strict_mode` is on or as a fallback.
-            
-            # Logic here: I will return the best link as per old contract, 
-            # BUT I should probably expose a method `detect_all_reports`.
-            
-            if all_links:
-                # Sort by score
-                all_links.sort(key=lambda x: x['score'], reverse=True)
-                return all_links # Returning LIST now. Caller must handle!
-            return []
+            self.wait_until_ready(page, "main settle", PAGE_SETTLE_WAIT_S)
+            links, hubs = self.scrape_page_content(page, site['url'], json_capture)
+            self.log_blocked_resources(page)
+            return links, hubs
+        finally:
+            self.finish_json_capture(json_capture, site['url'])
+
+    def _scrape_hub_page(self, page, url):
+        """Pool job: load a hub/archive page and return (links, hubs)."""
+        json_capture = self.start_json_capture(page)
+        try:
+            page.goto(url, timeout=PLAYWRIGHT_HUB_TIMEOUT_MS, wait_until="domcontentloaded")
+            self.wait_until_ready(page, "hub settle", PAGE_SETTLE_WAIT_S)
+            links, hubs = self.scrape_page_content(page, url, json_capture)
+            self.log_blocked_resources(page)
+            return links, hubs
+        finally:
+            self.finish_json_capture(json_capture, url)
+
+    def scrape_site(self, site):
+        """
+        Process a site: the main page, then its hubs/archives through a
+        crawl frontier (crawl_frontier.py). Pages are loaded concurrently on
+        the browser pool, best-scored hubs first, until the crawl budget
+        (pages, time, PDFs found) runs out.
+        """
+        print(f"\n🌍 Processing: {site['name']}...")
+        pool = self.get_pool()
+        all_links = {}
+        hub_text = {}
+        lock = threading.Lock()
 
+        def visit(url, depth):
+            if depth == 0:
+                links, hubs = pool.run(self._scrape_main_page, site)
+            else:
+                print(f"   ➡️ Visiting Hub (depth {depth}): {hub_text.get(url, url)[:30]}...")
+                links, hubs = pool.run(self._scrape_hub_page, url)
+            new_pdfs = 0
+            with lock:
+                for l in links:
+                    if l['url'] in all_links:
+                        continue
+                    if depth:
+                        l['text'] = f"[Hub: {hub_text.get(url, url)}] {l['text']}" # Mark source
+                    all_links[l['url']] = l
+                    if l['url'].lower().endswith("pdf"):
+                        new_pdfs += 1
+                for h in hubs:
+                    hub_text.setdefault(h['url'], h['text'])
+            if hubs and depth == 0:
+                print(f"   🔎 Found {len(hubs)} potential archives.")
+            return new_pdfs, hubs
+
+        try:
+            frontier = CrawlFrontier(visit, workers=pool.size, allowed_domain=site['url'])
+            frontier.add(site['url'], depth=0)
+            stats = frontier.run()
+            if stats["pages"] == stats["failed"]:
+                print(f"   🔥 Error scraping {site['name']}: main page failed")
         except Exception as e:
             print(f"   🔥 Error scraping {site['name']}: {e}")
             return []
-        finally:
-            page.close()
+
+        print(f"   ✅ Found {len(all_links)} total reports.")
+        # Returns the full list of links, best first (callers handle the list)
+        return sorted(all_links.values(), key=lambda x: x['score'], reverse=True)
     
     def run(self, sites_config=SITES):
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.headless, args=BROWSER_ARGS)
-
-            context = browser.new_context(
-                user_agent=USER_AGENT,
-                ignore_https_errors=True,
-                java_script_enabled=True,
-                viewport=VIEWPORT,
-            )
-            context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            results = {}
-            for site in sites_config:
-                # Returns (links, hubs) tuple
-                found_data = self.scrape_site(site, context) 
-                
-                # Check if we got links (first element of tuple)
-                if found_data and found_data[0]:
-                    results[site['name']] = found_data[0] # Store just links list
-                    
-            browser.close()
-            return results
+        results = {}
+        for site in sites_config:
+            # scrape_site returns the sorted list of links for the site
+            found_links = self.scrape_site(site)
+            if found_links:
+                results[site['name']] = found_links
+        return results
 
     def scan_url(self, url):
         """
         Standalone method to scan a single URL with hybrid approach.
         STRATEGY: Try simple requests first (fast, less detectable), 
         then fall back to Playwright for dynamic/protected sites.
+        The per-domain strategy table (fetch_strategy.py) lets domains that
+        are known to need a browser skip the HTTP attempt. A domain whose
+        circuit breaker is open is not scanned at all.
         """
-        import time
-        import requests
-        
         print(f"🔍 Scanning: {url}")
-        
-        # STEP 1: Try simple requests first (works for most sites, bypasses bot detection)
+
+        store = get_strategy_store()
+        tier, reason = store.choose_tier(url)
+        print(f"   🧭 Fetch strategy: {tier} ({reason})")
+
+        if tier == TIER_HTTP:
+            # Known-static domains get a second HTTP try before escalating
+            attempts = 2 if store.is_static(url) else 1
+            for attempt in range(attempts):
+                try:
+                    links, transient = self._fast_fetch(url, store)
+                except CircuitOpenError as e:
+                    print(f"   ⛔ {e}, skipping the scan")
+                    return []
+                if links:
+                    return links
+                if not transient:
+                    break
+                if attempt + 1 < attempts:
+                    print("   🔁 Static site hit a transient error, retrying HTTP before escalating...")
+
+        # A site that keeps blocking us isn't worth the replay or a browser either
+        if get_circuit_breaker().is_open(url):
+            print("   ⛔ Circuit open for this domain, skipping the scan")
+            return []
+
+        # STEP 1b: JSON endpoints remembered from an earlier browser scan
+        links = self._replay_json_endpoints(url, store)
+        if links:
+            return links
+
+        # STEP 2: Fall back to Playwright for dynamic/protected sites
+        print("   🕵️‍♀️ Deep Scanning (Playwright Stealth)...")
+        t0 = time.monotonic()
+        try:
+            links = self.get_pool().run(self._deep_scan_page, url)
+        except Exception as e:
+            print(f"   Playwright failed: {e}")
+            # Settles a half-open probe the scan may have been
+            get_circuit_breaker().record_failure(url, type(e).__name__)
+            links = []
+        store.record(url, TIER_BROWSER, bool(links), time.monotonic() - t0, len(links))
+        return links
+
+    def _fast_fetch(self, url, store):
+        """
+        STEP 1: plain HTTP fetch (works for most sites, bypasses bot detection).
+        Returns (links, transient_failure) and records the outcome in `store`.
+        Raises CircuitOpenError when the domain's circuit breaker is open.
+        """
+        from utils import robust_get
+
         print("   📡 Attempting fast fetch (requests)...")
+        t0 = time.monotonic()
         try:
-            from utils import robust_get
             response = robust_get(url, timeout=REQUESTS_DOWNLOAD_TIMEOUT_S)
-            
-            if response.status_code == 200:
-                # Parse with our existing method
-                links = self.get_report_links(response.text, url)
-                
-                if links and len(links) > 0:
-                    print(f"   ✅ Simple fetch succeeded: Found {len(links)} links")
-                    return links
-                else:
-                    print("   ⚠️ Simple fetch returned no links, trying Playwright...")
-            else:
-                print(f"   ⚠️ HTTP {response.status_code}, falling back to Playwright...")
-                
+        except CircuitOpenError:
+            # Not a new data point for the strategy table: we didn't fetch
+            raise
         except Exception as e:
             print(f"   ⚠️ Simple fetch failed ({str(e)[:50]}), trying Playwright...")
-        
-        # STEP 2: Fall back to Playwright for dynamic/protected sites
-        print("   🕵️‍♀️ Deep Scanning (Playwright Stealth)...")
-        links = []
-        
+            store.record(url, TIER_HTTP, False, time.monotonic() - t0)
+            return [], True
+
+        if response.status_code != 200:
+            print(f"   ⚠️ HTTP {response.status_code}, falling back to Playwright...")
+            store.record(url, TIER_HTTP, False, time.monotonic() - t0)
+            return [], response.status_code in (429, 500, 502, 503, 504)
+
+        # Parse with our existing method
+        links = self.get_report_links(response.text, url)
+        store.record(url, TIER_HTTP, bool(links), time.monotonic() - t0, len(links))
+        if links:
+            print(f"   ✅ Simple fetch succeeded: Found {len(links)} links")
+        else:
+            print("   ⚠️ Simple fetch returned no links, trying Playwright...")
+        return links, False
+
+    def _replay_json_endpoints(self, url, store):
+        """Fetch remembered XHR endpoints over plain HTTP; returns merged links (or [])."""
+        endpoints = store.endpoints(url)
+        if not endpoints:
+            return []
+        from utils import robust_get
+
+        print(f"   🧩 Replaying {len(endpoints)} remembered JSON endpoint(s)...")
+        best = {}
+        for endpoint in endpoints:
+            try:
+                response = robust_get(endpoint, timeout=REQUESTS_DOWNLOAD_TIMEOUT_S)
+                data = parse_json_text(response.text) if response.status_code == 200 else None
+            except Exception as e:
+                logger.debug(f"Endpoint replay failed for {endpoint}: {e}")
+                data = None
+            found = extract_links_from_json(data, endpoint) if data is not None else []
+            pdf_count = sum(1 for l in found if is_pdf_url(l['url']))
+            if not found:
+                store.forget_endpoint(url, endpoint)
+                continue
+            store.record_endpoint(url, endpoint, pdf_count)
+            for l in found:
+                if l['url'] not in best or l['score'] > best[l['url']]['score']:
+                    best[l['url']] = l
+        links = sorted(best.values(), key=lambda x: x['score'], reverse=True)
+        if links:
+            print(f"   ✅ JSON endpoints returned {len(links)} links (browser skipped)")
+        return links
+
+    def _deep_scan_page(self, page, url, deadline_s=SCAN_URL_DEADLINE_S, checkpoints=None):
+        """
+        Playwright half of scan_url. Runs on a browser pool worker.
+
+        Navigates once (returning at 'commit'), then extracts links at each
+        checkpoint in SCAN_URL_CHECKPOINTS, merging into a best-so-far set,
+        until the checkpoints run out or the per-URL deadline passes.
+        """
+        checkpoints = checkpoints or SCAN_URL_CHECKPOINTS
+        start = time.monotonic()
+        deadline = start + deadline_s
+        best = {}
+
+        def remaining_ms():
+            return int((deadline - time.monotonic()) * 1000)
+
+        def absorb(found, label):
+            added = 0
+            for l in found:
+                current = best.get(l['url'])
+                if current is None:
+                    best[l['url']] = l
+                    added += 1
+                elif l['score'] > current['score']:
+                    best[l['url']] = l
+            print(f"      📍 {label}: +{added} links ({len(best)} total, {time.monotonic() - start:.1f}s)")
+
+        # Listen before navigating so the first XHR batch is not missed
+        json_capture = self.start_json_capture(page)
+
+        # Browser hits count towards the domain's circuit breaker like robust_get's
+        breaker = get_circuit_breaker()
         try:
-            from playwright.sync_api import sync_playwright
-            
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=self.headless, args=BROWSER_ARGS)
-
-                context = browser.new_context(
-                    user_agent=USER_AGENT,
-                    viewport=VIEWPORT,
-                    ignore_https_errors=True,
-                    java_script_enabled=True,
-                )
-                context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-                
-                page = context.new_page()
-                try:
-                    # Robust navigation with multiple fallback strategies
-                    navigation_success = False
-                    
-                    # Strategy 1: Try networkidle (waits for network to be idle)
-                    try:
-                        print("      Attempting networkidle wait strategy...")
-                        page.goto(url, wait_until="networkidle", timeout=90000)
-                        navigation_success = True
-                        print("      ✓ Page loaded with networkidle")
-                    except Exception as e1:
-                        print(f"      networkidle failed: {str(e1)[:100]}")
-                        
-                        # Strategy 2: Fall back to 'load' 
-                        try:
-                            print("      Attempting 'load' wait strategy...")
-                            page.goto(url, wait_until="load", timeout=90000)
-                            navigation_success = True
-                            print("      ✓ Page loaded with 'load'")
-                        except Exception as e2:
-                            print(f"      load failed: {str(e2)[:100]}")
-                            
-                            # Strategy 3: Last resort - domcontentloaded
-                            try:
-                                print("      Attempting 'domcontentloaded' wait strategy...")
-                                page.goto(url, wait_until="domcontentloaded", timeout=90000)
-                                navigation_success = True
-                                print("      ✓ Page loaded with 'domcontentloaded'")
-                            except Exception as e3:
-                                print(f"      All navigation strategies failed: {str(e3)[:100]}")
-                    
-                    # Allow extra time for dynamic content even if navigation succeeded
-                    if navigation_success:
-                        time.sleep(5) # Allow dynamic content to load
-                    
-                    # Try to expand content interactively
-                    self.expand_page_interaction(page)
-                    
-                    # Extract links
-                    link_data, _ = self.scrape_page_content(page, url)
-                    links = link_data
-                    
-                except Exception as e:
-                    print(f"      Playwright error ({url}): {e}")
-                    # Try to scrape whatever loaded (partial results better than nothing)
-                    try:
-                        print("      Attempting to scrape partial content...")
-                        link_data, _ = self.scrape_page_content(page, url)
-                        links = link_data
-                        if links:
-                            print(f"      ✓ Retrieved {len(links)} links from partial content")
-                    except Exception as e2:
-                        print(f"      Partial scrape also failed: {e2}")
-                
-                # ALWAYS capture screenshot, even on failure
+            print("      Navigating (commit)...")
+            response = page.goto(url, wait_until="commit", timeout=max(1, min(PLAYWRIGHT_NAV_TIMEOUT_MS, remaining_ms())))
+            if response is not None and (response.status in (403, 429) or response.status >= 500):
+                breaker.record_failure(url, f"HTTP {response.status}")
+            else:
+                breaker.record_success(url)
+        except Exception as e:
+            print(f"      Navigation did not commit: {str(e)[:100]}")
+            breaker.record_failure(url, type(e).__name__)
+
+        for checkpoint in checkpoints:
+            if remaining_ms() <= 0:
+                print(f"      ⏰ Deadline ({deadline_s}s) reached before '{checkpoint}', returning best result")
+                break
+            try:
+                if checkpoint in ("domcontentloaded", "load", "networkidle"):
+                    page.wait_for_load_state(checkpoint, timeout=max(1, remaining_ms()))
+                    absorb(self.get_report_links(page.content(), url), checkpoint)
+                elif checkpoint == "settled":
+                    self.wait_until_ready(page, "settled", min(DYNAMIC_CONTENT_WAIT_S, remaining_ms() / 1000))
+                    absorb(self.get_report_links(page.content(), url), checkpoint)
+                elif checkpoint == "expanded":
+                    # Scroll, click expanders and scan sub-frames
+                    link_data, _ = self.scrape_page_content(page, url, json_capture, deadline)
+                    absorb(link_data, checkpoint)
+                else:
+                    print(f"      Unknown checkpoint '{checkpoint}', skipping")
+            except Exception as e:
+                print(f"      '{checkpoint}' checkpoint failed: {str(e)[:100]}")
+                # Partial results are better than nothing
                 try:
-                    import os
-                    from urllib.parse import urlparse
-                    
-                    # Create screenshots directory if it doesn't exist
-                    screenshots_dir = "screenshots"
-                    os.makedirs(screenshots_dir, exist_ok=True)
-                    
-                    # Generate filename from URL
-                    parsed = urlparse(url)
-                    domain = parsed.netloc.replace(".", "_")
-                    path = parsed.path.replace("/", "_").strip("_") or "home"
-                    screenshot_path = os.path.join(screenshots_dir, f"{domain}_{path}.png")
-                    
-                    # Take screenshot of whatever is loaded
-                    page.screenshot(path=screenshot_path, full_page=True)
-                    print(f"      📸 Screenshot saved: {screenshot_path}")
-                    
-                except Exception as screenshot_error:
-                    print(f"      Screenshot capture failed: {screenshot_error}")
-                
-                browser.close()
-                return links
+                    absorb(self.get_report_links(page.content(), url), f"{checkpoint} (partial)")
+                except Exception:
+                    pass
 
-        except Exception as e:
-            print(f"   Playwright failed: {e}")
-            return []
+        # JSON that arrived after the last checkpoint (or when 'expanded' was skipped)
+        if json_capture is not None:
+            try:
+                absorb(json_capture.harvest(url), "json")
+            except Exception as e:
+                print(f"      JSON harvest failed: {str(e)[:100]}")
+            self.finish_json_capture(json_capture, url)
+
+        links = sorted(best.values(), key=lambda x: x['score'], reverse=True)
+
+        self.log_blocked_resources(page)
+
+        # Screenshot of whatever is loaded, even on failure (viewport JPEG, no re-navigation)
+        self.capture_screenshot(page, url)
+
+        return links
 
 def detect_config(url):
     """
@@ -635,9 +865,8 @@ def detect_config(url):
     This is the 'Config Generator' script.
     """
     print(f"🕵️ Analyzing {url} for config...")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+
+    def _analyze(page):
         try:
             page.goto(url, timeout=30000)
             # Basic heuristic: Check if 'body' is loaded.
@@ -656,8 +885,8 @@ def detect_config(url):
             return suggested
         except Exception as e:
             print(f"❌ Analysis failed: {e}")
-        finally:
-            browser.close()
+
+    return get_browser_pool(headless=True).run(_analyze)
 
 if __name__ == "__main__":
     # Example Usage:
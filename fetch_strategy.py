@@ -0,0 +1,216 @@
+"""
+Per-domain fetch-strategy memory for the hybrid scanner.
+
+`ESGScraper.scan_url` can fetch a page with plain HTTP (`robust_get`) or with
+a browser (Playwright). This module remembers, per domain, which tier worked,
+how long it took and how many links it yielded, so later scans go straight
+to the cheapest tier that works. Browser-only domains are periodically
+re-probed with HTTP in case the site changed.
+
+It also remembers JSON (XHR) endpoints that returned report links during a
+browser scan, so the next scan can fetch them directly without a browser.
+
+State is a small JSON file (FETCH_STRATEGY_FILE), like saved_links.json.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from config import (
+    FETCH_STRATEGY_FILE, FETCH_STRATEGY_REPROBE_EVERY, FETCH_STRATEGY_REPROBE_DAYS,
+    FETCH_STRATEGY_STATIC_MIN_SUCCESSES, JSON_ENDPOINTS_PER_DOMAIN, JSON_ENDPOINT_MAX_FAILURES,
+)
+
+TIER_HTTP = "http"
+TIER_BROWSER = "browser"
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def domain_key(url):
+    """Normalize a URL to the domain key used in the strategy table."""
+    try:
+        host = urlparse(url).netloc.lower()
+    except Exception:
+        return ""
+    host = host.split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+def _empty_tier():
+    return {"successes": 0, "failures": 0, "avg_latency_s": None, "avg_links": None, "last_success": None}
+
+
+class FetchStrategyStore:
+    """Thread-safe, file-backed table of per-domain fetch results."""
+
+    def __init__(self, path=FETCH_STRATEGY_FILE, browser_domains=None):
+        self.path = path
+        self.browser_domains = {domain_key(u) for u in (browser_domains or [])}
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self._data, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[FetchStrategy] Could not persist strategy table: {e}")
+
+    def get(self, url):
+        """Return a copy of the stored entry for a URL's domain (or None)."""
+        with self._lock:
+            entry = self._data.get(domain_key(url))
+            return json.loads(json.dumps(entry)) if entry else None
+
+    def _entry(self, domain):
+        entry = self._data.get(domain)
+        if entry is None:
+            entry = {"preferred": None, "scans_since_probe": 0, "last_http_probe": None, "tiers": {}}
+            self._data[domain] = entry
+        return entry
+
+    def choose_tier(self, url):
+        """
+        Pick the tier to try first for this URL's domain.
+        Returns (tier, reason).
+        """
+        domain = domain_key(url)
+        with self._lock:
+            entry = self._data.get(domain)
+            if entry is None or entry.get("preferred") is None:
+                if domain in self.browser_domains:
+                    return TIER_BROWSER, "known dynamic site"
+                return TIER_HTTP, "no history"
+
+            if entry["preferred"] == TIER_HTTP:
+                return TIER_HTTP, "http worked before"
+
+            # Browser-preferred: re-probe HTTP now and then
+            if entry.get("scans_since_probe", 0) >= FETCH_STRATEGY_REPROBE_EVERY:
+                return TIER_HTTP, "periodic re-probe"
+            last_probe = entry.get("last_http_probe")
+            if last_probe:
+                try:
+                    age = datetime.now() - datetime.strptime(last_probe, _TS_FORMAT)
+                    if age > timedelta(days=FETCH_STRATEGY_REPROBE_DAYS):
+                        return TIER_HTTP, "re-probe (stale)"
+                except ValueError:
+                    pass
+            return TIER_BROWSER, "browser needed before"
+
+    def is_static(self, url):
+        """True if plain HTTP has reliably worked for this domain."""
+        with self._lock:
+            entry = self._data.get(domain_key(url))
+            if not entry or entry.get("preferred") != TIER_HTTP:
+                return False
+            http = entry["tiers"].get(TIER_HTTP, {})
+            return http.get("successes", 0) >= FETCH_STRATEGY_STATIC_MIN_SUCCESSES
+
+    def record(self, url, tier, success, latency_s, link_count=0):
+        """Record the outcome of one fetch attempt and persist the table."""
+        domain = domain_key(url)
+        if not domain:
+            return
+        now = datetime.now().strftime(_TS_FORMAT)
+        with self._lock:
+            entry = self._entry(domain)
+            stats = entry["tiers"].setdefault(tier, _empty_tier())
+            if success:
+                n = stats["successes"]
+                stats["avg_latency_s"] = round(
+                    ((stats["avg_latency_s"] or 0) * n + latency_s) / (n + 1), 3)
+                stats["avg_links"] = round(
+                    ((stats["avg_links"] or 0) * n + link_count) / (n + 1), 1)
+                stats["successes"] = n + 1
+                stats["last_success"] = now
+            else:
+                stats["failures"] += 1
+
+            if tier == TIER_HTTP:
+                entry["last_http_probe"] = now
+                entry["scans_since_probe"] = 0
+                # A failed probe only demotes HTTP once the browser proves itself
+                if success:
+                    entry["preferred"] = TIER_HTTP
+            else:
+                entry["scans_since_probe"] = entry.get("scans_since_probe", 0) + 1
+                http_ok = entry["tiers"].get(TIER_HTTP, {}).get("last_success")
+                last_probe = entry.get("last_http_probe")
+                # Browser worked and the latest HTTP probe did not
+                if success and (not http_ok or (last_probe and http_ok < last_probe)):
+                    entry["preferred"] = TIER_BROWSER
+            entry["updated_at"] = now
+            self._save()
+
+    # --- JSON endpoint memory ---
+
+    def record_endpoint(self, url, endpoint, link_count):
+        """Remember a JSON endpoint that yielded report links for this domain."""
+        domain = domain_key(url)
+        if not domain or not endpoint:
+            return
+        now = datetime.now().strftime(_TS_FORMAT)
+        with self._lock:
+            entry = self._entry(domain)
+            endpoints = entry.setdefault("json_endpoints", {})
+            ep = endpoints.setdefault(endpoint, {"hits": 0, "failures": 0, "links": 0})
+            ep["hits"] += 1
+            ep["failures"] = 0
+            ep["links"] = link_count
+            ep["last_success"] = now
+            # Keep the most productive few
+            if len(endpoints) > JSON_ENDPOINTS_PER_DOMAIN:
+                ranked = sorted(endpoints.items(), key=lambda kv: (kv[1]["links"], kv[1].get("last_success") or ""), reverse=True)
+                entry["json_endpoints"] = dict(ranked[:JSON_ENDPOINTS_PER_DOMAIN])
+            entry["updated_at"] = now
+            self._save()
+
+    def endpoints(self, url):
+        """Remembered JSON endpoints for this URL's domain, best first."""
+        with self._lock:
+            entry = self._data.get(domain_key(url)) or {}
+            endpoints = entry.get("json_endpoints") or {}
+            return [ep for ep, _ in sorted(endpoints.items(), key=lambda kv: kv[1]["links"], reverse=True)]
+
+    def forget_endpoint(self, url, endpoint):
+        """Count a failed replay; drop the endpoint after repeated failures."""
+        with self._lock:
+            entry = self._data.get(domain_key(url)) or {}
+            endpoints = entry.get("json_endpoints") or {}
+            ep = endpoints.get(endpoint)
+            if ep is None:
+                return
+            ep["failures"] = ep.get("failures", 0) + 1
+            if ep["failures"] >= JSON_ENDPOINT_MAX_FAILURES:
+                del endpoints[endpoint]
+            self._save()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_strategy_store():
+    """Process-wide store, seeded with the browser-only sites from esg_scraper.SITES."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            from esg_scraper import SITES
+            _store = FetchStrategyStore(browser_domains=[s["url"] for s in SITES])
+        return _store
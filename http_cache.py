@@ -0,0 +1,251 @@
+"""
+On-disk HTTP cache with conditional revalidation for robust_get.
+
+Hub pages and multi-MB report PDFs are fetched again on every UI search and
+every batch cycle, though most of them have not changed. Bodies are stored
+here keyed by URL, together with the response's ETag / Last-Modified.
+Within the TTL a cached body is served without any request. After it, the
+URL is revalidated with If-None-Match / If-Modified-Since, and a 304 serves
+the stored body again. The cache is bounded by total size and evicts the
+least recently used bodies first.
+
+Layout: HTTP_CACHE_DIR/index.json (metadata) + one <sha1>.bin per body.
+`stats()` reports hits, misses and revalidations.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config import (
+    HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_MAX_ENTRY_BYTES,
+    HTTP_CACHE_HTML_TTL_S, HTTP_CACHE_PDF_TTL_S,
+)
+
+# Response headers kept with a body (others are per-connection or stale after decoding)
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Content-Disposition")
+
+
+def _key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """Thread-safe, size-bounded LRU cache of GET bodies plus validators."""
+
+    def __init__(self, directory=HTTP_CACHE_DIR, max_bytes=HTTP_CACHE_MAX_BYTES,
+                 max_entry_bytes=HTTP_CACHE_MAX_ENTRY_BYTES, html_ttl_s=HTTP_CACHE_HTML_TTL_S,
+                 pdf_ttl_s=HTTP_CACHE_PDF_TTL_S):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.html_ttl_s = html_ttl_s
+        self.pdf_ttl_s = pdf_ttl_s
+        self._lock = threading.Lock()
+        self._index = self._load()
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "changed": 0,
+                       "stale_served": 0, "stored": 0, "evicted": 0}
+
+    # --- persistence ---
+
+    def _index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def _load(self):
+        try:
+            with open(self._index_path(), "r") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        # Drop entries whose body file went missing
+        return {k: e for k, e in index.items() if os.path.exists(self._body_path(k))}
+
+    def _save(self):
+        tmp = f"{self._index_path()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self._index, f)
+            os.replace(tmp, self._index_path())
+        except OSError as e:
+            print(f"[HttpCache] Could not persist cache index: {e}")
+
+    # --- lookups ---
+
+    def lookup(self, url):
+        """Metadata for a cached URL (a copy), or None."""
+        with self._lock:
+            entry = self._index.get(_key(url))
+            return dict(entry) if entry else None
+
+    def ttl_for(self, content_type):
+        content_type = (content_type or "").lower()
+        if "pdf" in content_type or "octet-stream" in content_type:
+            return self.pdf_ttl_s
+        return self.html_ttl_s
+
+    def is_fresh(self, entry, now=None):
+        now = now or time.time()
+        return now - entry["stored_at"] < self.ttl_for(entry["headers"].get("Content-Type"))
+
+    @staticmethod
+    def conditional_headers(entry):
+        """If-None-Match / If-Modified-Since for revalidating an entry."""
+        headers = {}
+        if entry and entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry and entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def _read_body(self, url):
+        key = _key(url)
+        try:
+            with open(self._body_path(key), "rb") as f:
+                body = f.read()
+        except OSError:
+            with self._lock:
+                self._index.pop(key, None)
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index[key]["last_used"] = time.time()
+        return body
+
+    def _response(self, url, entry, body):
+        # Looks like a fresh requests response: .content, .text, .raw.read() and iter_content all work
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.reason = "OK"
+        resp.url = url
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.headers["Content-Length"] = str(len(body))
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.raw = io.BytesIO(body)
+        resp.from_cache = True
+        return resp
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    # --- robust_get hooks ---
+
+    def serve(self, url, entry, counter="hits"):
+        """Response built from the cached body (None if the body is gone)."""
+        body = self._read_body(url)
+        if body is None:
+            return None
+        self._count(counter)
+        return self._response(url, entry, body)
+
+    def miss(self):
+        self._count("misses")
+
+    def update(self, url, resp, entry=None, stream=False):
+        """
+        Handle a network response for a URL (entry = what was cached before).
+        A 304 refreshes the entry and serves the stored body; a cacheable 200
+        is stored. Streamed (stream=True) bodies are never stored: they are
+        left for the caller to read, not pulled into memory here.
+        Returns the response the caller should use.
+        """
+        if resp.status_code == 304 and entry:
+            resp.close()
+            with self._lock:
+                stored = self._index.get(_key(url))
+                if stored:
+                    stored["stored_at"] = time.time()
+                    for name in ("ETag", "Last-Modified"):
+                        if resp.headers.get(name):
+                            stored["headers"][name] = resp.headers[name]
+                    self._save()
+            return self.serve(url, entry, counter="revalidated") or resp
+        if entry:
+            self._count("changed")
+        if resp.status_code != 200 or not self._cacheable(resp, stream):
+            return resp
+
+        body = resp.content            # already read (not streamed)
+        if len(body) <= self.max_entry_bytes:
+            self._store(url, resp.headers, body)
+        return resp
+
+    def _cacheable(self, resp, stream):
+        if stream:
+            return False
+        if "no-store" in resp.headers.get("Cache-Control", "").lower():
+            return False
+        length = resp.headers.get("Content-Length")
+        if length and length.isdigit():
+            return int(length) <= self.max_entry_bytes
+        return True
+
+    def _store(self, url, headers, body):
+        key = _key(url)
+        kept = {name: headers[name] for name in KEPT_HEADERS if headers.get(name)}
+        tmp = f"{self._body_path(key)}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, self._body_path(key))
+        except OSError as e:
+            print(f"[HttpCache] Could not store {url[:80]}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            self._index[key] = {"url": url, "headers": kept, "size": len(body),
+                                "stored_at": now, "last_used": now}
+            self._stats["stored"] += 1
+            self._evict()
+            self._save()
+
+    def _evict(self):
+        total = sum(e["size"] for e in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._index.items(), key=lambda kv: kv[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+            total -= entry["size"]
+            del self._index[key]
+            self._stats["evicted"] += 1
+
+    def stats(self):
+        """Counters since start plus current size on disk."""
+        with self._lock:
+            out = dict(self._stats)
+            out["entries"] = len(self._index)
+            out["bytes"] = sum(e["size"] for e in self._index.values())
+        return out
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    """Process-wide cache used by robust_get."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
+
+
+def cache_stats():
+    """Hit/miss/revalidation counters for the shared cache (see HttpCache.stats)."""
+    return get_http_cache().stats()
@@ -0,0 +1,93 @@
+"""
+Shared HTTP connection pools for robust_get and the download scripts.
+
+`requests.get` builds a throwaway Session per call, so every hub fetch,
+PDF check and download paid for a fresh TCP + TLS handshake even when the
+same corporate host was hit 10-20 times per company. Here every thread
+gets its own `requests.Session` (cookie jars are not thread-safe), but all
+of them share one HTTPAdapter, whose urllib3 pool manager keeps per-host
+keep-alive connection pools and is thread-safe.
+
+`session_stats()` reports how many requests reused a pooled connection.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_POOL_BLOCK
+
+
+class SessionManager:
+    """Thread-local sessions over one shared set of per-host connection pools."""
+
+    def __init__(self, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 pool_block=HTTP_POOL_BLOCK):
+        # max_retries=0: robust_get owns the retry policy
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                   pool_block=pool_block, max_retries=0)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Counters from host pools evicted by the pool manager's LRU
+        self._retired = {"requests": 0, "connections": 0}
+        pools = self.adapter.poolmanager.pools
+        dispose = pools.dispose_func
+
+        def retire(pool):
+            with self._lock:
+                self._retired["requests"] += getattr(pool, "num_requests", 0)
+                self._retired["connections"] += getattr(pool, "num_connections", 0)
+            if dispose:
+                dispose(pool)
+
+        pools.dispose_func = retire
+
+    def session(self):
+        """The calling thread's session (created on first use)."""
+        s = getattr(self._local, "session", None)
+        if s is None:
+            s = requests.Session()
+            s.mount("https://", self.adapter)
+            s.mount("http://", self.adapter)
+            self._local.session = s
+        return s
+
+    def stats(self):
+        """Connection-reuse counters across all threads and hosts."""
+        pools = self.adapter.poolmanager.pools
+        with self._lock:
+            total_requests = self._retired["requests"]
+            total_connections = self._retired["connections"]
+        hosts = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts += 1
+            total_requests += pool.num_requests
+            total_connections += pool.num_connections
+        reused = max(0, total_requests - total_connections)
+        return {
+            "hosts": hosts,
+            "requests": total_requests,
+            "connections_opened": total_connections,
+            "connections_reused": reused,
+            "reuse_ratio": round(reused / total_requests, 3) if total_requests else 0.0,
+        }
+
+    def close(self):
+        self.adapter.close()
+
+
+_manager = SessionManager()
+
+
+def get_session():
+    """Pooled `requests.Session` for the current thread."""
+    return _manager.session()
+
+
+def session_stats():
+    """Connection-reuse counters for the shared pools (see SessionManager.stats)."""
+    return _manager.stats()
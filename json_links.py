@@ -0,0 +1,161 @@
+"""
+Harvest report links from JSON (XHR/fetch) payloads.
+
+JS-heavy hubs (e.g. Home Depot's `.views-element-container`) load their
+report lists from JSON endpoints and render them client-side. Reading the
+JSON directly gives us the same links without scrolling or clicking, and
+the endpoint can be replayed over plain HTTP on later scans.
+"""
+
+import json
+import re
+from urllib.parse import urljoin
+
+from config import (
+    MIN_NON_PDF_SCORE, PDF_SCORE_BOOST, JSON_CAPTURE_MAX_BYTES, JSON_CAPTURE_MAX_RESPONSES,
+)
+from link_classifier import get_link_classifier
+
+# Keys whose sibling string is a good human-readable label for a URL
+TITLE_KEYS = ("title", "name", "label", "text", "heading", "description", "alt")
+_URLISH = re.compile(r"^(https?://|/|\.\./|[\w\-]+/)[^\s\"'<>]*$", re.IGNORECASE)
+_SKIP_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".css", ".js", ".woff", ".woff2", ".mp4")
+_MAX_DEPTH = 12
+
+
+def is_pdf_url(url):
+    u = url.lower().split("?")[0]
+    return u.endswith(".pdf") or u.endswith("pdf")
+
+
+def extract_links_from_json(data, base_url):
+    """
+    Walk a decoded JSON payload and return report-like links as
+    [{"url", "text", "score"}], sorted by score (same shape as get_report_links).
+    """
+    found = {}
+
+    def label_for(obj):
+        for key in TITLE_KEYS:
+            val = obj.get(key)
+            if isinstance(val, str) and 3 <= len(val.strip()) <= 200:
+                return re.sub(r"<[^>]+>", " ", val).strip()
+        return ""
+
+    def consider(value, label):
+        value = value.strip()
+        if not value or len(value) > 2000 or not _URLISH.match(value):
+            return
+        url = urljoin(base_url, value)
+        if url.lower().split("?")[0].endswith(_SKIP_EXTENSIONS):
+            return
+        text = re.sub(r"\s+", " ", label or "").strip() or url.rsplit("/", 1)[-1]
+        score = get_link_classifier().score(text.lower(), url.lower())
+        if score is None:
+            return
+        is_pdf = is_pdf_url(url)
+        if not is_pdf and score < MIN_NON_PDF_SCORE:
+            return
+        if is_pdf:
+            score += PDF_SCORE_BOOST
+        current = found.get(url)
+        if current is None or score > current["score"]:
+            found[url] = {"url": url, "text": f"{text} [JSON]", "score": score}
+
+    def walk(node, label, depth):
+        if depth > _MAX_DEPTH:
+            return
+        if isinstance(node, dict):
+            own_label = label_for(node) or label
+            for key, val in node.items():
+                if isinstance(val, str):
+                    if key not in TITLE_KEYS:
+                        consider(val, own_label)
+                    elif "<a " in val:
+                        # Some CMS APIs ship rendered HTML snippets
+                        for href, inner in re.findall(r'href="([^"]+)"[^>]*>(.*?)</a>', val, re.S):
+                            consider(href, re.sub(r"<[^>]+>", " ", inner) or own_label)
+                else:
+                    walk(val, own_label, depth + 1)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, label, depth + 1)
+        elif isinstance(node, str) and "<a " in node:
+            for href, inner in re.findall(r'href="([^"]+)"[^>]*>(.*?)</a>', node, re.S):
+                consider(href, re.sub(r"<[^>]+>", " ", inner) or label)
+
+    walk(data, "", 0)
+    return sorted(found.values(), key=lambda x: x["score"], reverse=True)
+
+
+def parse_json_text(text):
+    """json.loads that tolerates XSSI prefixes like `)]}'`; returns None on failure."""
+    if not text:
+        return None
+    text = text.lstrip()
+    if text.startswith(")]}'"):
+        text = text.split("\n", 1)[-1]
+    try:
+        return json.loads(text)
+    except (ValueError, TypeError):
+        return None
+
+
+class JsonResponseCapture:
+    """
+    Records XHR/fetch JSON responses on a Playwright page.
+
+    The response handler only queues Response objects; bodies are read later
+    in `harvest()` (on the page's own thread) while the page is still open.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.responses = []
+        self.endpoint_hits = {}   # endpoint URL -> number of PDF links it produced
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        if len(self.responses) >= JSON_CAPTURE_MAX_RESPONSES:
+            return
+        try:
+            if response.request.resource_type not in ("xhr", "fetch"):
+                return
+            if "json" not in (response.headers.get("content-type") or "").lower():
+                return
+            if response.status != 200:
+                return
+        except Exception:
+            return
+        self.responses.append(response)
+
+    def harvest(self, base_url):
+        """Read captured bodies and return report links found in them."""
+        links = []
+        pending, self.responses = self.responses, []
+        for response in pending:
+            try:
+                length = int(response.headers.get("content-length") or 0)
+                if length > JSON_CAPTURE_MAX_BYTES:
+                    continue
+                data = parse_json_text(response.text())
+            except Exception:
+                continue
+            if data is None:
+                continue
+            found = extract_links_from_json(data, response.url or base_url)
+            pdf_count = sum(1 for l in found if is_pdf_url(l["url"]))
+            try:
+                replayable = response.request.method == "GET"
+            except Exception:
+                replayable = False
+            if pdf_count and replayable:
+                self.endpoint_hits[response.url] = self.endpoint_hits.get(response.url, 0) + pdf_count
+            links.extend(found)
+        return links
+
+    def detach(self):
+        try:
+            self.page.remove_listener("response", self._on_response)
+        except Exception:
+            pass
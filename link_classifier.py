@@ -0,0 +1,180 @@
+"""
+Precompiled link classifier for ESGScraper.get_report_links.
+
+Hub pages can carry thousands of anchors. Instead of looping over every
+keyword list per anchor, the config lists are compiled once into a few
+regexes, and the DOM lookups used for naming links (preceding header,
+parent context) are memoized per node for the lifetime of one parsed page.
+
+Results are identical to the original per-keyword loops; see
+scripts/bench_link_classifier.py for the comparison and timings.
+"""
+
+import re
+
+from config import REPORT_KEYWORDS, EXCLUDE_KEYWORDS, GENERIC_LINK_TERMS, JUNK_PATTERNS
+
+HEADER_TAGS = frozenset(["h1", "h2", "h3", "h4", "h5", "h6"])
+CONTEXT_TAGS = frozenset(["div", "p", "li", "td", "section", "article"])
+
+
+def has_child_elements(node):
+    """True if the node has element children (not just text/comments)."""
+    child = node.child
+    while child is not None:
+        if child.tag not in ("-text", "-comment"):
+            return True
+        child = child.next
+    return False
+
+
+def _any_of(terms):
+    """Regex matching any of the literal terms (None if there are none)."""
+    terms = [t for t in terms if t]
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(t) for t in sorted(set(terms), key=len, reverse=True)))
+
+
+class LinkClassifier:
+    """Scores anchor text/href against the keyword lists in one pass each."""
+
+    def __init__(self, report_keywords=REPORT_KEYWORDS, exclude_keywords=EXCLUDE_KEYWORDS,
+                 generic_terms=GENERIC_LINK_TERMS, junk_patterns=JUNK_PATTERNS):
+        keywords = sorted({k for k in report_keywords if k}, key=len, reverse=True)
+        # Zero-width lookahead finds the longest keyword starting at every
+        # position, so overlapping keywords are all seen. Shorter keywords
+        # that are prefixes of the match are added via _prefixes.
+        self._report_re = re.compile(
+            "(?=(" + "|".join(re.escape(k) for k in keywords) + "))") if keywords else None
+        self._prefixes = {k: frozenset(p for p in keywords if k.startswith(p)) for k in keywords}
+        self._exclude_re = _any_of(exclude_keywords)
+        self._generic_re = _any_of(generic_terms)
+        self._junk_any = re.compile("|".join(f"(?:{p})" for p in junk_patterns), re.IGNORECASE) if junk_patterns else None
+        self._junk = [re.compile(p, re.IGNORECASE) for p in junk_patterns]
+
+    def is_excluded(self, *texts):
+        """True if any (lowercased) text contains an EXCLUDE keyword."""
+        if self._exclude_re is None:
+            return False
+        return any(t and self._exclude_re.search(t) for t in texts)
+
+    def keyword_score(self, *texts):
+        """Number of distinct REPORT_KEYWORDS found in any of the (lowercased) texts."""
+        if self._report_re is None:
+            return 0
+        found = set()
+        # \x00 never occurs in a keyword, so matches cannot span two texts
+        for m in self._report_re.finditer("\x00".join(t for t in texts if t)):
+            found |= self._prefixes[m.group(1)]
+        return len(found)
+
+    def score(self, text_lower, href_lower):
+        """Keyword score for an anchor, or None if it hits an exclusion."""
+        if self.is_excluded(text_lower, href_lower):
+            return None
+        return self.keyword_score(text_lower, href_lower)
+
+    def is_generic(self, text_lower):
+        """True if the (lowercased) text contains a GENERIC_LINK_TERMS phrase."""
+        return bool(self._generic_re and self._generic_re.search(text_lower))
+
+    def clean_junk(self, text):
+        """Strip JUNK_PATTERNS, skipping the per-pattern passes when none match."""
+        if self._junk_any is None or not self._junk_any.search(text):
+            return text
+        for pattern in self._junk:
+            text = pattern.sub("", text)
+        return text
+
+
+class DomContext:
+    """
+    Memoized DOM lookups for one parsed page (selectolax tree).
+    Nodes are keyed by `mem_id`, so build a new context per tree.
+    """
+
+    def __init__(self):
+        self._sibling_header = {}   # mem_id -> nearest header at or before this sibling
+        self._header = {}           # parent mem_id -> preceding header result
+        self._context = {}          # parent mem_id -> parent context text
+
+    def _nearest_header(self, node):
+        # Header text among `node` and its previous siblings; None if there is none.
+        path = []
+        result = None
+        current = node
+        while current is not None:
+            key = current.mem_id
+            if key in self._sibling_header:
+                result = self._sibling_header[key]
+                break
+            path.append(key)
+            if current.tag in HEADER_TAGS:
+                result = current.text(strip=True)
+                break
+            current = current.prev
+        for key in path:
+            self._sibling_header[key] = result
+        return result
+
+    def preceding_header(self, node, max_depth=5):
+        """
+        Nearest header (h1-h6) before the node, checking previous siblings
+        of up to `max_depth` ancestors. Useful for lists like:
+        <h3>2024 Reports</h3> <ul><li><a...>Report</a></li></ul>
+        """
+        current = node.parent
+        if current is None:
+            return None
+        memo_key = current.mem_id
+        if memo_key in self._header:
+            return self._header[memo_key]
+
+        result = None
+        for _ in range(max_depth):
+            if not current:
+                break
+            prev = current.prev
+            if prev is not None:
+                header = self._nearest_header(prev)
+                if header is not None:
+                    result = header
+                    break
+            current = current.parent
+        self._header[memo_key] = result
+        return result
+
+    def parent_context(self, node, max_levels=2):
+        """Short text (< 200 chars) of the nearest block-level parent, for context."""
+        parent = node.parent
+        if parent is None:
+            return ""
+        memo_key = parent.mem_id
+        if memo_key in self._context:
+            return self._context[memo_key]
+
+        context_text = ""
+        for _ in range(max_levels):
+            if parent and parent.tag in CONTEXT_TAGS:
+                parent_text = parent.text(strip=True)
+                if parent_text and len(parent_text) < 200:  # Don't get huge blocks
+                    context_text = parent_text
+                    break
+            if parent:
+                parent = parent.parent
+            else:
+                break
+        self._context[memo_key] = context_text
+        return context_text
+
+
+_classifier = None
+
+
+def get_link_classifier():
+    """Process-wide classifier compiled from config.py (built on first use)."""
+    global _classifier
+    if _classifier is None:
+        _classifier = LinkClassifier()
+    return _classifier
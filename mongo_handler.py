@@ -150,6 +150,31 @@ class MongoHandler:
         except Exception as e:
             return False, f"Error: {e}"
 
+    # -------------------------------------------------------------------------
+    # SEARCH METRICS
+    # -------------------------------------------------------------------------
+    def save_search_metrics(self, metrics: dict) -> bool:
+        """Record one UI search's timings (time to first report, total, per stage)."""
+        col = self._get_collection("search_metrics")
+        if col is None: return False
+
+        try:
+            col.insert_one({**metrics, 'timestamp': datetime.now()})
+            return True
+        except Exception as e:
+            print(f"Search metrics write error: {e}")
+            return False
+
+    def get_recent_search_metrics(self, limit: int = 50) -> list:
+        """Most recent search metrics, newest first."""
+        col = self._get_collection("search_metrics")
+        if col is None: return []
+
+        try:
+            return list(col.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit))
+        except Exception:
+            return []
+
     # -------------------------------------------------------------------------
     # COMPANY MANAGEMENT (S&P 500)
     # -------------------------------------------------------------------------
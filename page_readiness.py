@@ -0,0 +1,117 @@
+"""
+Adaptive page readiness for Playwright pages.
+
+Replaces fixed `time.sleep()` settles with a wait that returns as soon as the
+page is quiescent: no DOM mutations, no new anchors and no in-flight
+document/XHR/fetch requests for READINESS_QUIET_MS. The wait is always
+bounded by `max_wait_ms`, itself capped at READINESS_MAX_WAIT_MS.
+"""
+
+import time
+
+from config import (
+    READINESS_MAX_WAIT_MS, READINESS_QUIET_MS, READINESS_POLL_MS,
+    READINESS_STALE_REQUEST_MS,
+)
+
+# Resource types that keep connections open by design and never "finish"
+IGNORED_RESOURCE_TYPES = {"websocket", "eventsource", "media", "manifest", "other"}
+
+# Installs a MutationObserver once per document and reports how long the DOM
+# has been quiet and how many anchors it currently contains.
+_PROBE_JS = """() => {
+    if (!window.__esgReadiness) {
+        const state = {lastMutation: performance.now()};
+        window.__esgReadiness = state;
+        new MutationObserver(() => { state.lastMutation = performance.now(); })
+            .observe(document, {childList: true, subtree: true, characterData: true});
+    }
+    return {
+        quietFor: performance.now() - window.__esgReadiness.lastMutation,
+        anchors: document.getElementsByTagName('a').length,
+    };
+}"""
+
+
+def wait_for_ready(page, max_wait_ms=READINESS_MAX_WAIT_MS, quiet_ms=READINESS_QUIET_MS,
+                   poll_ms=READINESS_POLL_MS):
+    """
+    Block until `page` is quiescent or `max_wait_ms` (at most
+    READINESS_MAX_WAIT_MS) elapses.
+
+    Returns a stats dict:
+        {"waited_ms", "reason" ("quiescent"|"timeout"), "anchors",
+         "pending_requests", "polls"}
+    """
+    max_wait_ms = min(max_wait_ms, READINESS_MAX_WAIT_MS)
+    pending = {}
+
+    def on_request(request):
+        try:
+            if request.resource_type in IGNORED_RESOURCE_TYPES:
+                return
+        except Exception:
+            pass
+        pending[request] = time.monotonic()
+
+    def on_done(request):
+        pending.pop(request, None)
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_done)
+    page.on("requestfailed", on_done)
+
+    start = time.monotonic()
+    anchors = -1
+    last_anchor_change = start
+    polls = 0
+    reason = "timeout"
+    active = 0
+
+    try:
+        while True:
+            now = time.monotonic()
+            elapsed_ms = (now - start) * 1000
+            polls += 1
+
+            try:
+                probe = page.evaluate(_PROBE_JS)
+                dom_quiet_ms = probe.get("quietFor", 0)
+                current_anchors = probe.get("anchors", 0)
+            except Exception:
+                # Navigation in progress / context destroyed: treat as activity
+                dom_quiet_ms = 0
+                current_anchors = anchors
+
+            if current_anchors != anchors:
+                anchors = current_anchors
+                last_anchor_change = now
+
+            # Requests hanging around longer than the stale window are long-polls
+            stale_cutoff = now - READINESS_STALE_REQUEST_MS / 1000
+            active = sum(1 for t in pending.values() if t > stale_cutoff)
+
+            anchors_quiet_ms = (now - last_anchor_change) * 1000
+            if dom_quiet_ms >= quiet_ms and anchors_quiet_ms >= quiet_ms and active == 0:
+                reason = "quiescent"
+                break
+            if elapsed_ms >= max_wait_ms:
+                break
+
+            page.wait_for_timeout(min(poll_ms, max(1, max_wait_ms - elapsed_ms)))
+    finally:
+        for event, handler in (("request", on_request),
+                               ("requestfinished", on_done),
+                               ("requestfailed", on_done)):
+            try:
+                page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+    return {
+        "waited_ms": int((time.monotonic() - start) * 1000),
+        "reason": reason,
+        "anchors": max(anchors, 0),
+        "pending_requests": active,
+        "polls": polls,
+    }
@@ -0,0 +1,145 @@
+"""
+Memory-bounded PDF downloads.
+
+verify_pdf_content, the batch scanner's download_and_store_pdf and the ZIP
+exports held whole PDFs in memory (the scanner joined a list of chunks,
+briefly holding two copies), and some sustainability reports are
+100-300 MB. spool_response streams a response body into a SpooledPdf:
+
+- Bodies stay in memory up to PDF_SPOOL_THRESHOLD, then roll over to a
+  named temporary file, so peak memory per download stays flat.
+- The body is capped at PDF_MAX_DOWNLOAD_BYTES (PdfTooLargeError).
+- The sha256 is computed while streaming.
+
+The spool file has a path, so it can go straight to the PDF worker pool,
+the Supabase uploader or ZipFile.write without being read back into memory.
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+
+from config import PDF_SPOOL_THRESHOLD, PDF_MAX_DOWNLOAD_BYTES, PDF_SPOOL_DIR
+
+CHUNK_SIZE = 64 * 1024
+
+
+class PdfTooLargeError(IOError):
+    """The body went past the download size cap."""
+
+
+class SpooledPdf:
+    """A downloaded body, in memory or in a temporary file. Use as a context manager."""
+
+    def __init__(self, threshold=PDF_SPOOL_THRESHOLD, directory=PDF_SPOOL_DIR):
+        self.threshold = threshold
+        self.directory = directory
+        self.size = 0
+        self.path = None              # set once the body rolls over to disk
+        self._buffer = io.BytesIO()
+        self._file = None
+        self._hash = hashlib.sha256()
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        if self._file is None and self.size > self.threshold:
+            self._rollover()
+        (self._file or self._buffer).write(data)
+
+    def _rollover(self):
+        fd, self.path = tempfile.mkstemp(suffix=".pdf", prefix="spool_", dir=self.directory)
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(self._buffer.getbuffer())
+        self._buffer = io.BytesIO()
+
+    def finish(self):
+        """Flush to disk; call once the body is complete."""
+        if self._file is not None:
+            self._file.close()
+        return self
+
+    def peek(self, n=8):
+        """First `n` bytes of the body (magic-number checks)."""
+        if self.path is None:
+            return self._buffer.getbuffer()[:n].tobytes()
+        with open(self.path, "rb") as f:
+            return f.read(n)
+
+    def source(self):
+        """File path if spooled to disk, else the bytes: what pdf_pool and the uploaders take."""
+        return self.path if self.path else self._buffer.getvalue()
+
+    def open(self):
+        """Readable, seekable view of the body: an mmap of the spool file, or an in-memory buffer."""
+        if self.path is None or self.size == 0:
+            return io.BytesIO(self._buffer.getbuffer())
+        with open(self.path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def save_as(self, dest):
+        """Write the body to `dest`; a spool file is moved there, not copied."""
+        if self.path:
+            self._file.close()
+            shutil.move(self.path, dest)
+            self.path = None
+        else:
+            with open(dest, "wb") as f:
+                f.write(self._buffer.getbuffer())
+
+    def add_to_zip(self, zip_file, arcname):
+        """Add the body to an open ZipFile (streamed from the spool file when on disk)."""
+        if self.path:
+            zip_file.write(self.path, arcname)
+        else:
+            zip_file.writestr(arcname, self._buffer.getvalue())
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+        self._buffer = io.BytesIO()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def spool_response(response, max_bytes=PDF_MAX_DOWNLOAD_BYTES, threshold=PDF_SPOOL_THRESHOLD, prefix=b""):
+    """
+    Stream a requests response (fetched with stream=True) into a SpooledPdf.
+    `prefix` is body bytes the caller already read from response.raw.
+    Raises PdfTooLargeError past `max_bytes`; the response is left for the caller to close.
+    """
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise PdfTooLargeError(f"{int(length)} bytes declared, cap is {max_bytes}")
+    spool = SpooledPdf(threshold=threshold)
+    try:
+        if prefix:
+            spool.write(prefix)
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if not chunk:
+                continue
+            if spool.size + len(chunk) > max_bytes:
+                raise PdfTooLargeError(f"body passed the {max_bytes} byte cap")
+            spool.write(chunk)
+        return spool.finish()
+    except BaseException:
+        spool.close()
+        raise
@@ -0,0 +1,161 @@
+"""
+Bounded process pool for PDF parsing and text extraction.
+
+pypdf is pure Python, so extract_text() on the first pages of several big
+reports (verify_pdf_content runs three at a time, the batch scanner up to
+ASYNC_PDF_SLOTS) was serialized by the GIL and stalled the UI search.
+Parsing now runs in PDF_PARSE_WORKERS worker processes. Callers hand over
+bytes or a file path and get back plain data:
+
+    {"pages": 84, "title": "2024 Sustainability Report", "text": ["...", "...", "..."]}
+
+Each document gets PDF_PARSE_TIMEOUT_S. A worker stuck on a pathological
+PDF can't be cancelled, so on a timeout the pool is torn down (its
+processes killed) and rebuilt; documents that were queued behind it are
+resubmitted once. If worker processes can't be started, parsing falls back
+to the calling thread.
+"""
+
+import concurrent.futures
+import io
+import mmap
+import multiprocessing
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+from config import PDF_PARSE_WORKERS, PDF_PARSE_TIMEOUT_S, PDF_PARSE_IN_PROCESS
+
+
+class PdfParseError(Exception):
+    """The PDF couldn't be parsed (unreadable, or it ran past the timeout)."""
+
+
+class PdfParseTimeout(PdfParseError):
+    """Parsing ran past PDF_PARSE_TIMEOUT_S; the worker was killed."""
+
+
+def read_pdf_text(source, max_pages=3):
+    """
+    Parse a PDF and extract the text of its first `max_pages` pages (None = all).
+    `source` is bytes, a file path or a seekable file object. Runs in the
+    worker processes, and in-thread for file objects that can't be pickled.
+    """
+    import pypdf
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif isinstance(source, str):
+        # Spool and store files are mapped, not read into memory
+        try:
+            with open(source, "rb") as f:
+                source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise PdfParseError(f"{type(e).__name__}: {e}") from None
+    try:
+        reader = pypdf.PdfReader(source)
+        page_count = len(reader.pages)
+    except Exception as e:
+        raise PdfParseError(f"{type(e).__name__}: {e}") from None
+
+    title = None
+    try:
+        if reader.metadata and reader.metadata.title:
+            title = str(reader.metadata.title).strip()
+    except Exception:
+        pass
+
+    text = []
+    for i in range(page_count if max_pages is None else min(max_pages, page_count)):
+        try:
+            text.append(reader.pages[i].extract_text() or "")
+        except Exception:
+            text.append("")
+    return {"pages": page_count, "title": title, "text": text}
+
+
+class PdfParsePool:
+    """ProcessPoolExecutor wrapper with per-document timeouts and pool recycling."""
+
+    def __init__(self, workers=PDF_PARSE_WORKERS, timeout=PDF_PARSE_TIMEOUT_S, in_process=PDF_PARSE_IN_PROCESS):
+        self.workers = workers
+        self.timeout = timeout
+        self.in_process = in_process
+        self._executor = None
+        self._lock = threading.Lock()
+        # At most one document per worker in flight, so the timeout clock doesn't include queueing
+        self._slots = threading.BoundedSemaphore(workers)
+        self.stats = {"parsed": 0, "timeouts": 0, "restarts": 0, "in_thread": 0}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None and self.in_process:
+                try:
+                    # spawn, not fork: the parent is multi-threaded (Streamlit, crawl pools)
+                    self._executor = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+                except (OSError, NotImplementedError, ValueError) as e:
+                    print(f"[PdfPool] Worker processes unavailable ({e}), parsing in-thread")
+                    self.in_process = False
+            return self._executor
+
+    def _recycle(self, broken):
+        """Kill a pool whose worker is stuck; the next call starts a fresh one."""
+        with self._lock:
+            if self._executor is not broken:
+                return                       # another thread already replaced it
+            self._executor = None
+            self.stats["restarts"] += 1
+        for proc in list((getattr(broken, "_processes", None) or {}).values()):
+            try:
+                proc.kill()
+            except Exception:
+                pass
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def parse(self, source, max_pages=3, timeout=None):
+        """
+        read_pdf_text in a worker process. `source` is bytes or a file path
+        (file objects are parsed in the calling thread). Raises PdfParseError.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if hasattr(source, "read"):
+            self.stats["in_thread"] += 1
+            return read_pdf_text(source, max_pages)
+        if isinstance(source, memoryview):
+            source = source.tobytes()
+
+        for attempt in range(2):
+            executor = self._get_executor()
+            if executor is None:
+                self.stats["in_thread"] += 1
+                return read_pdf_text(source, max_pages)
+            try:
+                with self._slots:
+                    future = executor.submit(read_pdf_text, source, max_pages)
+                    result = future.result(timeout=timeout)
+                self.stats["parsed"] += 1
+                return result
+            except concurrent.futures.TimeoutError:
+                self.stats["timeouts"] += 1
+                print(f"[PdfPool] Parse timed out after {timeout}s, restarting workers")
+                self._recycle(executor)
+                raise PdfParseTimeout(f"parse exceeded {timeout}s") from None
+            except (BrokenProcessPool, concurrent.futures.CancelledError, RuntimeError):
+                # Pool was recycled under us (another document timed out): retry once
+                self._recycle(executor)
+                if attempt:
+                    raise PdfParseError("worker pool broken") from None
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = PdfParsePool()
+
+
+def get_pdf_pool():
+    """Process-wide PDF parse pool (workers start on first use)."""
+    return _pool
@@ -0,0 +1,94 @@
+"""
+Extracted-text sidecars: each PDF is parsed once, its text reused everywhere.
+
+pypdf parsed the same report again for verification, for titles from the
+metadata, for the RAG index (build_vector_db.py) and for extraction. A
+sidecar holds everything those stages read:
+
+    {"version": 1, "sha256": "...", "pages": 84, "title": "...",
+     "year": "2024", "text": ["page 1 text", "page 2 text", ...]}
+
+It is stored gzip-compressed JSON, keyed by the PDF's content hash:
+locally next to the file in the PDF store (pdf_store.py), and by the batch
+scanner next to the Supabase object (`<object path>.text.json.gz`), where
+extract_metrics picks it up. `ensure_sidecar` loads a sidecar or builds
+it in the PDF worker pool (PDF_SIDECAR_TIMEOUT_S).
+"""
+
+import gzip
+import json
+import os
+
+from config import PDF_SIDECAR_TIMEOUT_S
+from pdf_pool import get_pdf_pool, PdfParseError
+from pdf_store import get_pdf_store, sha256_file
+from utils import extract_year
+
+SIDECAR_VERSION = 1
+SIDECAR_SUFFIX = ".text.json.gz"      # also used for the copy next to the Supabase object
+
+
+def build_sidecar(parsed, sha256):
+    """Sidecar dict from a full pdf_pool.read_pdf_text result."""
+    year = extract_year(parsed["title"] or "")
+    for page in parsed["text"][:3]:
+        year = year or extract_year(page)
+    return {"version": SIDECAR_VERSION, "sha256": sha256, "pages": parsed["pages"],
+            "title": parsed["title"], "year": year, "text": parsed["text"]}
+
+
+def encode_sidecar(sidecar):
+    return gzip.compress(json.dumps(sidecar, ensure_ascii=False).encode("utf-8"))
+
+
+def decode_sidecar(data):
+    """Sidecar dict from its stored bytes, or None if they're unusable or outdated."""
+    try:
+        sidecar = json.loads(gzip.decompress(data).decode("utf-8"))
+    except (OSError, EOFError, ValueError):
+        return None
+    return sidecar if sidecar.get("version") == SIDECAR_VERSION else None
+
+
+def load_sidecar(sha256, store=None):
+    """Local sidecar for a content hash, or None."""
+    store = store or get_pdf_store()
+    try:
+        with open(store.sidecar_path(sha256), "rb") as f:
+            return decode_sidecar(f.read())
+    except OSError:
+        return None
+
+
+def save_sidecar(sidecar, store=None):
+    store = store or get_pdf_store()
+    path = store.sidecar_path(sidecar["sha256"])
+    tmp = f"{path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(encode_sidecar(sidecar))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[Sidecar] Could not save {sidecar['sha256'][:12]}: {e}")
+        return None
+    return path
+
+
+def ensure_sidecar(pdf_path, sha256=None, store=None, timeout=PDF_SIDECAR_TIMEOUT_S):
+    """
+    The sidecar for a local PDF: loaded if it exists, else extracted (all
+    pages, in the worker pool) and saved. None if the PDF can't be parsed.
+    """
+    sha256 = sha256 or sha256_file(pdf_path)
+    sidecar = load_sidecar(sha256, store)
+    if sidecar:
+        return sidecar
+    try:
+        parsed = get_pdf_pool().parse(pdf_path, max_pages=None, timeout=timeout)
+    except PdfParseError as e:
+        print(f"[Sidecar] Could not extract text from {os.path.basename(pdf_path)}: {e}")
+        return None
+    sidecar = build_sidecar(parsed, sha256)
+    save_sidecar(sidecar, store)
+    return sidecar
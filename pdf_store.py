@@ -0,0 +1,214 @@
+"""
+Content-addressed local store of report PDFs, shared by every pipeline.
+
+The same report was downloaded separately by verify_pdf_content, the batch
+scanner, extract_metrics (from Supabase), ingest_reports and both ZIP
+exports. PDFs are stored here once, named by the sha256 of their bytes,
+with an index from URL (normalized, see verify_cache.normalize_url) to
+hash. Consumers call `path(url)` before touching the network and `put()`
+after a download. A URL is trusted for PDF_STORE_URL_TTL_S (one scan
+cycle); after that it is downloaded again, and if the bytes are the same
+the existing file is kept. Files are evicted least recently used past
+PDF_STORE_MAX_BYTES.
+
+Layout: PDF_STORE_DIR/index.json + blobs/<ab>/<sha256>.pdf, with the
+PDF's text sidecar (pdf_sidecar.py) alongside as <sha256>.text.json.gz.
+Open stored PDFs with `open_mmap()` rather than reading them into memory.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from config import PDF_STORE_DIR, PDF_STORE_MAX_BYTES, PDF_STORE_URL_TTL_S
+from verify_cache import normalize_url
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def open_mmap(path):
+    """Read-only mmap of a stored PDF (what pypdf and the uploaders get)."""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class PdfStore:
+    """Thread-safe, size-bounded LRU store of PDFs keyed by content hash."""
+
+    def __init__(self, directory=PDF_STORE_DIR, max_bytes=PDF_STORE_MAX_BYTES, url_ttl_s=PDF_STORE_URL_TTL_S):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.url_ttl_s = url_ttl_s
+        self._lock = threading.Lock()
+        self._urls, self._blobs = self._load()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "deduplicated": 0, "evicted": 0}
+
+    # --- persistence ---
+
+    def _index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def blob_path(self, sha256):
+        return os.path.join(self.directory, "blobs", sha256[:2], f"{sha256}.pdf")
+
+    def sidecar_path(self, sha256):
+        """Extracted-text sidecar kept next to a PDF (pdf_sidecar.py)."""
+        return os.path.join(self.directory, "blobs", sha256[:2], f"{sha256}.text.json.gz")
+
+    def _load(self):
+        try:
+            with open(self._index_path(), "r") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}, {}
+        # Drop blobs whose file went missing, and URLs pointing at them
+        blobs = {h: b for h, b in index.get("blobs", {}).items() if os.path.exists(self.blob_path(h))}
+        urls = {u: e for u, e in index.get("urls", {}).items() if e["sha256"] in blobs}
+        return urls, blobs
+
+    def _save(self):
+        tmp = f"{self._index_path()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"urls": self._urls, "blobs": self._blobs}, f)
+            os.replace(tmp, self._index_path())
+        except OSError as e:
+            print(f"[PdfStore] Could not persist store index: {e}")
+
+    # --- lookups ---
+
+    def lookup(self, url):
+        """{"sha256", "stored_at", "validator"} for a URL still within its TTL, else None."""
+        with self._lock:
+            entry = self._urls.get(normalize_url(url))
+            if entry and time.time() - entry["stored_at"] < self.url_ttl_s:
+                return dict(entry)
+        return None
+
+    def path(self, url=None, sha256=None):
+        """Local file for a URL (fresh mapping only) or a known hash, or None."""
+        if sha256 is None:
+            entry = self.lookup(url) if url else None
+            sha256 = entry["sha256"] if entry else None
+        with self._lock:
+            blob = self._blobs.get(sha256) if sha256 else None
+            if blob is None:
+                self._stats["misses"] += 1
+                return None
+            path = self.blob_path(sha256)
+            if not os.path.exists(path):
+                self._blobs.pop(sha256, None)
+                self._stats["misses"] += 1
+                return None
+            blob["last_used"] = time.time()
+            self._stats["hits"] += 1
+            return path
+
+    # --- writes ---
+
+    def put(self, url, pdf, validator=None):
+        """
+        Store a downloaded PDF (a pdf_download.SpooledPdf) for `url`.
+        Returns the stored file's path, or None if it couldn't be written.
+        """
+        return self._put(url, pdf.sha256, pdf.size, pdf.save_as, validator)
+
+    def put_file(self, url, path, validator=None):
+        """Store a PDF already on disk (copied, the original is left alone)."""
+        return self._put(url, sha256_file(path), os.path.getsize(path),
+                         lambda dest: shutil.copyfile(path, dest), validator)
+
+    def put_bytes(self, url, data, validator=None):
+        def write(dest):
+            with open(dest, "wb") as f:
+                f.write(data)
+        return self._put(url, hashlib.sha256(data).hexdigest(), len(data), write, validator)
+
+    def alias(self, url, sha256):
+        """Point another URL (e.g. the Supabase copy) at a stored PDF."""
+        with self._lock:
+            if sha256 in self._blobs:
+                self._urls[normalize_url(url)] = {"sha256": sha256, "stored_at": time.time(), "validator": None}
+                self._save()
+
+    def _put(self, url, sha256, size, write, validator):
+        dest = self.blob_path(sha256)
+        with self._lock:
+            known = sha256 in self._blobs and os.path.exists(dest)
+        if not known:
+            tmp = None
+            try:
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                # A temp file per writer: concurrent puts of the same PDF can't clobber each other
+                fd, tmp = tempfile.mkstemp(suffix=".tmp", prefix=f"{sha256[:12]}_", dir=os.path.dirname(dest))
+                os.close(fd)
+                write(tmp)
+                os.replace(tmp, dest)
+            except OSError as e:
+                print(f"[PdfStore] Could not store {url[:80]}: {e}")
+                if tmp:
+                    try:
+                        os.remove(tmp)
+                    except OSError:
+                        pass
+                return None
+        now = time.time()
+        with self._lock:
+            self._stats["deduplicated" if sha256 in self._blobs else "stored"] += 1
+            self._blobs[sha256] = {"size": size, "last_used": now}
+            self._urls[normalize_url(url)] = {"sha256": sha256, "stored_at": now, "validator": validator}
+            self._evict(keep=sha256)
+            self._save()
+        return dest
+
+    def _evict(self, keep=None):
+        total = sum(b["size"] for b in self._blobs.values())
+        if total <= self.max_bytes:
+            return
+        for sha256, blob in sorted(self._blobs.items(), key=lambda kv: kv[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            for path in (self.blob_path(sha256), self.sidecar_path(sha256)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= blob["size"]
+            del self._blobs[sha256]
+            self._stats["evicted"] += 1
+        self._urls = {u: e for u, e in self._urls.items() if e["sha256"] in self._blobs}
+
+    def stats(self):
+        """Counters since start plus current size on disk."""
+        with self._lock:
+            out = dict(self._stats)
+            out["files"] = len(self._blobs)
+            out["urls"] = len(self._urls)
+            out["bytes"] = sum(b["size"] for b in self._blobs.values())
+        return out
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_pdf_store():
+    """Process-wide PDF store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PdfStore()
+        return _store
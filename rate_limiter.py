@@ -0,0 +1,146 @@
+"""
+Per-host token-bucket rate limiting shared by every thread.
+
+robust_get calls `acquire(url)` before each request and reports throttling
+responses back with `penalize(...)`. A 429/503 halves that host's rate and
+pauses the host for the `Retry-After` the server sent (or an exponential
+backoff). Successful responses slowly restore the rate. Because the state is
+per host and shared, concurrent workers back off together instead of each
+hammering the host with its own blind sleep, and callers no longer need
+fixed `time.sleep()` pacing between requests.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from config import (
+    RATE_LIMIT_DEFAULT_RPS, RATE_LIMIT_BURST, RATE_LIMIT_MIN_RPS, RATE_LIMIT_HOST_RPS,
+    RATE_LIMIT_DECREASE, RATE_LIMIT_RECOVERY_RPS, RATE_LIMIT_MAX_PAUSE_S, RETRY_BACKOFF_S,
+)
+from fetch_strategy import domain_key
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date); None if absent/invalid."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class _Bucket:
+    __slots__ = ("rate", "base_rate", "tokens", "updated", "paused_until", "throttled", "waited_s")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.base_rate = rate
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.waited_s = 0.0
+
+
+class HostRateLimiter:
+    """Token bucket per host with adaptive rates and Retry-After pauses."""
+
+    def __init__(self, default_rps=RATE_LIMIT_DEFAULT_RPS, burst=RATE_LIMIT_BURST,
+                 min_rps=RATE_LIMIT_MIN_RPS, host_rps=None):
+        self.default_rps = default_rps
+        self.burst = burst
+        self.min_rps = min_rps
+        self.host_rps = dict(RATE_LIMIT_HOST_RPS if host_rps is None else host_rps)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url_or_host):
+        return domain_key(url_or_host) if "//" in url_or_host else url_or_host.lower()
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = _Bucket(self.host_rps.get(host, self.default_rps), self.burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    def reserve(self, url_or_host):
+        """Take a token for the host; returns how long the caller must wait first."""
+        host = self._host(url_or_host)
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            # Tokens may go negative: later callers queue up behind earlier ones
+            bucket.tokens -= 1
+            wait = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0
+            wait = max(wait, bucket.paused_until - now)
+            bucket.waited_s += wait
+            return wait
+
+    def acquire(self, url_or_host):
+        """Block until a request to this host is allowed. Returns seconds waited."""
+        wait = self.reserve(url_or_host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, url_or_host, status=None, retry_after=None, attempt=0):
+        """
+        Record a throttling/blocked response (or connection error) and pause
+        the host. 429/503 also lower the host's rate. Returns the pause in seconds.
+        """
+        host = self._host(url_or_host)
+        server_wait = parse_retry_after(retry_after)
+        pause = server_wait if server_wait is not None else RETRY_BACKOFF_S * (2 ** attempt)
+        pause = min(pause, RATE_LIMIT_MAX_PAUSE_S)
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            if status in (429, 503):
+                bucket.rate = max(self.min_rps, bucket.rate * RATE_LIMIT_DECREASE)
+                bucket.throttled += 1
+            bucket.tokens = min(bucket.tokens, 0.0)
+            bucket.updated = now
+            bucket.paused_until = max(bucket.paused_until, now + pause)
+        return pause
+
+    def record_success(self, url_or_host):
+        """Additive recovery toward the host's configured rate after a good response."""
+        host = self._host(url_or_host)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is not None and bucket.rate < bucket.base_rate:
+                bucket.rate = min(bucket.base_rate, bucket.rate + RATE_LIMIT_RECOVERY_RPS)
+
+    def stats(self):
+        """{host: {"rate", "throttled", "waited_s"}} for hosts seen so far."""
+        with self._lock:
+            return {
+                host: {"rate": round(b.rate, 3), "throttled": b.throttled, "waited_s": round(b.waited_s, 2)}
+                for host, b in self._buckets.items()
+            }
+
+
+_limiter = HostRateLimiter()
+
+
+def get_rate_limiter():
+    """Process-wide limiter shared by robust_get and the scripts."""
+    return _limiter
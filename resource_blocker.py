@@ -0,0 +1,94 @@
+"""
+Route-interception mode for Playwright contexts.
+
+Link discovery only needs the DOM, so when enabled we abort images, fonts,
+media and requests to analytics / chat-widget domains before they are sent.
+Aborted requests never transfer a body, so the bytes figure is an estimate
+from BLOCKED_RESOURCE_EST_BYTES rather than a measurement.
+"""
+
+import threading
+from urllib.parse import urlparse
+
+from config import (
+    BLOCKED_RESOURCE_TYPES, BLOCKED_REQUEST_DOMAINS, BLOCKED_RESOURCE_EST_BYTES,
+)
+
+
+def _empty_stats():
+    return {"blocked_requests": 0, "blocked_bytes_est": 0, "by_type": {}, "by_domain": {}}
+
+
+class ResourceBlocker:
+    """Aborts requests by resource type or domain denylist and counts what it blocked."""
+
+    def __init__(self, resource_types=None, domains=None):
+        self.resource_types = set(resource_types if resource_types is not None else BLOCKED_RESOURCE_TYPES)
+        self.domains = tuple(d.lower() for d in (domains if domains is not None else BLOCKED_REQUEST_DOMAINS))
+        self.stats = _empty_stats()
+        self._page_stats = {}
+        self._lock = threading.Lock()
+
+    def attach(self, target):
+        """Install on a BrowserContext (or a single Page)."""
+        target.route("**/*", self._handle)
+        return self
+
+    def _blocked_domain(self, url):
+        try:
+            host = urlparse(url).netloc.lower().split(":")[0]
+        except Exception:
+            return None
+        for d in self.domains:
+            if host == d or host.endswith("." + d):
+                return d
+        return None
+
+    def should_block(self, resource_type, url):
+        """Return the reason ('type:<t>' / 'domain:<d>') a request would be blocked, else None."""
+        if resource_type in self.resource_types:
+            return f"type:{resource_type}"
+        domain = self._blocked_domain(url)
+        if domain:
+            return f"domain:{domain}"
+        return None
+
+    def _handle(self, route, request):
+        try:
+            resource_type = request.resource_type
+            reason = self.should_block(resource_type, request.url)
+        except Exception:
+            reason = None
+        if not reason:
+            route.continue_()
+            return
+        route.abort("blockedbyclient")
+        try:
+            page = request.frame.page
+        except Exception:
+            page = None
+        self._record(page, resource_type, reason)
+
+    def _record(self, page, resource_type, reason):
+        est = BLOCKED_RESOURCE_EST_BYTES.get(resource_type, BLOCKED_RESOURCE_EST_BYTES.get("other", 0))
+        with self._lock:
+            targets = [self.stats]
+            if page is not None:
+                targets.append(self._page_stats.setdefault(id(page), _empty_stats()))
+            for s in targets:
+                s["blocked_requests"] += 1
+                s["blocked_bytes_est"] += est
+                s["by_type"][resource_type] = s["by_type"].get(resource_type, 0) + 1
+                if reason.startswith("domain:"):
+                    d = reason.split(":", 1)[1]
+                    s["by_domain"][d] = s["by_domain"].get(d, 0) + 1
+
+    def page_stats(self, page):
+        """Blocking stats for one page (empty if nothing was blocked)."""
+        with self._lock:
+            s = self._page_stats.get(id(page))
+            return {**s, "by_type": dict(s["by_type"]), "by_domain": dict(s["by_domain"])} if s else _empty_stats()
+
+    def forget(self, page):
+        with self._lock:
+            self._page_stats.pop(id(page), None)
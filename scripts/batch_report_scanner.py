@@ -12,11 +12,11 @@ Usage:
 
 import os
 import sys
-import time
 import argparse
+import asyncio
 import hashlib
 from datetime import datetime, timedelta
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse
 
 import certifi
 from pymongo import MongoClient
@@ -24,6 +24,16 @@ from supabase import create_client
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils import robust_get, is_report_link, extract_year
+from async_fetch import AsyncFetcher, find_pdfs_on_page
+from http_session import session_stats
+from http_cache import cache_stats
+from rate_limiter import get_rate_limiter
+from tls_policy import get_tls_policy
+from pdf_download import spool_response, PdfTooLargeError
+from pdf_pool import get_pdf_pool
+from pdf_sidecar import ensure_sidecar, encode_sidecar, SIDECAR_SUFFIX
+from pdf_store import get_pdf_store
+from verify_cache import get_verification_cache, validator_for, POSITIVE_OUTCOMES
 
 SCAN_INTERVAL_DAYS = 30
 
@@ -165,6 +175,8 @@ def search_reports_ddg(company_name, symbol):
 
     with DDGS() as ddgs:
         for query in queries:
+            # Paced per host by the shared limiter (RATE_LIMIT_HOST_RPS)
+            get_rate_limiter().acquire("duckduckgo.com")
             try:
                 results = list(ddgs.text(query, max_results=5, region="us-en"))
                 for r in results:
@@ -178,65 +190,124 @@ def search_reports_ddg(company_name, symbol):
                         })
             except Exception as e:
                 print(f"  Search error for '{query}': {e}")
-            time.sleep(1)
 
     return found
 
 
 def download_and_store_pdf(url, company_symbol, company_name, title, supabase_client, bucket_name):
-    """Download a PDF and store it in Supabase Storage. Returns (public_url, file_size) or (None, None)."""
+    """
+    Download a PDF and store it in Supabase Storage.
+    Returns {"storage_url", "file_size", "sha256", "pages", "text_url", "detected_year"} or None.
+    The body is streamed to a spool file (pdf_download.py), never held whole in memory,
+    and kept in the local PDF store (pdf_store.py) for the other pipelines.
+    """
+    cache = get_verification_cache()
+    store = get_pdf_store()
     try:
-        resp = robust_get(url, timeout=30, stream=True)
-        if resp.status_code != 200:
-            return None, None
-
-        content_type = resp.headers.get("Content-Type", "").lower()
-        if "pdf" not in content_type and "octet-stream" not in content_type:
-            resp.close()
-            return None, None
-
-        content_length = resp.headers.get("Content-Length")
-        if content_length and int(content_length) < 50_000:
-            resp.close()
-            return None, None
-
-        chunks = []
-        for chunk in resp.iter_content(chunk_size=8192):
-            chunks.append(chunk)
-        pdf_data = b"".join(chunks)
-
-        file_size = len(pdf_data)
-        if file_size < 50_000:
-            return None, None
-
-        # Build a descriptive filename: SYMBOL_report-type[_year]_hash.pdf
-        report_type = classify_report_type(title, url)
-        year = extract_year(f"{title} {url}")
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:6]
-        parts = [company_symbol, report_type]
-        if year:
-            parts.append(year)
-        parts.append(url_hash)
-        filename = "_".join(parts) + ".pdf"
-        storage_path = f"{company_symbol}/{filename}"
-
-        supabase_client.storage.from_(bucket_name).upload(
-            storage_path,
-            pdf_data,
-            file_options={"content-type": "application/pdf", "x-upsert": "true"},
-        )
+        # Already downloaded (UI search, earlier cycle): upload the local copy
+        entry = store.lookup(url)
+        stored = store.path(sha256=entry["sha256"]) if entry else None
+        if stored:
+            print(f"    Using local copy: {url[:80]}")
+            return _store_pdf(stored, entry["sha256"], url, company_symbol, title, supabase_client, bucket_name)
 
-        # Get public URL
-        public_url = supabase_client.storage.from_(bucket_name).get_public_url(storage_path)
+        try:
+            resp = robust_get(url, timeout=30, stream=True, use_cache=False)
+        except Exception as e:
+            cache.put(url, company_name, "fetch_error", reason=type(e).__name__)
+            raise
+        # Closing hands the keep-alive connection back to the shared pool
+        with resp:
+            validator = validator_for(resp.headers)
+            if resp.status_code != 200:
+                outcome = "not_found" if resp.status_code in (404, 410) else "http_error"
+                cache.put(url, company_name, outcome, reason=f"HTTP {resp.status_code}", validator=validator)
+                return None
+
+            content_type = resp.headers.get("Content-Type", "").lower()
+            if "pdf" not in content_type and "octet-stream" not in content_type:
+                cache.put(url, company_name, "not_pdf", reason=content_type or "no content type", validator=validator)
+                return None
+
+            content_length = resp.headers.get("Content-Length")
+            if content_length and int(content_length) < 50_000:
+                cache.put(url, company_name, "too_small", reason=f"{content_length} bytes", validator=validator)
+                return None
 
-        print(f"    Stored in Supabase: {storage_path} ({file_size / 1024:.0f} KB)")
-        return public_url, file_size
+            try:
+                pdf = spool_response(resp)
+            except PdfTooLargeError as e:
+                cache.put(url, company_name, "too_large", reason=str(e), validator=validator)
+                print(f"    Skipping oversized PDF: {e}")
+                return None
+
+        with pdf:
+            if pdf.size < 50_000:
+                return None
+            path = store.put(url, pdf, validator)
+            if path is None:
+                return None
+        return _store_pdf(path, pdf.sha256, url, company_symbol, title, supabase_client, bucket_name)
 
     except Exception as e:
         import traceback
         print(f"    Download/store failed: {e}")
         traceback.print_exc()
-        return None, None
+        return None
+
+
+def _store_pdf(path, sha256, url, company_symbol, title, supabase_client, bucket_name):
+    """
+    Upload a PDF from the local store to Supabase Storage, with its text
+    sidecar (pdf_sidecar.py) next to it. Returns download_and_store_pdf's dict.
+    """
+    file_size = os.path.getsize(path)
+    if file_size < 50_000:
+        return None
+
+    # Build a descriptive filename: SYMBOL_report-type[_year]_hash.pdf
+    report_type = classify_report_type(title, url)
+    year = extract_year(f"{title} {url}")
+    url_hash = hashlib.md5(url.encode()).hexdigest()[:6]
+    parts = [company_symbol, report_type]
+    if year:
+        parts.append(year)
+    parts.append(url_hash)
+    filename = "_".join(parts) + ".pdf"
+    storage_path = f"{company_symbol}/{filename}"
+
+    bucket = supabase_client.storage.from_(bucket_name)
+    bucket.upload(
+        storage_path,
+        path,
+        file_options={"content-type": "application/pdf", "x-upsert": "true"},
+    )
+
+    # Get public URL
+    public_url = bucket.get_public_url(storage_path)
+
+    # extract_metrics looks PDFs up by their Supabase URL
+    get_pdf_store().alias(public_url, sha256)
+
+    print(f"    Stored in Supabase: {storage_path} ({file_size / 1024:.0f} KB)")
+    stored = {"storage_url": public_url, "file_size": file_size, "sha256": sha256,
+              "pages": None, "text_url": None, "detected_year": None}
+
+    # Extract the text once; later stages read the sidecar instead of the PDF
+    sidecar = ensure_sidecar(path, sha256)
+    if sidecar:
+        text_path = storage_path + SIDECAR_SUFFIX
+        try:
+            bucket.upload(
+                text_path,
+                encode_sidecar(sidecar),
+                file_options={"content-type": "application/gzip", "x-upsert": "true"},
+            )
+            stored["text_url"] = bucket.get_public_url(text_path)
+        except Exception as e:
+            print(f"    Text sidecar upload failed: {e}")
+        stored.update(pages=sidecar["pages"], detected_year=sidecar["year"])
+    return stored
 
 
 def _is_direct_pdf(url):
@@ -245,52 +316,17 @@ def _is_direct_pdf(url):
     return u.endswith(".pdf")
 
 
-def find_pdfs_on_page(page_url, company_name):
-    """Fetch a landing/hub page and return direct PDF links found on it.
+async def follow_landing_pages(landing_pages, company_name):
+    """Fetch landing/hub pages concurrently and return their direct PDF links.
 
     Big companies host their ESG report behind a landing page rather than
-    linking the PDF directly. This follows that page one level deep and
+    linking the PDF directly. This follows each page one level deep and
     pulls out the actual report PDFs.
-    Returns a list of {title, url} dicts.
+    Returns a list of (landing_page, [{title, url}, ...]) pairs.
     """
-    found = []
-    try:
-        resp = robust_get(page_url, timeout=12)
-        if resp.status_code != 200 or "html" not in resp.headers.get("Content-Type", "").lower():
-            return found
-
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(resp.text, "html.parser")
-        parsed = urlparse(page_url)
-        base = f"{parsed.scheme}://{parsed.netloc}"
-
-        seen = set()
-        for link in soup.find_all("a", href=True):
-            href = link["href"].strip()
-            text = link.get_text(strip=True)
-
-            # Resolve relative URLs
-            if href.startswith("//"):
-                href = f"{parsed.scheme}:{href}"
-            elif href.startswith("/"):
-                href = base + href
-            elif not href.startswith("http"):
-                # relative to current path
-                href = urljoin(page_url, href)
-
-            if not _is_direct_pdf(href) or href in seen:
-                continue
-            seen.add(href)
-
-            # Keep only links that look like a report (by anchor text or URL)
-            if is_report_link(text or href, href):
-                found.append({"title": text or f"{company_name} ESG Report", "url": href})
-
-        # Cap per page to avoid grabbing dozens of ancillary PDFs
-        return found[:5]
-    except Exception as e:
-        print(f"      Landing-page scan error ({page_url[:60]}): {e}")
-        return found
+    async with AsyncFetcher() as fetcher:
+        found = await asyncio.gather(*(find_pdfs_on_page(fetcher, lp["url"], company_name) for lp in landing_pages))
+    return list(zip(landing_pages, found))
 
 
 def scan_company(company, supabase_client, bucket_name):
@@ -351,8 +387,8 @@ def scan_company(company, supabase_client, bucket_name):
     # Strategy 3: Follow landing pages to find embedded PDFs
     if landing_pages:
         print(f"  Strategy 3: Following {min(len(landing_pages), 5)} landing page(s) for embedded PDFs...")
-        for lp in landing_pages[:5]:
-            for pdf in find_pdfs_on_page(lp["url"], name):
+        for lp, pdfs in asyncio.run(follow_landing_pages(landing_pages[:5], name)):
+            for pdf in pdfs:
                 if pdf["url"] not in seen_pdf_urls:
                     seen_pdf_urls.add(pdf["url"])
                     direct_pdfs.append({
@@ -360,24 +396,33 @@ def scan_company(company, supabase_client, bucket_name):
                         "url": pdf["url"],
                         "snippet": f"Found on landing page: {lp['url'][:80]}",
                     })
-            time.sleep(0.5)
         print(f"  PDF candidates after following pages: {len(direct_pdfs)}")
 
     # Download all direct-PDF candidates and store in Supabase
+    cache = get_verification_cache()
     for result in direct_pdfs:
-        public_url, file_size = download_and_store_pdf(
+        # Skip URLs already known to be dead, not PDFs, or another company's report
+        entry, fresh = cache.lookup(result["url"], name)
+        if fresh and entry["outcome"] not in POSITIVE_OUTCOMES:
+            print(f"    Skipping ({entry['outcome']}, cached): {result['url'][:80]}")
+            continue
+        stored = download_and_store_pdf(
             result["url"], symbol, name, result["title"], supabase_client, bucket_name,
-        )
+        ) or {}
         reports.append({
             "title": result["title"],
             "url": result["url"],
             "snippet": result.get("snippet", ""),
             "type": "pdf",
             "report_type": classify_report_type(result["title"], result["url"]),
-            "report_year": extract_year(f"{result['title']} {result['url']}"),
-            "downloaded": public_url is not None,
-            "storage_url": public_url,
-            "file_size": file_size,
+            # Year from the link, else the one found in the PDF's text
+            "report_year": extract_year(f"{result['title']} {result['url']}") or stored.get("detected_year"),
+            "downloaded": bool(stored),
+            "storage_url": stored.get("storage_url"),
+            "file_size": stored.get("file_size"),
+            "sha256": stored.get("sha256"),
+            "pages": stored.get("pages"),
+            "text_url": stored.get("text_url"),
         })
 
     # Keep landing pages as webpage records (useful even if no PDF was extractable)
@@ -416,6 +461,9 @@ def save_results(db, company, reports):
             "downloaded": report.get("downloaded", False),
             "storage_url": report.get("storage_url"),
             "file_size": report.get("file_size"),
+            "sha256": report.get("sha256"),
+            "pages": report.get("pages"),
+            "text_url": report.get("text_url"),
             "scanned_at": now,
             "source": "batch_scanner",
         }
@@ -462,6 +510,8 @@ def main():
         client = connect_mongo(mongo_uri)
         db = client.esg_agent
         print("Connected to MongoDB.")
+        # Verification results shared with the app
+        get_verification_cache().attach(db.verification_cache)
     except Exception as e:
         print(f"MongoDB connection failed: {e}")
         sys.exit(1)
@@ -512,16 +562,36 @@ def main():
             import traceback
             traceback.print_exc()
 
-        if i < len(batch) - 1:
-            time.sleep(2)
-
     print(f"\n{'='*60}")
     print(f"SCAN COMPLETE")
     print(f"Companies scanned: {len(batch)}")
     print(f"Total reports found: {total_reports}")
     print(f"PDFs stored in Supabase: {total_pdfs}")
+    pool = session_stats()
+    print(f"HTTP connections: {pool['requests']} requests over {pool['connections_opened']} connections "
+          f"({pool['connections_reused']} reused, {pool['hosts']} hosts pooled)")
+    cached = cache_stats()
+    print(f"HTTP cache: {cached['hits']} hits, {cached['revalidated']} revalidated (304), "
+          f"{cached['changed']} changed, {cached['misses']} misses, {cached['stale_served']} stale copies served "
+          f"({cached['entries']} entries, {cached['bytes'] / 1e6:.0f} MB)")
+    verified = get_verification_cache().stats
+    print(f"Verification cache: {verified['local_hits'] + verified['db_hits']} hits, "
+          f"{verified['revalidated']} revalidated, {verified['misses']} misses")
+    stored = get_pdf_store().stats()
+    print(f"PDF store: {stored['hits']} local copies used, {stored['stored']} stored, "
+          f"{stored['deduplicated']} duplicates ({stored['files']} files, {stored['bytes'] / 1e6:.0f} MB)")
+    parsed = get_pdf_pool().stats
+    print(f"PDF parsing: {parsed['parsed']} in worker processes, {parsed['in_thread']} in-thread, "
+          f"{parsed['timeouts']} timed out")
+    insecure = get_tls_policy().insecure_hosts()
+    if insecure:
+        print(f"Hosts on unverified TLS ({len(insecure)}): {', '.join(sorted(insecure))}")
+    throttled = {h: v for h, v in get_rate_limiter().stats().items() if v["throttled"]}
+    if throttled:
+        print(f"Throttled hosts (429/503): {throttled}")
     print(f"{'='*60}")
 
+    get_pdf_pool().shutdown()
     client.close()
 
 
@@ -0,0 +1,300 @@
+"""
+Benchmark: compiled link classifier vs. the original get_report_links loops.
+
+Runs both implementations over saved hub HTML (or a synthesized hub page
+when no files are given), checks they return identical links, and prints
+the timings.
+
+Usage:
+    python scripts/bench_link_classifier.py [saved_hub.html ...] [--anchors 4000] [--section-size 500] [--repeat 3]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from urllib.parse import urljoin
+
+from selectolax.parser import HTMLParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import REPORT_KEYWORDS, EXCLUDE_KEYWORDS, GENERIC_LINK_TERMS, JUNK_PATTERNS
+from esg_scraper import ESGScraper
+
+
+def legacy_get_report_links(page_content, base_url):
+    """Pre-classifier ESGScraper.get_report_links, kept verbatim as the baseline."""
+    tree = HTMLParser(page_content)
+    candidates = []
+
+    # GENERIC_LINK_TERMS and EXCLUDE_KEYWORDS imported from config.py
+    from utils import extract_year
+
+    def get_preceding_header(node):
+        """
+        Traverses backwards to find the nearest header (h1-h6).
+        Useful for lists like: 
+        <h3>2024 Reports</h3> 
+        <ul><li><a...>Report</a></li></ul>
+        """
+        current = node.parent
+        for _ in range(5): # Limit traversal depth
+            if not current: break
+
+            # Check previous siblings
+            prev = current.prev
+            while prev:
+                if prev.tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
+                    return prev.text(strip=True)
+                prev = prev.prev
+
+            current = current.parent
+        return None
+
+    def get_parent_context(node):
+        """Get text from parent elements for context"""
+        context_text = ""
+        parent = node.parent
+
+        # Go up 2 levels max to find context
+        for _ in range(2):
+            if parent and parent.tag in ['div', 'p', 'li', 'td', 'section', 'article']:
+                parent_text = parent.text(strip=True)
+                if parent_text and len(parent_text) < 200:  # Don't get huge blocks
+                    context_text = parent_text
+                    break
+            if parent:
+                parent = parent.parent
+            else:
+                break
+
+        return context_text
+
+    def get_best_text(node):
+        # 1. Visible Text
+        text = node.text(strip=True) or ""
+        href = node.attributes.get("href", "") or ""
+
+        # 2. Attributes (aria-label, title) - often has the full context
+        aria = (node.attributes.get("aria-label") or "").strip()
+        title = (node.attributes.get("title") or "").strip()
+
+        # 2.5. Check for nested role="link" divs with better aria-labels
+        # This handles cases like Honeywell where the structure is:
+        # <a href="..." aria-label="Click on tile">
+        #   <div role="link" aria-label="2025 Impact Report about sustainability">
+        #     <div><span>Impact Report</span></div>
+        #   </div>
+        # </a>
+        nested_role_link = node.css_first("div[role='link'], span[role='link']")
+        if nested_role_link:
+            nested_aria = (nested_role_link.attributes.get("aria-label") or "").strip()
+            # If nested aria-label is more descriptive than parent, use it
+            if nested_aria and len(nested_aria) > 10 and "click" not in nested_aria.lower():
+                aria = nested_aria
+
+        # 3. Image Alt Text (if link wraps an image)
+        alt_text = ""
+        img = node.css_first("img")
+        if img:
+            alt_text = (img.attributes.get("alt") or "").strip()
+
+        # Enhanced Name Selection with URL Parsing
+        is_text_generic = not text or any(term in text.lower() for term in GENERIC_LINK_TERMS) or len(text) < 4
+
+        base_text = text
+        if is_text_generic:
+            # Try attributes first
+            if aria and not any(term in aria.lower() for term in GENERIC_LINK_TERMS): 
+                base_text = aria
+            elif title and not any(term in title.lower() for term in GENERIC_LINK_TERMS): 
+                base_text = title
+            elif alt_text: 
+                base_text = alt_text
+            else:
+                # Parse URL filename as last resort
+                from urllib.parse import urlparse, unquote
+                try:
+                    parsed = urlparse(href)
+                    path = unquote(parsed.path)
+                    filename = path.split('/')[-1]
+                    name_part = filename.rsplit('.', 1)[0] if '.' in filename else filename
+                    clean_name = re.sub(r'[-_]+', ' ', name_part)
+                    clean_name = re.sub(r'\s+', ' ', clean_name).strip()
+                    clean_name = ' '.join(word.capitalize() for word in clean_name.split())
+                    if len(clean_name) > 15:  # Only use if substantial
+                        base_text = clean_name
+                except (ValueError, IndexError):
+                    pass
+
+        # If we have basic text but attributes are much better/longer
+        elif aria and len(aria) > len(text) + 5:
+            base_text = aria
+
+        # Clean junk text using shared patterns from config
+        for pattern in JUNK_PATTERNS:
+            base_text = re.sub(pattern, '', base_text, flags=re.IGNORECASE)
+        base_text = re.sub(r'\s+', ' ', base_text).strip()
+
+        if not base_text or len(base_text) < 3: 
+            # Fallback to report type detection
+            url_lower = href.lower()
+            if 'annual' in url_lower:
+                base_text = "Annual Report"
+            elif any(kw in url_lower for kw in ['sustainability', 'esg', 'csr']):
+                base_text = "Sustainability Report"
+            elif any(kw in url_lower for kw in ['impact', 'social']):
+                base_text = "Impact Report"
+            else:
+                base_text = "Report"
+
+        # 4. Contextual Enhancement Pipeline
+        # A. Check URL for Year (often reliable: .../2023/report.pdf)
+        year_url = extract_year(href)
+        if year_url and year_url not in base_text:
+            base_text = f"{base_text} ({year_url})"
+
+        # B. Check Preceding Header (for grouped lists)
+        # Only do this if text is somewhat generic or short
+        if len(base_text) < 30 or any(t in base_text.lower() for t in GENERIC_LINK_TERMS):
+            header = get_preceding_header(node)
+            if header and len(header) < 50: # Don't prepend massive headers
+                # Clean header
+                header = re.sub(r'\s+', ' ', header).strip()
+                # Avoid duplication (e.g. Header="2023 Report", Name="2023 Report")
+                if header.lower() not in base_text.lower():
+                    base_text = f"{header} - {base_text}"
+
+        # C. Check Parent Content (last resort for year)
+        if not extract_year(base_text):
+            ctx = get_parent_context(node)
+            y = extract_year(ctx)
+            if y and y not in base_text:
+                 base_text = f"{base_text} ({y})"
+
+        return base_text
+
+    for node in tree.css("a"):
+        href = node.attributes.get("href")
+        text = get_best_text(node)
+
+        # Clean text (remove newlines, extra spaces)
+        text = re.sub(r'\s+', ' ', text).strip()
+        if not text: text = "Unknown Report Document"
+        text_lower = text.lower()
+
+        if not href:
+            continue
+
+        # 1. Score: Does the text look like a report?
+        score = 0
+        for kw in REPORT_KEYWORDS:
+            if kw in text_lower or kw in href.lower():
+                score += 1
+
+        # Exclusion: Filter out non-report pages
+        excluded = False
+        for exc in EXCLUDE_KEYWORDS:
+            if exc in text_lower or exc in href.lower():
+                excluded = True
+                break
+
+        if excluded:
+            continue
+
+        # Normalize URL
+        href = urljoin(base_url, href)
+
+        # 2. Filter: Must be a PDF OR have a good score
+        # Score 1 is sufficient if we have a robust EXCLUDE list (which we do now)
+        # This captures HTML pages like "Sound Governance" or "Community Impact"
+
+        # Relaxed PDF check for malformed extensions (e.g. Humana "...Reportpdf")
+        is_pdf = href.lower().endswith(".pdf") or href.lower().endswith("pdf")
+
+        if is_pdf or score >= 1:
+            # Boost score for PDF to keep them top priority
+            if is_pdf:
+                score += 3
+
+            candidates.append({"url": href, "text": text, "score": score})
+
+    # Return only high-quality links (score > 0) or all if strict mode is off
+    # We prioritize higher scores
+    return sorted(candidates, key=lambda x: x['score'], reverse=True)
+
+
+def synthesize_hub(n_anchors, section_size=250, seed=7):
+    """A report-archive-like page: year sections, long lists, nav/footer noise."""
+    rng = random.Random(seed)
+    kinds = ["Sustainability Report", "ESG Data Summary", "Climate (TCFD) Report",
+             "Annual Report", "Impact Report", "Proxy Statement", "Press Release"]
+    generic = ["Download", "PDF", "Read more", "View (opens in new window)", "Click here"]
+    parts = ["<html><body><nav>"]
+    parts += [f'<a href="/nav/{i}">Menu item {i}</a>' for i in range(40)]
+    parts.append('<a href="/careers">Careers</a><a href="/search">Search</a></nav><main>')
+    i = 0
+    year = 2025
+    while i < n_anchors:
+        parts.append(f"<section><h3>{year} Reports</h3><ul>")
+        for _ in range(min(section_size, n_anchors - i)):
+            kind = rng.choice(kinds)
+            slug = kind.lower().replace(" ", "-").replace("(", "").replace(")", "")
+            if rng.random() < 0.4:
+                text = rng.choice(generic)
+            else:
+                text = f"{kind} ►"
+            ext = ".pdf" if rng.random() < 0.6 else ""
+            parts.append(f'<li><div class="card"><span>{kind}</span>'
+                         f'<a href="/docs/{year}/{slug}-{i}{ext}" title="{kind} {year}">{text}</a></div></li>')
+            i += 1
+        parts.append("</ul></section>")
+        year -= 1
+    parts.append('</main><footer><a href="/privacy-policy">Privacy Policy</a>'
+                 '<a href="/contact">Contact</a></footer></body></html>')
+    return "".join(parts)
+
+
+def best_of(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - t0)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="saved hub HTML files")
+    parser.add_argument("--anchors", type=int, default=4000, help="anchors in the synthesized page")
+    parser.add_argument("--section-size", type=int, default=500, help="list items per year section")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--base-url", default="https://example.com/reports")
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.files:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            pages.append((os.path.basename(path), f.read()))
+    if not pages:
+        pages.append((f"synthetic ({args.anchors} anchors)", synthesize_hub(args.anchors, args.section_size)))
+
+    scraper = ESGScraper()
+    print(f"{'page':<40} {'anchors':>8} {'links':>6} {'legacy':>9} {'compiled':>9} {'speedup':>8}")
+    for name, html in pages:
+        anchors = len(HTMLParser(html).css("a"))
+        t_old, old = best_of(lambda: legacy_get_report_links(html, args.base_url), args.repeat)
+        t_new, new = best_of(lambda: scraper.get_report_links(html, args.base_url), args.repeat)
+        if old != new:
+            print(f"❌ {name}: results differ ({len(old)} legacy vs {len(new)} compiled)")
+            return 1
+        print(f"{name[:40]:<40} {anchors:>8} {len(new):>6} {t_old:>8.3f}s {t_new:>8.3f}s {t_old / t_new:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,36 @@
 import os
 import sys
-from langchain_community.document_loaders import PyMuPDFLoader, DirectoryLoader
+import glob
+from langchain_community.document_loaders import PyMuPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pdf_sidecar import ensure_sidecar
 
 DOCS_DIR = "rag_docs"
 DB_DIR = "chroma_db"
 
+
+def load_pdf_pages(path):
+    """
+    One Document per page, from the PDF's text sidecar (pdf_sidecar.py):
+    reports parsed before by the scanner or the app aren't parsed again.
+    Falls back to PyMuPDF for PDFs pypdf can't read.
+    """
+    sidecar = ensure_sidecar(path)
+    if not sidecar:
+        return PyMuPDFLoader(path).load()
+    return [
+        Document(page_content=text, metadata={
+            "source": path, "page": i, "total_pages": sidecar["pages"],
+            "title": sidecar["title"] or "", "year": sidecar["year"] or "",
+        })
+        for i, text in enumerate(sidecar["text"]) if text.strip()
+    ]
+
 def build_db():
     print(f"Loading PDFs from {DOCS_DIR}...")
     
@@ -16,9 +39,9 @@ def build_db():
         print(f"Error: Directory {DOCS_DIR} not found.")
         return
 
-    # Use DirectoryLoader with PyMuPDF
-    loader = DirectoryLoader(DOCS_DIR, glob="./*.pdf", loader_cls=PyMuPDFLoader)
-    documents = loader.load()
+    documents = []
+    for path in sorted(glob.glob(os.path.join(DOCS_DIR, "*.pdf"))):
+        documents.extend(load_pdf_pages(path))
     
     if not documents:
         print("No documents found to index.")
@@ -19,6 +19,7 @@ import os
 import sys
 import json
 import argparse
+import hashlib
 from datetime import datetime
 
 import certifi
@@ -27,6 +28,8 @@ from supabase import create_client
 import anthropic
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pdf_store import get_pdf_store, sha256_file
+from pdf_sidecar import load_sidecar, save_sidecar, decode_sidecar, ensure_sidecar
 
 # Default extraction model. Override with EXTRACT_MODEL env var.
 # claude-sonnet-5 is roughly half the cost of opus for this vision workload.
@@ -131,12 +134,54 @@ def download_pdf_bytes(supa, bucket, storage_url):
     return supa.storage.from_(bucket).download(path)
 
 
-def extract_metrics(client, model, pdf_bytes, company_name):
+def local_pdf_path(supa, bucket, report):
+    """
+    Local copy of a report's PDF from the shared PDF store (pdf_store.py),
+    downloading it from Supabase only if no pipeline has stored it yet.
+    """
+    store = get_pdf_store()
+    path = (store.path(sha256=report.get("sha256")) if report.get("sha256") else None) \
+        or store.path(report["storage_url"]) or store.path(report["url"])
+    if path:
+        print("    Using local copy from the PDF store.")
+        return path
+    pdf_bytes = download_pdf_bytes(supa, bucket, report["storage_url"])
+    if not pdf_bytes:
+        return None
+    path = store.put_bytes(report["storage_url"], pdf_bytes)
+    if path:
+        store.alias(report["url"], hashlib.sha256(pdf_bytes).hexdigest())
+    return path
+
+
+def report_sidecar(supa, bucket, report, pdf_path):
+    """
+    The report's text sidecar (pdf_sidecar.py): the local copy, else the one
+    the batch scanner stored next to the PDF in Supabase, else extracted now.
+    """
+    sha256 = report.get("sha256") or sha256_file(pdf_path)
+    sidecar = load_sidecar(sha256)
+    if sidecar:
+        return sidecar
+    if report.get("text_url"):
+        try:
+            sidecar = decode_sidecar(download_pdf_bytes(supa, bucket, report["text_url"]) or b"")
+        except Exception as e:
+            print(f"    Could not fetch text sidecar: {e}")
+        if sidecar:
+            save_sidecar(sidecar)
+            return sidecar
+    return ensure_sidecar(pdf_path, sha256)
+
+
+def extract_metrics(client, model, pdf_path, company_name):
     """Send a PDF to Claude and get back structured ESG metrics + token usage."""
-    uploaded = client.beta.files.upload(
-        file=("report.pdf", pdf_bytes, "application/pdf"),
-        betas=["files-api-2025-04-14"],
-    )
+    # Streamed from the local file rather than read into memory
+    with open(pdf_path, "rb") as pdf_file:
+        uploaded = client.beta.files.upload(
+            file=("report.pdf", pdf_file, "application/pdf"),
+            betas=["files-api-2025-04-14"],
+        )
 
     try:
         response = client.beta.messages.create(
@@ -221,13 +266,15 @@ def main():
         print(f"[{i+1}/{len(reports)}] {name} ({symbol})")
 
         try:
-            pdf_bytes = download_pdf_bytes(supa, bucket, report["storage_url"])
-            if not pdf_bytes:
+            pdf_path = local_pdf_path(supa, bucket, report)
+            if not pdf_path:
                 print("    Could not download PDF from Supabase. Skipping.")
                 continue
 
-            print(f"    PDF size: {len(pdf_bytes)/1024/1024:.1f} MB — extracting...")
-            metrics, usage = extract_metrics(client, args.model, pdf_bytes, name)
+            sidecar = report_sidecar(supa, bucket, report, pdf_path) or {}
+            print(f"    PDF size: {os.path.getsize(pdf_path)/1024/1024:.1f} MB, "
+                  f"{sidecar.get('pages', '?')} pages — extracting...")
+            metrics, usage = extract_metrics(client, args.model, pdf_path, name)
 
             total_in += usage.input_tokens
             total_out += usage.output_tokens
@@ -239,6 +286,8 @@ def main():
                     "company_name": name,
                     "url": report["url"],
                     "storage_url": report.get("storage_url"),
+                    "pages": sidecar.get("pages"),
+                    "detected_year": sidecar.get("year"),
                     "metrics": metrics,
                     "model": args.model,
                     "input_tokens": usage.input_tokens,
@@ -1,8 +1,13 @@
 import json
-import requests
 import os
 import sys
 import re
+import shutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_session import get_session, session_stats
+from pdf_download import spool_response
+from pdf_store import get_pdf_store
 
 def sanitize_filename(name):
     """Make valid filename from title"""
@@ -12,6 +17,13 @@ def sanitize_filename(name):
     clean = re.sub(r'\s+', ' ', clean).strip()
     return clean[:100] # Limit length
 
+def link_or_copy(src, dest):
+    """Hard-link a stored PDF into rag_docs (copy across filesystems)."""
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
 def ingest_reports(json_file):
     if not os.path.exists(json_file):
         print(f"Error: {json_file} does not exist.")
@@ -36,6 +48,7 @@ def ingest_reports(json_file):
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
         }
 
+        store = get_pdf_store()
         downloaded_count = 0
         for doc in all_docs:
             url = doc.get('href')
@@ -53,21 +66,36 @@ def ingest_reports(json_file):
                 print(f"Skipping (exists): {filename}")
                 continue
                 
+            # Already downloaded by the app or the batch scanner: link the local copy
+            stored = store.path(url)
+            if stored:
+                link_or_copy(stored, filepath)
+                print(f"Linked from PDF store: {filename}")
+                continue
+
             print(f"Downloading: {title}...")
             try:
-                resp = requests.get(url, headers=headers, timeout=15, stream=True)
-                if resp.status_code == 200:
-                    with open(filepath, 'wb') as f:
-                        for chunk in resp.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    print(f"  -> Saved to {filepath}")
-                    downloaded_count += 1
-                else:
-                    print(f"  -> Failed (Status {resp.status_code})")
+                # Pooled session: reports from one company share keep-alive connections
+                with get_session().get(url, headers=headers, timeout=15, stream=True) as resp:
+                    if resp.status_code == 200:
+                        # Our copy first: storing moves the spool file away, even if the store write fails
+                        with spool_response(resp) as pdf:
+                            is_pdf = pdf.peek(4) == b"%PDF"
+                            pdf.save_as(filepath)
+                        if is_pdf:
+                            store.put_file(url, filepath)
+                        print(f"  -> Saved to {filepath}")
+                        downloaded_count += 1
+                    else:
+                        print(f"  -> Failed (Status {resp.status_code})")
             except Exception as e:
                 print(f"  -> Failed error: {e}")
 
         print(f"\nIngestion Complete. Downloaded {downloaded_count} new files.")
+        pool = session_stats()
+        print(f"Connections: {pool['connections_opened']} opened, {pool['connections_reused']} reused")
+        stored = store.stats()
+        print(f"PDF store: {stored['hits']} local copies used, {stored['stored']} new files")
 
     except Exception as e:
         print(f"Critical Error: {e}")
@@ -0,0 +1,357 @@
+"""
+Staged, concurrent pipeline behind app.search_esg_info.
+
+The search used to run its stages (hub lookup, domain search, deep scan,
+hub crawl, site: search, year queries, ResponsibilityReports, UNGC) one
+after another, each verifying candidates in its own 2-3 thread pool.
+Here a stage is a function of a shared SearchRun, declared with the
+stages it runs after. Each stage starts as soon as those are done, so
+independent stages overlap, and each one can be skipped by a condition
+checked at that point (e.g. "enough reports already"). Page scans and
+candidate verification from every stage share one bounded executor
+(SEARCH_WORKERS). Each stage's wall time goes to results["search_log"].
+
+A run has a deadline (SEARCH_DEADLINE_S) and a target report count
+(SEARCH_TARGET_REPORTS). Candidates are verified best-scored first and
+verification stops once the target is met; callers skip their fallback
+stages on `target_met()`. At the deadline, stages still running are left
+behind and the run returns what it has, marked results["partial"].
+
+Progress can be streamed: a run given an `on_event` callback reports
+stage changes, results fields (the ESG site is the "website" field),
+each report as it is added and each search-log line; stream_events turns
+that into a generator the UI can render from. The time to the first
+report is kept with the results (time_to_first_report_s).
+"""
+
+import concurrent.futures
+import datetime
+import queue
+import threading
+import time
+
+from config import SEARCH_WORKERS, SEARCH_DEADLINE_S, SEARCH_TARGET_REPORTS
+from fetch_strategy import domain_key
+from link_classifier import get_link_classifier
+from utils import extract_year
+
+
+def score_candidate(candidate):
+    """Verification priority: report keywords in title/URL, PDFs first, then newest year."""
+    title = (candidate.get("title") or "").lower()
+    href = (candidate.get("href") or "").lower()
+    score = get_link_classifier().keyword_score(title, href)
+    if href.split("?")[0].endswith(".pdf"):
+        score += 1
+    return score, int(extract_year(f"{title} {href}") or 0)
+
+
+class SearchRun:
+    """State shared by the stages of one search: results, scratch values and the executor."""
+
+    def __init__(self, results, workers=SEARCH_WORKERS, deadline_s=SEARCH_DEADLINE_S,
+                 target=SEARCH_TARGET_REPORTS, log=print, on_event=None):
+        self.results = results
+        self.results.setdefault("reports", [])
+        self.results.setdefault("search_log", [])
+        self.state = {}                # values handed between stages (official_domain, ...)
+        self.timings = {}              # stage name -> seconds
+        self.stop_reason = None
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline_s if deadline_s else None
+        self.target = target
+        self.first_report_s = None
+        self.on_event = on_event       # on_event(event dict), called from stage/worker threads
+        self._closed = False           # set at the end: late writes from abandoned stages are dropped
+        self._log = log
+        self._lock = threading.Lock()
+        self._claimed = set()          # hrefs already verified or being verified
+        self.domains = set()           # domains this run fetched from (circuit breaker report)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="search-work")
+
+    # --- logging ---
+
+    def log(self, msg):
+        self._log(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+    def note(self, msg):
+        """Add a line to the search log shown with the results."""
+        with self._lock:
+            if self._closed:
+                return
+            self.results["search_log"].append(msg)
+        self.emit("log", line=msg)
+
+    def set(self, key, value):
+        """Set a results field (website, description, ...) unless the run is over."""
+        with self._lock:
+            if self._closed:
+                return
+            self.results[key] = value
+        self.emit("field", key=key, value=value)
+
+    def emit(self, kind, **payload):
+        """Send {"kind", "t", ...} to on_event; a failing callback is logged, never raised."""
+        if self.on_event is None or self._closed:
+            return
+        try:
+            self.on_event({"kind": kind, "t": round(self.elapsed(), 2), **payload})
+        except Exception as e:
+            self.log(f"  on_event failed for {kind}: {e}")
+
+    # --- control ---
+
+    def stop(self, reason):
+        """Skip every stage that hasn't started yet (running ones finish)."""
+        with self._lock:
+            self.stop_reason = self.stop_reason or reason
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def time_left(self):
+        """Seconds until the deadline (None without one)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def touch(self, url):
+        """Record that this run fetches from `url`'s domain."""
+        with self._lock:
+            self.domains.add(domain_key(url))
+
+    # --- reports ---
+
+    def report_count(self):
+        with self._lock:
+            return len(self.results["reports"])
+
+    def target_met(self):
+        return bool(self.target) and self.report_count() >= self.target
+
+    def add_report(self, report, source=None, cap=None):
+        """Append a report unless its href is already listed or there are `cap` reports. Returns whether it was added."""
+        with self._lock:
+            reports = self.results["reports"]
+            if self._closed:
+                return False
+            if cap is not None and len(reports) >= cap:
+                return False
+            if any(r["href"] == report["href"] for r in reports):
+                return False
+            if source:
+                report["source"] = source
+            reports.append(report)
+            if self.first_report_s is None:
+                self.first_report_s = round(self.elapsed(), 2)
+        self.emit("report", report=dict(report))
+        return True
+
+    # --- shared executor ---
+
+    def submit(self, fn, *args):
+        return self._executor.submit(fn, *args)
+
+    def map(self, fn, items):
+        """
+        Run `fn(item)` for each item on the shared executor, yielding
+        (item, result) as each one finishes. A failure is logged and yields
+        None. Items are submitted in order, so they start in that order.
+        Leaving the loop early, or reaching the deadline, cancels the calls
+        not yet started.
+        """
+        futures = {self._executor.submit(fn, item): item for item in items}
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=self.time_left()):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.log(f"  {type(e).__name__} on {str(futures[future])[:80]}: {str(e)[:100]}")
+                    result = None
+                yield futures[future], result
+        except concurrent.futures.TimeoutError:
+            pending = sum(1 for f in futures if not f.done())
+            self.log(f"  Deadline reached with {pending} of {len(futures)} calls unfinished")
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def verify(self, candidates, verify, source=None, cap=None):
+        """
+        Check candidate {"href", "title"} dicts with `verify(href, title)`,
+        best-scored first (score_candidate), and add the ones it returns a
+        report for. Hrefs another stage already took are skipped. Stops once
+        `cap` or the run's target is reached. Returns how many were added.
+        """
+        with self._lock:
+            fresh = []
+            for c in candidates:
+                if c["href"] not in self._claimed:
+                    self._claimed.add(c["href"])
+                    self.domains.add(domain_key(c["href"]))
+                    fresh.append(c)
+        fresh.sort(key=score_candidate, reverse=True)
+        added = 0
+        for _, report in self.map(lambda c: verify(c["href"], c["title"]), fresh):
+            if report and self.add_report(report, source, cap):
+                added += 1
+            if cap is not None and self.report_count() >= cap:
+                break
+            if self.target_met():
+                break
+        return added
+
+    def close(self):
+        """End the run: later writes are dropped, queued work is cancelled."""
+        with self._lock:
+            self._closed = True
+        # Don't wait for verifications nobody is collecting any more
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Stage:
+    def __init__(self, name, fn, after=(), skip=None):
+        self.name = name
+        self.fn = fn                   # fn(run) -> optional short summary for the log
+        self.after = tuple(after)
+        self.skip = skip               # skip(run) -> reason to skip, or None to run
+
+
+class SearchPipeline:
+    """Stages with ordering constraints, run as concurrently as those allow."""
+
+    def __init__(self):
+        self.stages = []
+
+    def add(self, name, fn, after=(), skip=None):
+        known = {s.name for s in self.stages}
+        missing = [a for a in after if a not in known]
+        if missing:
+            raise ValueError(f"Stage {name!r} runs after unknown stage(s) {missing}")
+        if name in known:
+            raise ValueError(f"Duplicate stage {name!r}")
+        self.stages.append(Stage(name, fn, after, skip))
+
+    def stage(self, name, after=(), skip=None):
+        """Decorator form of add()."""
+        def register(fn):
+            self.add(name, fn, after, skip)
+            return fn
+        return register
+
+    def _skip_reason(self, stage, run):
+        if run.expired():
+            run.stop("deadline reached")
+        if run.stop_reason:
+            return run.stop_reason
+        if stage.skip:
+            return stage.skip(run)
+        return None
+
+    def run(self, run):
+        """
+        Run every stage (or skip it) once, until the run's deadline. Stages
+        still running at the deadline are abandoned. Returns run.timings.
+        """
+        run.emit("start", stages=[stage.name for stage in self.stages])
+        pending = list(self.stages)
+        done = set()
+        running = {}                   # future -> (stage, start)
+        pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, len(self.stages)), thread_name_prefix="search-stage")
+        try:
+            while pending or running:
+                # Start (or skip) every stage whose predecessors are done;
+                # a skip can make later stages ready, hence the loop
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for stage in list(pending):
+                        if not all(a in done for a in stage.after):
+                            continue
+                        pending.remove(stage)
+                        progressed = True
+                        reason = self._skip_reason(stage, run)
+                        if reason:
+                            run.note(f"Stage {stage.name}: skipped ({reason})")
+                            run.emit("stage", name=stage.name, status="skipped", reason=reason)
+                            done.add(stage.name)
+                            continue
+                        run.emit("stage", name=stage.name, status="running")
+                        running[pool.submit(stage.fn, run)] = (stage, time.monotonic())
+                if not running:
+                    break
+
+                finished, _ = concurrent.futures.wait(
+                    running, timeout=run.time_left(), return_when=concurrent.futures.FIRST_COMPLETED)
+                if not finished:
+                    self._cut_off(run, running, pending)
+                    break
+                for future in finished:
+                    stage, start = running.pop(future)
+                    elapsed = time.monotonic() - start
+                    run.timings[stage.name] = round(elapsed, 2)
+                    status = "done"
+                    try:
+                        summary = future.result()
+                    except Exception as e:
+                        status = "failed"
+                        summary = f"failed: {type(e).__name__}: {str(e)[:100]}"
+                        run.log(f"Stage {stage.name} {summary}")
+                    run.note(f"Stage {stage.name}: {elapsed:.2f}s" + (f" ({summary})" if summary else ""))
+                    run.emit("stage", name=stage.name, status=status, seconds=round(elapsed, 2), summary=summary)
+                    done.add(stage.name)
+        finally:
+            pool.shutdown(wait=False)
+
+        if run.first_report_s is not None:
+            run.note(f"First report after {run.first_report_s:.2f}s")
+        run.set("time_to_first_report_s", run.first_report_s)
+        run.set("stage_timings", dict(run.timings))
+        return run.timings
+
+    def _cut_off(self, run, running, pending):
+        run.stop("deadline reached")
+        for stage, start in running.values():
+            run.timings[stage.name] = round(time.monotonic() - start, 2)
+            run.note(f"Stage {stage.name}: cut off at the deadline after {time.monotonic() - start:.2f}s")
+            run.emit("stage", name=stage.name, status="cut off", seconds=run.timings[stage.name])
+        for stage in pending:
+            run.note(f"Stage {stage.name}: skipped (deadline reached)")
+            run.emit("stage", name=stage.name, status="skipped", reason="deadline reached")
+        run.note(f"Deadline reached after {run.elapsed():.2f}s: returning the {run.report_count()} "
+                 f"reports found so far")
+        run.set("partial", True)
+
+
+def stream_events(search, *args, **kwargs):
+    """
+    Run `search(*args, on_event=..., **kwargs)` in a background thread and
+    yield its events as they happen, then {"kind": "done", "results": ...}
+    with its return value. Exceptions from the search are re-raised here.
+    """
+    events = queue.Queue()
+    outcome = {}
+    started = time.monotonic()
+
+    def target():
+        try:
+            outcome["results"] = search(*args, on_event=events.put, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            events.put(None)
+
+    threading.Thread(target=target, name="search-stream", daemon=True).start()
+    while True:
+        event = events.get()
+        if event is None:
+            break
+        yield event
+    if "error" in outcome:
+        raise outcome["error"]
+    yield {"kind": "done", "t": round(time.monotonic() - started, 2), "results": outcome["results"]}
@@ -0,0 +1,218 @@
+"""Unit tests for the asyncio fetch engine (local server, no internet)."""
+
+import sys
+import os
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import async_fetch
+from async_fetch import AsyncFetcher, AsyncResponse, verify_pdf_content, find_pdfs_on_page
+from circuit_breaker import DomainCircuitBreaker
+from rate_limiter import HostRateLimiter
+from tls_policy import TlsPolicyStore
+
+
+def make_pdf(text, pad=60_000):
+    """Minimal one-page PDF with `text` on it, padded past MIN_PDF_SIZE_BYTES."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n%" + b"0" * pad + b"\n"
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+HUB_HTML = b"""<html><body>
+<a href="/files/acme-sustainability-report-2024.pdf">2024 Sustainability Report</a>
+<a href="docs/esg-report-2023.pdf">ESG Report 2023</a>
+<a href="/files/privacy-policy.pdf">Privacy Policy</a>
+<a href="/about">About us</a>
+</body></html>"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = {}
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        hits = _Handler.hits
+        hits[path] = hits.get(path, 0) + 1
+        if path == "/acme-report-2024.pdf":
+            self._send(200, make_pdf("Acme Corp Sustainability Report 2024"), "application/pdf")
+        elif path == "/tiny.pdf":
+            self._send(200, b"%PDF-1.4 tiny", "application/pdf")
+        elif path == "/page":
+            self._send(200, HUB_HTML, "text/html; charset=utf-8")
+        elif path == "/gone":
+            self._send(404, b"<html><body>Page not found</body></html>", "text/html; charset=utf-8")
+        elif path == "/image.png":
+            self._send(200, b"\x89PNG", "image/png")
+        elif path == "/throttled":
+            if hits[path] == 1:
+                self._send(429, b"slow down", "text/plain", {"Retry-After": "0"})
+            else:
+                self._send(200, b"ok", "text/plain")
+        else:
+            self._send(404, b"missing", "text/plain")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.hits = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    # Fresh limiter/breaker so tests don't share 127.0.0.1 pacing or failures
+    limiter = HostRateLimiter(default_rps=1000, burst=1000, host_rps={})
+    breaker = DomainCircuitBreaker(log=lambda *_: None)
+    with patch.object(async_fetch, "get_rate_limiter", return_value=limiter), \
+            patch.object(async_fetch, "get_circuit_breaker", return_value=breaker):
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def run_with_fetcher(fn, **kwargs):
+    async def main():
+        async with AsyncFetcher(**kwargs) as fetcher:
+            return await fn(fetcher), fetcher.stats
+    return asyncio.run(main())
+
+
+class TestAsyncFetcher:
+    def test_get_returns_body(self, server):
+        resp, stats = run_with_fetcher(lambda f: f.get(f"{server}/page"))
+        assert resp.status == 200
+        assert "Sustainability Report" in resp.text()
+        assert stats["requests"] == 1
+
+    def test_retries_after_429(self, server):
+        resp, stats = run_with_fetcher(lambda f: f.get(f"{server}/throttled"))
+        assert resp.status == 200
+        assert resp.body == b"ok"
+        assert stats["retries"] == 1
+
+    def test_body_capped(self, server):
+        resp, _ = run_with_fetcher(lambda f: f.get(f"{server}/page", max_bytes=10))
+        assert resp.truncated
+        assert len(resp.body) < len(HUB_HTML)
+
+    def test_declined_body_not_read(self, server):
+        resp, _ = run_with_fetcher(lambda f: f.get(f"{server}/page", want_body=lambda s, h: False))
+        assert resp.status == 200
+        assert resp.body == b""
+
+    def test_many_concurrent_requests(self, server):
+        async def many(fetcher):
+            return await asyncio.gather(*(fetcher.get(f"{server}/page?i={i}") for i in range(30)))
+        responses, stats = run_with_fetcher(many, max_in_flight=10, per_host=5)
+        assert all(r.status == 200 for r in responses)
+        assert stats["requests"] == 30
+
+
+    def test_ssl_fallback_goes_through_status_handling(self, server, tmp_path):
+        class BadChain(aiohttp.ClientSSLError):
+            def __init__(self):
+                Exception.__init__(self, "CERTIFICATE_VERIFY_FAILED")
+
+            def __str__(self):
+                return "CERTIFICATE_VERIFY_FAILED"
+
+        responses = iter([AsyncResponse(server, 429, {"Retry-After": "0"}), AsyncResponse(server, 200, {}, b"ok")])
+        contexts = []
+
+        async def fake_request(url, headers, timeout, max_bytes, want_body, ssl_context):
+            contexts.append(ssl_context)
+            if ssl_context is not False:
+                raise BadChain()
+            return next(responses)
+
+        async def fetch(fetcher):
+            with patch.object(fetcher, "_request", side_effect=fake_request):
+                return await fetcher.get("https://ir.example-utility.com/report.pdf")
+
+        store = TlsPolicyStore(path=str(tmp_path / "tls.json"))
+        with patch.object(async_fetch, "get_tls_policy", return_value=store):
+            resp, stats = run_with_fetcher(fetch)
+        # The unverified 429 is retried like any other instead of being returned
+        assert resp.body == b"ok"
+        assert [c is False for c in contexts] == [False, True, True]
+        assert (stats["ssl_fallbacks"], stats["retries"]) == (1, 1)
+        assert "ir.example-utility.com" in store.insecure_hosts()
+
+
+class TestAsyncVerify:
+    def test_verified_pdf(self, server):
+        url = f"{server}/acme-report-2024.pdf"
+        result, _ = run_with_fetcher(lambda f: verify_pdf_content(f, url, "Download", "Acme Corp"))
+        assert result["href"] == url
+        assert result["body"] == "Verified PDF Report"
+        assert result["title"] == "Acme Report 2024"
+
+    def test_wrong_company_rejected(self, server):
+        url = f"{server}/acme-report-2024.pdf"
+        result, _ = run_with_fetcher(lambda f: verify_pdf_content(f, url, "Report", "Globex Industries"))
+        assert result is None
+
+    def test_tiny_pdf_not_downloaded(self, server):
+        result, _ = run_with_fetcher(lambda f: verify_pdf_content(f, f"{server}/tiny.pdf", "Report", "Acme"))
+        assert result is None
+
+    def test_html_accepted_without_parsing(self, server):
+        result, _ = run_with_fetcher(lambda f: verify_pdf_content(f, f"{server}/page", "ESG Hub", "Acme"))
+        assert result["body"] == "Webpage Report / Resource"
+
+    def test_html_error_page_rejected(self, server):
+        result, _ = run_with_fetcher(lambda f: verify_pdf_content(f, f"{server}/gone", "ESG Hub", "Acme"))
+        assert result is None
+
+    def test_other_content_type_rejected(self, server):
+        result, _ = run_with_fetcher(lambda f: verify_pdf_content(f, f"{server}/image.png", "Report", "Acme"))
+        assert result is None
+
+
+class TestAsyncFindPdfs:
+    def test_report_pdfs_on_landing_page(self, server):
+        found, _ = run_with_fetcher(lambda f: find_pdfs_on_page(f, f"{server}/page", "Acme"))
+        urls = [p["url"] for p in found]
+        assert urls == [
+            f"{server}/files/acme-sustainability-report-2024.pdf",
+            f"{server}/docs/esg-report-2023.pdf",
+        ]
+
+    def test_non_html_page(self, server):
+        found, _ = run_with_fetcher(lambda f: find_pdfs_on_page(f, f"{server}/image.png", "Acme"))
+        assert found == []
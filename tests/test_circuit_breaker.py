@@ -0,0 +1,146 @@
+"""Unit tests for the per-domain circuit breaker."""
+
+import sys
+import os
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import circuit_breaker
+from circuit_breaker import DomainCircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+URL = "https://www.example.com/sustainability"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch.object(circuit_breaker.time, "monotonic", fake):
+        yield fake
+
+
+def make_breaker():
+    return DomainCircuitBreaker(failure_threshold=3, cooldown_s=60, max_cooldown_s=200, log=lambda *_: None)
+
+
+class TestDomainCircuitBreaker:
+    def test_opens_after_threshold(self, clock):
+        breaker = make_breaker()
+        for _ in range(2):
+            breaker.record_failure(URL, "HTTP 403")
+        assert breaker.state(URL) == CLOSED
+        breaker.before_request(URL)
+        breaker.record_failure(URL, "HTTP 403")
+        assert breaker.state(URL) == OPEN
+
+    def test_open_fails_fast(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure(URL, "Timeout")
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request("https://example.com/other-page")
+        snap = breaker.snapshot()
+        assert snap["example.com"]["short_circuited"] == 1
+        assert snap["example.com"]["last_reason"] == "Timeout"
+
+    def test_success_resets_failure_count(self, clock):
+        breaker = make_breaker()
+        breaker.record_failure(URL, "HTTP 500")
+        breaker.record_failure(URL, "HTTP 500")
+        breaker.record_success(URL)
+        breaker.record_failure(URL, "HTTP 500")
+        assert breaker.state(URL) == CLOSED
+
+    def test_half_open_allows_single_probe(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure(URL, "HTTP 403")
+        clock.now += 61
+        breaker.before_request(URL)
+        assert breaker.state(URL) == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request(URL)
+
+    def test_probe_success_closes(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure(URL, "HTTP 403")
+        clock.now += 61
+        breaker.before_request(URL)
+        breaker.record_success(URL)
+        assert breaker.state(URL) == CLOSED
+        assert breaker.snapshot() == {}
+        breaker.before_request(URL)
+
+    def test_probe_failure_reopens_with_longer_cooldown(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure(URL, "HTTP 403")
+        clock.now += 61
+        breaker.before_request(URL)
+        breaker.record_failure(URL, "HTTP 403")
+        assert breaker.state(URL) == OPEN
+        assert breaker.snapshot()["example.com"]["retry_in_s"] == 120
+        clock.now += 61
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request(URL)
+
+    def test_cooldown_capped(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure(URL, "HTTP 403")
+        for _ in range(3):
+            clock.now += 1000
+            breaker.before_request(URL)
+            breaker.record_failure(URL, "HTTP 403")
+        assert breaker.snapshot()["example.com"]["retry_in_s"] == 200
+
+    def test_is_open_without_robust_get(self, clock):
+        breaker = make_breaker()
+        assert not breaker.is_open(URL)
+        for _ in range(3):
+            breaker.record_failure(URL, "HTTP 403")
+        assert breaker.is_open(URL)
+        assert breaker.snapshot()["example.com"]["short_circuited"] == 1
+        clock.now += 61
+        # The caller's fetch is the half-open probe; nobody else gets through meanwhile
+        assert not breaker.is_open(URL)
+        assert breaker.is_open(URL)
+        breaker.record_success(URL)
+        assert breaker.state(URL) == CLOSED
+
+    def test_domains_independent(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure(URL, "HTTP 403")
+        breaker.before_request("https://other.org/report.pdf")
+        assert breaker.state("https://other.org/") == CLOSED
+
+
+class TestRobustGetBreaker:
+    def test_blocked_domain_short_circuits(self, clock):
+        import requests
+        import utils
+
+        breaker = make_breaker()
+        blocked = requests.exceptions.ConnectionError("HTTP 403 after 3 attempts")
+        blocked.status_code = 403
+        with patch.object(utils, "get_circuit_breaker", return_value=breaker), \
+                patch.object(utils, "_get_with_retries", side_effect=blocked) as fetch:
+            for _ in range(3):
+                with pytest.raises(requests.exceptions.ConnectionError):
+                    utils.robust_get(URL)
+            with pytest.raises(CircuitOpenError):
+                utils.robust_get(URL)
+        assert fetch.call_count == 3
+        assert breaker.snapshot()["example.com"]["last_reason"] == "HTTP 403"
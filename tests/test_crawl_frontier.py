@@ -0,0 +1,98 @@
+"""Unit tests for the budgeted hub crawl frontier."""
+
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl_frontier import CrawlFrontier, score_hub
+
+
+def _quiet(msg):
+    pass
+
+
+class FakeSite:
+    """visit() over a dict: url -> (found, [hub urls])."""
+
+    def __init__(self, graph, delay=0.0):
+        self.graph = graph
+        self.delay = delay
+        self.visited = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def visit(self, url, depth):
+        with self._lock:
+            self.visited.append(url)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if url not in self.graph:
+            raise RuntimeError("404")
+        found, hubs = self.graph[url]
+        return found, [{"url": h, "text": t} for h, t in hubs]
+
+
+ROOT = "https://example.com/esg"
+
+
+class TestCrawlFrontier:
+    def test_best_scored_hub_first(self):
+        site = FakeSite({
+            ROOT: (0, [("https://example.com/news", "news"),
+                       ("https://example.com/reports", "report archive")]),
+            "https://example.com/reports": (0, []),
+            "https://example.com/news": (0, []),
+        })
+        frontier = CrawlFrontier(site.visit, workers=1, log=_quiet)
+        frontier.add(ROOT)
+        frontier.run()
+        assert site.visited == [ROOT, "https://example.com/reports", "https://example.com/news"]
+
+    def test_depth_beyond_two_and_limit(self):
+        chain = {f"https://example.com/l{i}": (0, [(f"https://example.com/l{i + 1}", "reports archive")])
+                 for i in range(6)}
+        site = FakeSite(chain)
+        frontier = CrawlFrontier(site.visit, workers=1, max_depth=3, log=_quiet)
+        frontier.add("https://example.com/l0")
+        stats = frontier.run()
+        assert stats["max_depth"] == 3
+        assert len(site.visited) == 4
+
+    def test_stops_at_target_and_page_budget(self):
+        hubs = [(f"https://example.com/h{i}", "report archive") for i in range(10)]
+        graph = {ROOT: (0, hubs)}
+        graph.update({h: (2, []) for h, _ in hubs})
+        frontier = CrawlFrontier(FakeSite(graph).visit, workers=1, target=4, log=_quiet)
+        frontier.add(ROOT)
+        assert frontier.run()["stop_reason"] == "target reached"
+
+        frontier = CrawlFrontier(FakeSite(graph).visit, workers=2, max_pages=3, target=100, log=_quiet)
+        frontier.add(ROOT)
+        result = frontier.run()
+        assert result["pages"] == 3 and result["stop_reason"] == "page budget"
+
+    def test_per_domain_limit_and_failures(self):
+        hubs = [(f"https://example.com/h{i}", "reports") for i in range(6)]
+        site = FakeSite({ROOT: (0, hubs)}, delay=0.02)   # hub pages 404
+        frontier = CrawlFrontier(site.visit, workers=4, per_domain=2, log=_quiet)
+        frontier.add(ROOT)
+        stats = frontier.run()
+        assert site.max_active <= 2
+        assert stats["failed"] == 6
+
+    def test_off_domain_and_duplicates_ignored(self):
+        frontier = CrawlFrontier(lambda u, d: (0, []), allowed_domain="www.example.com", log=_quiet)
+        assert frontier.add(ROOT)
+        assert not frontier.add(ROOT + "/")
+        assert not frontier.add("https://other.com/esg")
+        assert frontier.add("https://investors.example.com/reports")
+
+    def test_score_hub_prefers_archives(self):
+        assert score_hub("https://example.com/x", "past reports archive") > score_hub("https://example.com/x", "news")
@@ -0,0 +1,292 @@
+"""Unit tests for ESGScraper link extraction (no browser required)."""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from esg_scraper import ESGScraper
+
+
+class FakeProgressivePage:
+    """Page whose HTML grows as load states are reached."""
+
+    def __init__(self, html_by_state, fail_states=()):
+        self.html_by_state = html_by_state
+        self.fail_states = set(fail_states)
+        self.state = "commit"
+        self.gotos = []
+        self.url = "https://example.com/esg"
+
+    def goto(self, url, wait_until=None, timeout=None):
+        self.gotos.append((url, wait_until))
+        self.state = "commit"
+
+    def wait_for_load_state(self, state, timeout=None):
+        if state in self.fail_states:
+            raise TimeoutError(f"{state} timed out")
+        self.state = state
+
+    def content(self):
+        return self.html_by_state.get(self.state, "<html></html>")
+
+    def screenshot(self, **kwargs):
+        raise RuntimeError("no screenshots in tests")
+
+
+def _anchor(href, text):
+    return f'<a href="{href}">{text}</a>'
+
+
+class TestProgressiveDeepScan:
+    def test_single_navigation_merges_checkpoints(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        page = FakeProgressivePage({
+            "domcontentloaded": _anchor("/r/2023-esg-report.pdf", "2023 ESG Report"),
+            "load": _anchor("/r/2023-esg-report.pdf", "2023 ESG Report")
+                    + _anchor("/r/2024-sustainability-report.pdf", "2024 Sustainability Report"),
+        })
+        links = ESGScraper()._deep_scan_page(
+            page, "https://example.com/esg", deadline_s=30,
+            checkpoints=["domcontentloaded", "load"],
+        )
+        assert page.gotos == [("https://example.com/esg", "commit")]
+        urls = {l["url"] for l in links}
+        assert urls == {
+            "https://example.com/r/2023-esg-report.pdf",
+            "https://example.com/r/2024-sustainability-report.pdf",
+        }
+
+    def test_failed_checkpoint_keeps_partial_results(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        page = FakeProgressivePage(
+            {"commit": _anchor("/impact-report.pdf", "Impact Report")},
+            fail_states={"load"},
+        )
+        links = ESGScraper()._deep_scan_page(
+            page, "https://example.com/esg", deadline_s=30, checkpoints=["load"],
+        )
+        assert [l["url"] for l in links] == ["https://example.com/impact-report.pdf"]
+
+    def test_expired_deadline_skips_checkpoints(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        page = FakeProgressivePage({"load": _anchor("/esg-report.pdf", "ESG Report")})
+        links = ESGScraper()._deep_scan_page(
+            page, "https://example.com/esg", deadline_s=0, checkpoints=["load"],
+        )
+        assert links == []
+        assert page.state == "commit"
+
+
+class FakeScreenshotPage(FakeProgressivePage):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.screenshot_calls = []
+
+    def screenshot(self, **kwargs):
+        self.screenshot_calls.append(kwargs)
+        return b"\xff\xd8fake-jpeg"
+
+
+class TestScanScreenshots:
+    def test_viewport_jpeg_from_scan_page(self, tmp_path, monkeypatch):
+        import esg_scraper
+        monkeypatch.setattr(esg_scraper, "SCREENSHOT_DIR", str(tmp_path / "shots"))
+        page = FakeScreenshotPage({"load": _anchor("/esg-report.pdf", "ESG Report")})
+        scraper = ESGScraper(screenshots=True)
+        scraper._deep_scan_page(page, "https://example.com/esg", deadline_s=30, checkpoints=["load"])
+
+        assert len(page.gotos) == 1
+        assert page.screenshot_calls[0]["type"] == "jpeg"
+        assert page.screenshot_calls[0]["full_page"] is False
+        path = scraper.written_screenshot("https://example.com/esg")
+        assert path.endswith(".jpg") and os.path.exists(path)
+
+    def test_failed_write_not_published(self, tmp_path, monkeypatch):
+        import esg_scraper
+        # A file where the directory should be: makedirs fails in the writer
+        blocker = tmp_path / "shots"
+        blocker.write_text("not a directory")
+        monkeypatch.setattr(esg_scraper, "SCREENSHOT_DIR", str(blocker))
+        page = FakeScreenshotPage({"load": _anchor("/esg-report.pdf", "ESG Report")})
+        scraper = ESGScraper(screenshots=True)
+        scraper._deep_scan_page(page, "https://example.com/esg", deadline_s=30, checkpoints=["load"])
+        assert scraper.written_screenshot("https://example.com/esg") is None
+
+    def test_disabled(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        page = FakeScreenshotPage({})
+        scraper = ESGScraper(screenshots=False)
+        scraper._deep_scan_page(page, "https://example.com/esg", deadline_s=30, checkpoints=["load"])
+        assert page.screenshot_calls == []
+        assert scraper.screenshot_paths == {}
+        assert scraper.written_screenshot("https://example.com/esg") is None
+
+
+class FakeElement:
+    def __init__(self, box):
+        self.box = box
+
+    def bounding_box(self):
+        return self.box
+
+
+class FakeFrame:
+    def __init__(self, url, html="", box=None):
+        self.url = url
+        self.html = html
+        self.box = box if box is not None else {"x": 0, "y": 0, "width": 600, "height": 400}
+        self.content_calls = 0
+
+    def content(self):
+        self.content_calls += 1
+        return self.html
+
+    def frame_element(self):
+        return FakeElement(self.box)
+
+
+class FakeFramedPage:
+    def __init__(self, frames):
+        self.frames = [FakeFrame("https://example.com/ir")] + frames
+
+
+class TestFrameScanning:
+    def test_scans_content_frames_and_skips_noise(self):
+        ir = FakeFrame("https://ir.q4cdn.com/widget", _anchor("/docs/2024-esg-report.pdf", "2024 ESG Report"))
+        video = FakeFrame("https://www.youtube.com/embed/abc", _anchor("/x-report.pdf", "Report"))
+        consent = FakeFrame("https://cdn.cookielaw.org/consent.html")
+        pixel = FakeFrame("https://tracker.example.net/p", box={"x": 0, "y": 0, "width": 1, "height": 1})
+        blank = FakeFrame("about:blank")
+
+        scraper = ESGScraper()
+        links = scraper.scan_frames(FakeFramedPage([ir, video, consent, pixel, blank]))
+
+        assert [l["url"] for l in links] == ["https://ir.q4cdn.com/docs/2024-esg-report.pdf"]
+        assert links[0]["text"].endswith("[Frame]")
+        assert (video.content_calls, consent.content_calls, pixel.content_calls) == (0, 0, 0)
+
+        stats = {s["url"]: s for s in scraper.frame_stats}
+        assert stats[ir.url]["links"] == 1 and stats[ir.url]["parse_ms"] is not None
+        assert stats[video.url]["skipped"].startswith("origin:")
+        assert stats[consent.url]["skipped"].startswith("pattern:")
+        assert stats[pixel.url]["skipped"].startswith("size:")
+        assert stats[blank.url]["skipped"] == "blank"
+
+
+class FakeLocator:
+    def __init__(self, page):
+        self.page = page
+        self.first = self
+
+    def count(self):
+        return 1
+
+    def click(self, timeout=None):
+        self.page.click_timeouts.append(timeout)
+        time.sleep(timeout / 1000)
+        raise TimeoutError("click timed out")
+
+
+class FakeSlowPage(FakeProgressivePage):
+    """Page that never settles: every readiness wait and click runs to its timeout."""
+
+    def __init__(self, frames=()):
+        super().__init__({"commit": _anchor("/esg-report.pdf", "ESG Report")})
+        self.frames = [FakeFrame(self.url)] + list(frames)
+        self.click_timeouts = []
+
+    def on(self, event, handler):
+        pass
+
+    def remove_listener(self, event, handler):
+        pass
+
+    def evaluate(self, script):
+        return {"quietFor": 0, "anchors": 1}
+
+    def wait_for_timeout(self, ms):
+        time.sleep(ms / 1000)
+
+    def locator(self, selector):
+        return FakeLocator(self)
+
+
+class TestExpandedDeadline:
+    def test_expanded_checkpoint_stops_at_deadline(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        widget = FakeFrame("https://ir.example.com/widget", _anchor("/2024-esg-report.pdf", "2024 ESG Report"))
+        page = FakeSlowPage([widget])
+        scraper = ESGScraper(screenshots=False)
+        start = time.monotonic()
+        links = scraper._deep_scan_page(page, "https://example.com/esg", deadline_s=1, checkpoints=["expanded"])
+
+        # Unbounded, the scroll/expander/year waits alone would take well over 10s
+        assert time.monotonic() - start < 2.5
+        assert [l["url"] for l in links] == ["https://example.com/esg-report.pdf"]
+        assert all(t <= 1000 for t in page.click_timeouts)
+        assert widget.content_calls == 0
+        assert {s["url"]: s["skipped"] for s in scraper.frame_stats}[widget.url] == "deadline"
+
+    def test_clicks_capped_at_time_left(self, tmp_path, monkeypatch):
+        scraper = ESGScraper(screenshots=False)
+        monkeypatch.setattr(scraper, "wait_until_ready", lambda page, step, max_wait_s: None)
+        page = FakeSlowPage()
+        start = time.monotonic()
+        scraper.expand_page_interaction(page, deadline=time.monotonic() + 0.5)
+        assert time.monotonic() - start < 1.5
+        assert page.click_timeouts and all(t <= 500 for t in page.click_timeouts)
+
+
+class FailingPool:
+    def run(self, fn, *args):
+        raise AssertionError("browser should not be used")
+
+
+class FakeNavResponse:
+    def __init__(self, status):
+        self.status = status
+
+
+class TestCircuitBreakerScan:
+    URL = "https://blocked.example.com/esg"
+
+    def _patch(self, tmp_path, monkeypatch, browser_domains=()):
+        import esg_scraper
+        from circuit_breaker import DomainCircuitBreaker
+        from fetch_strategy import FetchStrategyStore
+        breaker = DomainCircuitBreaker(failure_threshold=1, log=lambda *_: None)
+        store = FetchStrategyStore(path=str(tmp_path / "strategies.json"), browser_domains=list(browser_domains))
+        monkeypatch.setattr(esg_scraper, "get_circuit_breaker", lambda: breaker)
+        monkeypatch.setattr(esg_scraper, "get_strategy_store", lambda: store)
+        return breaker
+
+    def test_open_breaker_skips_browser(self, tmp_path, monkeypatch):
+        breaker = self._patch(tmp_path, monkeypatch, browser_domains=[self.URL])
+        breaker.record_failure(self.URL, "HTTP 403")
+        assert ESGScraper(pool=FailingPool()).scan_url(self.URL) == []
+        assert breaker.snapshot()["blocked.example.com"]["short_circuited"] == 1
+
+    def test_short_circuited_fast_fetch_skips_browser(self, tmp_path, monkeypatch):
+        import utils
+        from circuit_breaker import CircuitOpenError
+        self._patch(tmp_path, monkeypatch)
+
+        def refuse(url, **kwargs):
+            raise CircuitOpenError(f"Circuit open for {url}")
+
+        monkeypatch.setattr(utils, "robust_get", refuse)
+        assert ESGScraper(pool=FailingPool()).scan_url(self.URL) == []
+
+    def test_browser_navigation_counts_towards_breaker(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        breaker = self._patch(tmp_path, monkeypatch)
+        page = FakeProgressivePage({})
+        page.goto = lambda url, wait_until=None, timeout=None: FakeNavResponse(403)
+        ESGScraper()._deep_scan_page(page, self.URL, deadline_s=30, checkpoints=["load"])
+        assert breaker.snapshot()["blocked.example.com"]["last_reason"] == "HTTP 403"
+
+        page.goto = lambda url, wait_until=None, timeout=None: FakeNavResponse(200)
+        ESGScraper()._deep_scan_page(page, self.URL, deadline_s=30, checkpoints=["load"])
+        assert breaker.snapshot() == {}
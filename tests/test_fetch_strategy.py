@@ -0,0 +1,82 @@
+"""Unit tests for the per-domain fetch-strategy table."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetch_strategy import FetchStrategyStore, domain_key, TIER_HTTP, TIER_BROWSER
+from config import FETCH_STRATEGY_REPROBE_EVERY, JSON_ENDPOINT_MAX_FAILURES
+
+
+def _store(tmp_path, **kwargs):
+    return FetchStrategyStore(path=str(tmp_path / "strategies.json"), **kwargs)
+
+
+class TestDomainKey:
+    def test_strips_www_and_port(self):
+        assert domain_key("https://www.Example.com:443/esg") == "example.com"
+
+    def test_keeps_subdomain(self):
+        assert domain_key("https://sustainability.atmeta.com/") == "sustainability.atmeta.com"
+
+
+class TestFetchStrategyStore:
+    def test_unknown_domain_starts_with_http(self, tmp_path):
+        assert _store(tmp_path).choose_tier("https://example.com")[0] == TIER_HTTP
+
+    def test_seeded_browser_domain_skips_http(self, tmp_path):
+        store = _store(tmp_path, browser_domains=["https://corporate.ford.com/x"])
+        assert store.choose_tier("https://corporate.ford.com/y")[0] == TIER_BROWSER
+
+    def test_browser_preferred_after_http_fails(self, tmp_path):
+        store = _store(tmp_path)
+        url = "https://example.com/esg"
+        store.record(url, TIER_HTTP, False, 1.0)
+        store.record(url, TIER_BROWSER, True, 8.0, 12)
+        assert store.choose_tier(url)[0] == TIER_BROWSER
+
+    def test_http_success_wins_back(self, tmp_path):
+        store = _store(tmp_path)
+        url = "https://example.com/esg"
+        store.record(url, TIER_HTTP, False, 1.0)
+        store.record(url, TIER_BROWSER, True, 8.0, 12)
+        store.record(url, TIER_HTTP, True, 0.5, 10)
+        assert store.choose_tier(url)[0] == TIER_HTTP
+
+    def test_periodic_reprobe(self, tmp_path):
+        store = _store(tmp_path)
+        url = "https://example.com/esg"
+        store.record(url, TIER_HTTP, False, 1.0)
+        for _ in range(FETCH_STRATEGY_REPROBE_EVERY):
+            store.record(url, TIER_BROWSER, True, 8.0, 12)
+        tier, reason = store.choose_tier(url)
+        assert tier == TIER_HTTP
+        assert "probe" in reason
+
+    def test_persists_to_disk(self, tmp_path):
+        url = "https://example.com/esg"
+        _store(tmp_path).record(url, TIER_HTTP, True, 0.4, 7)
+        entry = _store(tmp_path).get(url)
+        assert entry["preferred"] == TIER_HTTP
+        assert entry["tiers"][TIER_HTTP]["avg_links"] == 7
+
+    def test_is_static_needs_repeat_successes(self, tmp_path):
+        store = _store(tmp_path)
+        url = "https://example.com/esg"
+        store.record(url, TIER_HTTP, True, 0.4, 7)
+        assert store.is_static(url) is False
+        for _ in range(5):
+            store.record(url, TIER_HTTP, True, 0.4, 7)
+        assert store.is_static(url) is True
+
+    def test_endpoint_memory_and_forgetting(self, tmp_path):
+        store = _store(tmp_path)
+        url = "https://example.com/esg"
+        store.record_endpoint(url, "https://example.com/api/a", 2)
+        store.record_endpoint(url, "https://example.com/api/b", 5)
+        assert _store(tmp_path).endpoints(url) == ["https://example.com/api/b", "https://example.com/api/a"]
+
+        for _ in range(JSON_ENDPOINT_MAX_FAILURES):
+            store.forget_endpoint(url, "https://example.com/api/b")
+        assert store.endpoints(url) == ["https://example.com/api/a"]
@@ -0,0 +1,170 @@
+"""Unit tests for the on-disk conditional HTTP cache (local server, no internet)."""
+
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from http_cache import HttpCache
+from circuit_breaker import DomainCircuitBreaker
+from rate_limiter import HostRateLimiter
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    etag = '"v1"'
+    blocked = False
+    requests_seen = []
+
+    def do_GET(self):
+        _Handler.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if _Handler.blocked:
+            self.send_response(403)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/hub" and self.headers.get("If-None-Match") == _Handler.etag:
+            self.send_response(304)
+            self.send_header("ETag", _Handler.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = f"<html>hub {_Handler.etag}</html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/private":
+            self.send_header("Cache-Control", "no-store")
+        else:
+            self.send_header("ETag", _Handler.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.etag = '"v1"'
+    _Handler.blocked = False
+    _Handler.requests_seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HttpCache(directory=str(tmp_path), max_bytes=10_000, html_ttl_s=3600)
+    limiter = HostRateLimiter(default_rps=1000, burst=1000, host_rps={})
+    breaker = DomainCircuitBreaker(log=lambda *_: None)
+    with patch.object(utils, "get_http_cache", return_value=cache), \
+            patch.object(utils, "get_rate_limiter", return_value=limiter), \
+            patch.object(utils, "get_circuit_breaker", return_value=breaker), \
+            patch.object(utils, "MAX_RETRIES", 0):
+        yield cache
+
+
+def base(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class TestRobustGetCache:
+    def test_fresh_hit_skips_network(self, server, cache):
+        url = f"{base(server)}/hub"
+        assert utils.robust_get(url).text == '<html>hub "v1"</html>'
+        resp = utils.robust_get(url)
+        assert resp.text == '<html>hub "v1"</html>'
+        assert resp.from_cache
+        assert len(_Handler.requests_seen) == 1
+        stats = cache.stats()
+        assert (stats["misses"], stats["hits"]) == (1, 1)
+
+    def test_stale_entry_revalidated_with_etag(self, server, cache):
+        url = f"{base(server)}/hub"
+        cache.html_ttl_s = 0
+        utils.robust_get(url)
+        resp = utils.robust_get(url)
+        assert resp.status_code == 200
+        assert resp.text == '<html>hub "v1"</html>'
+        assert _Handler.requests_seen[-1] == ("/hub", '"v1"')
+        assert cache.stats()["revalidated"] == 1
+
+    def test_changed_body_replaces_entry(self, server, cache):
+        url = f"{base(server)}/hub"
+        cache.html_ttl_s = 0
+        utils.robust_get(url)
+        _Handler.etag = '"v2"'
+        assert utils.robust_get(url).text == '<html>hub "v2"</html>'
+        assert cache.stats()["changed"] == 1
+        assert cache.lookup(url)["headers"]["ETag"] == '"v2"'
+
+    def test_streamed_response_not_cached(self, server, cache):
+        url = f"{base(server)}/hub"
+        first = utils.robust_get(url, stream=True)
+        assert first.raw.read(6) == b"<html>"
+        first.close()
+        utils.robust_get(url, stream=True, use_cache=True).close()
+        assert cache.lookup(url) is None
+        assert len(_Handler.requests_seen) == 2
+
+    def test_cached_body_readable_by_streamed_request(self, server, cache):
+        url = f"{base(server)}/hub"
+        utils.robust_get(url)
+        second = utils.robust_get(url, stream=True, use_cache=True)
+        assert second.raw.read() == b'<html>hub "v1"</html>'
+        assert second.headers["Content-Length"] == str(len(b'<html>hub "v1"</html>'))
+        assert len(_Handler.requests_seen) == 1
+
+    def test_no_store_not_cached(self, server, cache):
+        url = f"{base(server)}/private"
+        utils.robust_get(url)
+        utils.robust_get(url)
+        assert len(_Handler.requests_seen) == 2
+        assert cache.lookup(url) is None
+
+    def test_stale_copy_served_when_fetch_fails(self, server, cache):
+        url = f"{base(server)}/hub"
+        utils.robust_get(url)
+        cache.html_ttl_s = 0
+        _Handler.blocked = True
+        assert utils.robust_get(url).text == '<html>hub "v1"</html>'
+        assert cache.stats()["stale_served"] == 1
+
+    def test_cache_can_be_bypassed(self, server, cache):
+        url = f"{base(server)}/hub"
+        utils.robust_get(url, use_cache=False)
+        assert cache.lookup(url) is None
+
+
+class TestHttpCacheStore:
+    def test_lru_eviction(self, tmp_path):
+        cache = HttpCache(directory=str(tmp_path), max_bytes=300)
+        for i in range(3):
+            cache._store(f"https://example.com/{i}", {"Content-Type": "text/html"}, b"x" * 100)
+        # Touch /0 so /1 is the least recently used when /3 arrives
+        cache.serve("https://example.com/0", cache.lookup("https://example.com/0"))
+        cache._store("https://example.com/3", {"Content-Type": "text/html"}, b"x" * 100)
+        assert cache.lookup("https://example.com/1") is None
+        assert cache.lookup("https://example.com/0") is not None
+        assert not os.path.exists(tmp_path / "index.json.tmp")
+        stats = cache.stats()
+        assert (stats["entries"], stats["bytes"], stats["evicted"]) == (3, 300, 1)
+
+    def test_index_survives_restart(self, tmp_path):
+        cache = HttpCache(directory=str(tmp_path))
+        cache._store("https://example.com/r.pdf", {"Content-Type": "application/pdf", "ETag": '"a"'}, b"%PDF")
+        reloaded = HttpCache(directory=str(tmp_path))
+        entry = reloaded.lookup("https://example.com/r.pdf")
+        assert entry["headers"]["ETag"] == '"a"'
+        assert reloaded.ttl_for(entry["headers"]["Content-Type"]) == reloaded.pdf_ttl_s
@@ -0,0 +1,70 @@
+"""Unit tests for the pooled HTTP session layer (local server, no internet)."""
+
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_session import SessionManager
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestSessionManager:
+    def test_connections_are_reused(self, server):
+        manager = SessionManager(pool_maxsize=2)
+        for i in range(5):
+            assert manager.session().get(f"{server}/p{i}", timeout=5).text == "ok"
+        stats = manager.stats()
+        assert stats["requests"] == 5
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 4
+        assert stats["hosts"] == 1
+        manager.close()
+
+    def test_threads_get_own_session_but_share_pools(self, server):
+        manager = SessionManager(pool_maxsize=4)
+        sessions = []
+
+        def work():
+            s = manager.session()
+            sessions.append(s)
+            for _ in range(3):
+                s.get(server, timeout=5).close()
+
+        threads = [threading.Thread(target=work) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len({id(s) for s in sessions}) == 3
+        stats = manager.stats()
+        assert stats["requests"] == 9
+        assert stats["connections_opened"] <= 4
+        manager.close()
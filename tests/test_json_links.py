@@ -0,0 +1,80 @@
+"""Unit tests for harvesting report links from JSON payloads."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_links import extract_links_from_json, parse_json_text, JsonResponseCapture
+
+
+class FakeRequest:
+    def __init__(self, resource_type="xhr", method="GET"):
+        self.resource_type = resource_type
+        self.method = method
+
+
+class FakeResponse:
+    def __init__(self, url, body, content_type="application/json", resource_type="xhr", status=200):
+        self.url = url
+        self.status = status
+        self.headers = {"content-type": content_type}
+        self.request = FakeRequest(resource_type)
+        self._body = body
+
+    def text(self):
+        return self._body
+
+
+class FakePage:
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def remove_listener(self, event, handler):
+        self.handlers.pop(event, None)
+
+
+class TestExtractLinksFromJson:
+    def test_nested_items_use_sibling_title(self):
+        data = {"rows": [
+            {"title": "2023 Sustainability Report", "file": {"url": "/files/2023.pdf"}},
+            {"title": "Careers", "link": "/careers"},
+        ]}
+        links = extract_links_from_json(data, "https://example.com/api/reports")
+        assert [l["url"] for l in links] == ["https://example.com/files/2023.pdf"]
+        assert links[0]["text"].startswith("2023 Sustainability Report")
+
+    def test_skips_images_and_excluded(self):
+        data = [{"name": "ESG Report cover", "image": "/img/esg-report.png"},
+                {"name": "Privacy Policy", "href": "/privacy-policy.pdf"}]
+        assert extract_links_from_json(data, "https://example.com/") == []
+
+    def test_html_snippet_in_title_field(self):
+        data = {"text": '<p><a href="/docs/impact-report.pdf">Impact Report</a></p>'}
+        links = extract_links_from_json(data, "https://example.com/")
+        assert [l["url"] for l in links] == ["https://example.com/docs/impact-report.pdf"]
+
+    def test_parse_json_text_handles_xssi_prefix(self):
+        assert parse_json_text(")]}'\n{\"a\": 1}") == {"a": 1}
+        assert parse_json_text("<html>") is None
+
+
+class TestJsonResponseCapture:
+    def test_harvest_tracks_replayable_endpoints(self):
+        page = FakePage()
+        capture = JsonResponseCapture(page)
+        on_response = page.handlers["response"]
+        on_response(FakeResponse("https://example.com/api/list",
+                                 '{"items": [{"title": "ESG Report", "pdf": "/r/esg.pdf"}]}'))
+        on_response(FakeResponse("https://example.com/app.js", "{}", resource_type="script"))
+        on_response(FakeResponse("https://example.com/page", "<html>", content_type="text/html"))
+
+        links = capture.harvest("https://example.com/esg")
+        assert [l["url"] for l in links] == ["https://example.com/r/esg.pdf"]
+        assert capture.endpoint_hits == {"https://example.com/api/list": 1}
+
+        capture.detach()
+        assert "response" not in page.handlers
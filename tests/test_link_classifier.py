@@ -0,0 +1,57 @@
+"""Unit tests for the precompiled link classifier."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selectolax.parser import HTMLParser
+
+from config import REPORT_KEYWORDS, EXCLUDE_KEYWORDS
+from link_classifier import LinkClassifier, DomContext, get_link_classifier
+from esg_scraper import ESGScraper
+from scripts.bench_link_classifier import legacy_get_report_links, synthesize_hub
+
+
+class TestLinkClassifier:
+    def test_score_matches_keyword_loops(self):
+        c = get_link_classifier()
+        samples = [
+            ("2023 sustainability report", "/docs/esg-2023.pdf"),
+            ("annual reports", "/investor/annual-report-2024"),
+            ("download", "/files/climate_tcfd.pdf"),
+            ("careers", "/jobs"),
+        ]
+        for text, href in samples:
+            expected = sum(1 for kw in REPORT_KEYWORDS if kw in text or kw in href)
+            excluded = any(exc in text or exc in href for exc in EXCLUDE_KEYWORDS)
+            assert c.score(text, href) == (None if excluded else expected)
+
+    def test_overlapping_keywords_all_count(self):
+        c = LinkClassifier(report_keywords=["report", "reports", "port"], exclude_keywords=[])
+        assert c.keyword_score("annual reports") == 3
+
+    def test_clean_junk_only_when_matched(self):
+        c = get_link_classifier()
+        assert c.clean_junk("ESG Report (opens in a new window)").strip() == "ESG Report"
+        assert c.clean_junk("ESG Report") == "ESG Report"
+
+
+class TestDomContext:
+    def test_preceding_header_is_shared_across_list(self):
+        html = "<h3>2022 Reports</h3><ul>" + "".join(
+            f'<li><a href="/r{i}.pdf">PDF</a></li>' for i in range(50)) + "</ul>"
+        anchors = HTMLParser(html).css("a")
+        dom = DomContext()
+        assert {dom.preceding_header(a) for a in anchors} == {"2022 Reports"}
+
+    def test_no_header(self):
+        a = HTMLParser('<div><a href="/x">x</a></div>').css_first("a")
+        assert DomContext().preceding_header(a) is None
+
+
+class TestGetReportLinksEquivalence:
+    def test_matches_legacy_implementation(self):
+        html = synthesize_hub(600, section_size=150)
+        base = "https://example.com/reports"
+        assert ESGScraper().get_report_links(html, base) == legacy_get_report_links(html, base)
@@ -0,0 +1,102 @@
+"""Unit tests for the adaptive page readiness wait."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from page_readiness import wait_for_ready
+
+
+class FakeRequest:
+    def __init__(self, resource_type="xhr"):
+        self.resource_type = resource_type
+
+
+class FakePage:
+    """Minimal stand-in for a Playwright page driven by a virtual clock."""
+
+    def __init__(self, settle_after_polls=0, anchors=10):
+        self.handlers = {}
+        self.polls = 0
+        self.settle_after_polls = settle_after_polls
+        self.anchors = anchors
+        self.quiet_for = 0.0
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.handlers[event].remove(handler)
+
+    def emit(self, event, request):
+        for h in list(self.handlers.get(event, [])):
+            h(request)
+
+    def evaluate(self, script):
+        self.polls += 1
+        if self.polls <= self.settle_after_polls:
+            # Still mutating: new anchors keep appearing
+            self.anchors += 1
+            self.quiet_for = 0.0
+        return {"quietFor": self.quiet_for, "anchors": self.anchors}
+
+    def wait_for_timeout(self, ms):
+        import time
+        time.sleep(ms / 1000)
+        self.quiet_for += ms
+
+
+class TestWaitForReady:
+    def test_returns_quiescent_for_static_page(self):
+        page = FakePage()
+        stats = wait_for_ready(page, max_wait_ms=2000, quiet_ms=30, poll_ms=10)
+        assert stats["reason"] == "quiescent"
+        assert stats["waited_ms"] < 2000
+        assert stats["anchors"] == 10
+
+    def test_times_out_when_dom_keeps_changing(self):
+        page = FakePage(settle_after_polls=10_000)
+        stats = wait_for_ready(page, max_wait_ms=100, quiet_ms=30, poll_ms=10)
+        assert stats["reason"] == "timeout"
+
+    def test_waits_for_pending_requests(self):
+        page = FakePage()
+        req = FakeRequest("xhr")
+        # Register listeners, then fire a request that never finishes
+        original_evaluate = page.evaluate
+
+        def evaluate(script):
+            if page.polls == 0:
+                page.emit("request", req)
+            return original_evaluate(script)
+
+        page.evaluate = evaluate
+        stats = wait_for_ready(page, max_wait_ms=100, quiet_ms=10, poll_ms=10)
+        assert stats["reason"] == "timeout"
+        assert stats["pending_requests"] == 1
+
+    def test_ignores_long_lived_resource_types(self):
+        page = FakePage()
+
+        def evaluate(script, _orig=page.evaluate):
+            if page.polls == 0:
+                page.emit("request", FakeRequest("websocket"))
+            return _orig(script)
+
+        page.evaluate = evaluate
+        stats = wait_for_ready(page, max_wait_ms=1000, quiet_ms=10, poll_ms=10)
+        assert stats["reason"] == "quiescent"
+
+    def test_max_wait_capped_by_config(self, monkeypatch):
+        import page_readiness
+        monkeypatch.setattr(page_readiness, "READINESS_MAX_WAIT_MS", 100)
+        page = FakePage(settle_after_polls=10_000)
+        stats = wait_for_ready(page, max_wait_ms=5000, quiet_ms=30, poll_ms=10)
+        assert stats["reason"] == "timeout"
+        assert stats["waited_ms"] < 1000
+
+    def test_listeners_are_removed(self):
+        page = FakePage()
+        wait_for_ready(page, max_wait_ms=200, quiet_ms=10, poll_ms=10)
+        assert all(not handlers for handlers in page.handlers.values())
@@ -0,0 +1,80 @@
+"""Unit tests for streamed, size-capped PDF downloads."""
+
+import sys
+import os
+import hashlib
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_download import spool_response, PdfTooLargeError
+
+BODY = b"%PDF-1.4\n" + bytes(range(256)) * 400      # ~100KB
+
+
+class FakeResponse:
+    """The slice of a streamed requests response spool_response reads."""
+
+    def __init__(self, body, headers=None, chunk=8192):
+        self.body = body
+        self.headers = headers or {}
+        self.chunk = chunk
+        self.read_bytes = 0
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), self.chunk):
+            self.read_bytes += len(self.body[i:i + self.chunk])
+            yield self.body[i:i + self.chunk]
+
+
+class TestSpoolResponse:
+    def test_small_body_stays_in_memory(self):
+        with spool_response(FakeResponse(BODY), threshold=1_000_000) as pdf:
+            assert pdf.path is None
+            assert pdf.source() == BODY
+            assert pdf.size == len(BODY)
+            assert pdf.sha256 == hashlib.sha256(BODY).hexdigest()
+
+    def test_big_body_rolls_over_to_disk(self, tmp_path):
+        with spool_response(FakeResponse(BODY), threshold=10_000) as pdf:
+            path = pdf.source()
+            assert path == pdf.path and os.path.exists(path)
+            with open(path, "rb") as f:
+                assert f.read() == BODY
+            view = pdf.open()
+            assert view[:8] == b"%PDF-1.4"
+            assert view.read() == BODY
+            view.close()
+            assert pdf.sha256 == hashlib.sha256(BODY).hexdigest()
+        assert not os.path.exists(path)
+
+    def test_prefix_counted_in_body_and_hash(self):
+        with spool_response(FakeResponse(BODY[4:]), prefix=BODY[:4]) as pdf:
+            assert pdf.source() == BODY
+            assert pdf.sha256 == hashlib.sha256(BODY).hexdigest()
+
+    def test_cap_stops_stream_and_removes_spool(self, tmp_path, monkeypatch):
+        import tempfile
+        monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+        resp = FakeResponse(BODY)
+        with pytest.raises(PdfTooLargeError):
+            spool_response(resp, max_bytes=50_000, threshold=10_000)
+        assert resp.read_bytes <= 50_000 + resp.chunk
+        assert list(tmp_path.iterdir()) == []
+
+    def test_declared_length_over_cap_rejected_before_reading(self):
+        resp = FakeResponse(BODY, headers={"Content-Length": str(len(BODY))})
+        with pytest.raises(PdfTooLargeError):
+            spool_response(resp, max_bytes=1000)
+        assert resp.read_bytes == 0
+
+    @pytest.mark.parametrize("threshold", [10_000, 1_000_000])
+    def test_add_to_zip(self, tmp_path, threshold):
+        archive = tmp_path / "out.zip"
+        with spool_response(FakeResponse(BODY), threshold=threshold) as pdf, \
+                zipfile.ZipFile(archive, "w") as zf:
+            pdf.add_to_zip(zf, "report.pdf")
+        with zipfile.ZipFile(archive) as zf:
+            assert zf.read("report.pdf") == BODY
@@ -0,0 +1,56 @@
+"""Unit tests for the PDF parse process pool."""
+
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_pool import PdfParsePool, PdfParseError, PdfParseTimeout, read_pdf_text
+from tests.test_async_fetch import make_pdf
+
+
+@pytest.fixture
+def pool():
+    pool = PdfParsePool(workers=2, timeout=60)
+    yield pool
+    pool.shutdown()
+
+
+class TestReadPdfText:
+    def test_pages_and_text(self):
+        parsed = read_pdf_text(make_pdf("Acme Sustainability Report 2024"))
+        assert parsed["pages"] == 1
+        assert "Acme Sustainability Report 2024" in parsed["text"][0]
+
+    def test_garbage_raises(self):
+        with pytest.raises(PdfParseError):
+            read_pdf_text(b"%PDF-1.4 not really a pdf")
+
+
+class TestPdfParsePool:
+    def test_bytes_and_paths_parsed_in_workers(self, pool, tmp_path):
+        data = make_pdf("Acme Annual Review")
+        path = tmp_path / "report.pdf"
+        path.write_bytes(data)
+        assert "Acme Annual Review" in pool.parse(data)["text"][0]
+        assert pool.parse(str(path))["pages"] == 1
+        assert pool.stats["parsed"] == 2
+
+    def test_worker_errors_propagate(self, pool):
+        with pytest.raises(PdfParseError):
+            pool.parse(b"garbage")
+
+    def test_timeout_recycles_pool(self, pool):
+        data = make_pdf("Acme ESG Report")
+        with pytest.raises(PdfParseTimeout):
+            pool.parse(data, timeout=0.001)
+        assert pool.stats["restarts"] == 1
+        # A fresh pool takes the next document
+        assert pool.parse(data)["pages"] == 1
+
+    def test_in_thread_fallback(self, tmp_path):
+        pool = PdfParsePool(in_process=False)
+        assert pool.parse(make_pdf("Acme Report"))["pages"] == 1
+        assert pool.stats["in_thread"] == 1
@@ -0,0 +1,65 @@
+"""Unit tests for extracted-text sidecars."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_sidecar
+from pdf_sidecar import build_sidecar, encode_sidecar, decode_sidecar, ensure_sidecar, load_sidecar
+from pdf_store import PdfStore, sha256_file
+from utils import inspect_parsed_pdf
+from tests.test_range_file import make_pdf
+
+PARSED = {"pages": 2, "title": "Acme Sustainability Report",
+          "text": ["Acme Corp sustainability report, fiscal 2023", "Emissions fell 12%"]}
+
+
+class TestSidecarFormat:
+    def test_round_trip(self):
+        sidecar = build_sidecar(PARSED, "ab" * 32)
+        assert sidecar["year"] == "2023"
+        assert decode_sidecar(encode_sidecar(sidecar)) == sidecar
+
+    def test_garbage_and_old_versions_rejected(self):
+        assert decode_sidecar(b"not gzip") is None
+        old = dict(build_sidecar(PARSED, "ab" * 32), version=0)
+        assert decode_sidecar(encode_sidecar(old)) is None
+
+    def test_verification_reads_sidecar(self):
+        sidecar = build_sidecar(PARSED, "ab" * 32)
+        result, reason, pages = inspect_parsed_pdf(sidecar, "https://acme.com/r.pdf", "Report", "Acme Corp")
+        assert reason is None and pages == 2
+        assert result["title"] == "Acme Sustainability Report"
+
+
+class TestEnsureSidecar:
+    def test_extracted_once_then_loaded(self, tmp_path, monkeypatch):
+        store = PdfStore(directory=str(tmp_path / "store"))
+        pdf_path = store.put_bytes("https://acme.com/r.pdf", make_pdf("Acme 2024 ESG Report", extra_pages=3, pad=10))
+        sha = sha256_file(pdf_path)
+        sidecar = ensure_sidecar(pdf_path, sha, store=store)
+        assert sidecar["pages"] == 4
+        assert "Acme 2024 ESG Report" in sidecar["text"][0]
+        assert sidecar["text"][3].strip() == "Page 4"
+        assert sidecar["year"] == "2024"
+        assert os.path.exists(store.sidecar_path(sha))
+
+        # The second call doesn't parse the PDF again
+        monkeypatch.setattr(pdf_sidecar, "get_pdf_pool", lambda: None)
+        assert ensure_sidecar(pdf_path, sha, store=store) == sidecar
+
+    def test_unparseable_pdf(self, tmp_path):
+        store = PdfStore(directory=str(tmp_path))
+        bad = tmp_path / "bad.pdf"
+        bad.write_bytes(b"%PDF-1.4 truncated")
+        assert ensure_sidecar(str(bad), store=store) is None
+        assert load_sidecar(sha256_file(str(bad)), store=store) is None
+
+    def test_evicted_with_its_pdf(self, tmp_path):
+        store = PdfStore(directory=str(tmp_path), max_bytes=150)
+        first = store.put_bytes("https://a.com/0.pdf", b"0" * 100)
+        sha = sha256_file(first)
+        pdf_sidecar.save_sidecar(build_sidecar(PARSED, sha), store=store)
+        store.put_bytes("https://a.com/1.pdf", b"1" * 100)
+        assert not os.path.exists(store.sidecar_path(sha))
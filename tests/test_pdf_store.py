@@ -0,0 +1,104 @@
+"""Unit tests for the content-addressed local PDF store."""
+
+import sys
+import os
+import concurrent.futures
+import hashlib
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_store import PdfStore, open_mmap
+from pdf_download import spool_response
+from tests.test_pdf_download import FakeResponse
+
+BODY = b"%PDF-1.4\n" + b"report" * 20_000
+URL = "https://www.acme.com/esg/2024-report.pdf?utm_source=newsletter"
+
+
+def spooled(body=BODY, threshold=10_000):
+    return spool_response(FakeResponse(body), threshold=threshold)
+
+
+class TestPdfStore:
+    def test_put_and_path(self, tmp_path):
+        store = PdfStore(directory=str(tmp_path))
+        assert store.path(URL) is None
+        with spooled() as pdf:
+            path = store.put(URL, pdf, validator='etag:"a"')
+        sha = hashlib.sha256(BODY).hexdigest()
+        assert path.endswith(f"{sha}.pdf")
+        # Tracking parameters don't split the URL key
+        assert store.path("https://www.acme.com/esg/2024-report.pdf") == path
+        assert store.lookup(URL)["validator"] == 'etag:"a"'
+        view = open_mmap(path)
+        assert view[:] == BODY
+        view.close()
+
+    def test_in_memory_spool_stored(self, tmp_path):
+        store = PdfStore(directory=str(tmp_path))
+        with spooled(threshold=10_000_000) as pdf:
+            path = store.put(URL, pdf)
+        with open(path, "rb") as f:
+            assert f.read() == BODY
+
+    def test_same_bytes_stored_once(self, tmp_path):
+        store = PdfStore(directory=str(tmp_path))
+        first = store.put_bytes(URL, BODY)
+        second = store.put_bytes("https://cdn.acme.com/report.pdf", BODY)
+        assert first == second
+        stats = store.stats()
+        assert (stats["files"], stats["urls"], stats["stored"], stats["deduplicated"]) == (1, 2, 1, 1)
+
+    def test_concurrent_puts_of_same_pdf(self, tmp_path):
+        store = PdfStore(directory=str(tmp_path))
+        urls = [f"https://mirror{i}.acme.com/report.pdf" for i in range(8)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+            paths = list(pool.map(lambda u: store.put_bytes(u, BODY), urls))
+        assert len(set(paths)) == 1 and None not in paths
+        with open(paths[0], "rb") as f:
+            assert f.read() == BODY
+        assert not [n for n in os.listdir(os.path.dirname(paths[0])) if n.endswith(".tmp")]
+        stats = store.stats()
+        assert stats["stored"] + stats["deduplicated"] == 8 and stats["urls"] == 8
+
+    def test_alias_and_hash_lookup(self, tmp_path):
+        store = PdfStore(directory=str(tmp_path))
+        path = store.put_bytes(URL, BODY)
+        sha = hashlib.sha256(BODY).hexdigest()
+        store.alias("https://x.supabase.co/storage/v1/object/public/esg/ACME/r.pdf", sha)
+        assert store.path("https://x.supabase.co/storage/v1/object/public/esg/ACME/r.pdf") == path
+        assert store.path(sha256=sha) == path
+        assert store.path(sha256="0" * 64) is None
+
+    def test_url_mapping_expires(self, tmp_path):
+        store = PdfStore(directory=str(tmp_path), url_ttl_s=60)
+        store.put_bytes(URL, BODY)
+        store._urls[next(iter(store._urls))]["stored_at"] -= 120
+        assert store.path(URL) is None
+        # ...but the file is still found by hash
+        assert store.path(sha256=hashlib.sha256(BODY).hexdigest()) is not None
+
+    def test_lru_eviction(self, tmp_path):
+        store = PdfStore(directory=str(tmp_path), max_bytes=250)
+        bodies = [bytes([i]) * 100 for i in range(3)]
+        store.put_bytes("https://a.com/0.pdf", bodies[0])
+        store.put_bytes("https://a.com/1.pdf", bodies[1])
+        time.sleep(0.01)
+        store.path("https://a.com/0.pdf")           # /1 is now least recently used
+        store.put_bytes("https://a.com/2.pdf", bodies[2])
+        assert store.path("https://a.com/1.pdf") is None
+        assert store.path("https://a.com/0.pdf") is not None
+        assert not os.path.exists(store.blob_path(hashlib.sha256(bodies[1]).hexdigest()))
+        assert store.stats()["evicted"] == 1
+
+    def test_index_survives_restart(self, tmp_path):
+        store = PdfStore(directory=str(tmp_path))
+        path = store.put_file(URL, _write(tmp_path / "in.pdf", BODY))
+        assert os.path.exists(tmp_path / "in.pdf")
+        assert PdfStore(directory=str(tmp_path)).path(URL) == path
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return str(path)
@@ -0,0 +1,145 @@
+"""Unit tests for the HTTP range-backed file used for PDF verification (local server)."""
+
+import sys
+import os
+import io
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from range_file import HttpRangeFile, RangeReadError, supports_ranges, verify_pdf_ranges
+
+
+def make_pdf(first_page_text, extra_pages=20, pad=3_000_000):
+    """PDF whose first page has `first_page_text`, followed by a big padding stream."""
+    texts = [first_page_text] + [f"Page {i}" for i in range(2, extra_pages + 2)]
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(texts)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(texts)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {5 + 2 * i} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Length %d >>\nstream\n" % pad + b"\0" * pad + b"\nendstream")
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+PDF = make_pdf("Acme Corp Sustainability Report 2024")
+DATA = bytes(range(256)) * 4000   # 1,024,000 bytes of known content
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = PDF if self.path.endswith(".pdf") else DATA
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if match and not self.path.startswith("/norange"):
+            start, end = int(match.group(1)), int(match.group(2))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+            body = body[start:end + 1]
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestHttpRangeFile:
+    def test_reads_and_seeks(self, server):
+        f = HttpRangeFile(f"{server}/data", len(DATA), block_size=1000)
+        f.seek(2500)
+        assert f.read(10) == DATA[2500:2510]
+        f.seek(-5, io.SEEK_END)
+        assert f.read() == DATA[-5:]
+        assert f.tell() == len(DATA)
+        assert f.read(10) == b""
+        assert f.requests == 2
+        assert f.bytes_fetched == 2000
+
+    def test_blocks_are_cached_and_runs_coalesced(self, server):
+        f = HttpRangeFile(f"{server}/data", len(DATA), block_size=1000)
+        f.seek(100)
+        assert f.read(3500) == DATA[100:3600]     # blocks 0-3 in one request
+        f.seek(0)
+        assert f.read(3600) == DATA[:3600]        # all cached
+        assert f.requests == 1
+
+    def test_block_cache_is_bounded(self, server):
+        f = HttpRangeFile(f"{server}/data", len(DATA), block_size=1000, max_blocks=3)
+        for pos in range(0, 10_000, 1000):
+            f.seek(pos)
+            assert f.read(1) == DATA[pos:pos + 1]
+        assert len(f._blocks) == 3
+
+    def test_first_block_reused(self, server):
+        f = HttpRangeFile(f"{server}/data", len(DATA), block_size=1000, first_block=DATA[:2500])
+        assert f.read(2000) == DATA[:2000]
+        assert f.requests == 0
+
+    def test_server_ignoring_ranges(self, server):
+        f = HttpRangeFile(f"{server}/norange/data", len(DATA), block_size=1000)
+        with pytest.raises(RangeReadError):
+            f.read(10)
+        assert isinstance(f.error, RangeReadError)
+
+    def test_fetch_budget(self, server):
+        f = HttpRangeFile(f"{server}/data", len(DATA), block_size=1000, max_fetch_bytes=1500)
+        f.read(1000)
+        with pytest.raises(RangeReadError):
+            f.read(1000)
+
+    def test_supports_ranges(self):
+        assert supports_ranges({"Accept-Ranges": "bytes"})
+        assert not supports_ranges({"Accept-Ranges": "none"})
+        assert not supports_ranges({"Accept-Ranges": "bytes", "Content-Encoding": "gzip"})
+
+
+class TestVerifyPdfRanges:
+    def test_verifies_big_pdf_with_small_reads(self, server):
+        url = f"{server}/acme-sustainability-2024.pdf"
+        result = verify_pdf_ranges(url, len(PDF), PDF[:131_072], "Download", "Acme Corp")
+        assert result["body"] == "Verified PDF Report"
+        assert result["href"] == url
+
+    def test_wrong_company(self, server):
+        url = f"{server}/acme-sustainability-2024.pdf"
+        assert verify_pdf_ranges(url, len(PDF), PDF[:131_072], "Report", "Globex") is None
+
+    def test_range_failure_raises_for_fallback(self, server):
+        url = f"{server}/norange/acme-sustainability-2024.pdf"
+        with pytest.raises(RangeReadError):
+            verify_pdf_ranges(url, len(PDF), PDF[:131_072], "Report", "Acme Corp")
@@ -0,0 +1,61 @@
+"""Unit tests for the per-host token-bucket rate limiter."""
+
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import HostRateLimiter, parse_retry_after
+from config import RATE_LIMIT_DECREASE
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after("7") == 7.0
+
+    def test_http_date(self):
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        header = format_datetime(now + timedelta(seconds=30), usegmt=True)
+        assert parse_retry_after(header, now=now) == 30.0
+
+    def test_invalid(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+
+class TestHostRateLimiter:
+    def test_burst_then_paced(self):
+        limiter = HostRateLimiter(default_rps=2.0, burst=2, host_rps={})
+        waits = [limiter.reserve("https://example.com/a") for _ in range(4)]
+        assert waits[0] == 0 and waits[1] == 0
+        assert 0.4 < waits[2] <= 0.5
+        assert 0.9 < waits[3] <= 1.0
+
+    def test_hosts_are_independent(self):
+        limiter = HostRateLimiter(default_rps=1.0, burst=1, host_rps={})
+        limiter.reserve("https://a.example.com/")
+        assert limiter.reserve("https://b.example.com/") == 0
+
+    def test_retry_after_pauses_host_and_lowers_rate(self):
+        limiter = HostRateLimiter(default_rps=2.0, burst=4, host_rps={})
+        limiter.reserve("https://www.example.com/x")
+        pause = limiter.penalize("https://example.com/y", 429, "5")
+        assert pause == 5.0
+        assert limiter.reserve("https://example.com/z") >= 4.9
+        stats = limiter.stats()["example.com"]
+        assert stats["rate"] == 2.0 * RATE_LIMIT_DECREASE
+        assert stats["throttled"] == 1
+
+    def test_success_recovers_rate_up_to_base(self):
+        limiter = HostRateLimiter(default_rps=1.0, burst=1, host_rps={})
+        limiter.penalize("https://example.com/", 429, "0")
+        for _ in range(20):
+            limiter.record_success("https://example.com/")
+        assert limiter.stats()["example.com"]["rate"] == 1.0
+
+    def test_host_override(self):
+        limiter = HostRateLimiter(default_rps=5.0, burst=1, host_rps={"duckduckgo.com": 0.5})
+        limiter.reserve("duckduckgo.com")
+        assert 1.9 < limiter.reserve("duckduckgo.com") <= 2.0
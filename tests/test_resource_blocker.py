@@ -0,0 +1,64 @@
+"""Unit tests for the Playwright resource blocker."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resource_blocker import ResourceBlocker
+
+
+class FakeRoute:
+    def __init__(self):
+        self.action = None
+
+    def continue_(self):
+        self.action = "continue"
+
+    def abort(self, reason=None):
+        self.action = "abort"
+
+
+class FakeFrame:
+    def __init__(self, page):
+        self.page = page
+
+
+class FakeRequest:
+    def __init__(self, resource_type, url, page=None):
+        self.resource_type = resource_type
+        self.url = url
+        self.frame = FakeFrame(page)
+
+
+class TestResourceBlocker:
+    def test_blocks_by_type(self):
+        b = ResourceBlocker(resource_types=["image"], domains=[])
+        assert b.should_block("image", "https://example.com/a.png") == "type:image"
+        assert b.should_block("document", "https://example.com/") is None
+
+    def test_blocks_by_domain_and_subdomain(self):
+        b = ResourceBlocker(resource_types=[], domains=["hotjar.com"])
+        assert b.should_block("script", "https://static.hotjar.com/c.js") == "domain:hotjar.com"
+        assert b.should_block("script", "https://nothotjar.com/c.js") is None
+
+    def test_handle_aborts_and_counts(self):
+        page = object()
+        b = ResourceBlocker(resource_types=["font"], domains=["doubleclick.net"])
+
+        r1 = FakeRoute()
+        b._handle(r1, FakeRequest("font", "https://example.com/f.woff2", page))
+        r2 = FakeRoute()
+        b._handle(r2, FakeRequest("script", "https://ad.doubleclick.net/x.js", page))
+        r3 = FakeRoute()
+        b._handle(r3, FakeRequest("document", "https://example.com/esg", page))
+
+        assert (r1.action, r2.action, r3.action) == ("abort", "abort", "continue")
+        assert b.stats["blocked_requests"] == 2
+        assert b.stats["blocked_bytes_est"] > 0
+        assert b.stats["by_domain"] == {"doubleclick.net": 1}
+
+        per_page = b.page_stats(page)
+        assert per_page["blocked_requests"] == 2
+        b.forget(page)
+        assert b.page_stats(page)["blocked_requests"] == 0
@@ -0,0 +1,300 @@
+"""Unit tests for the staged search pipeline."""
+
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_pipeline import SearchPipeline, SearchRun, stream_events
+
+
+def _quiet(msg):
+    pass
+
+
+def new_run(workers=4):
+    return SearchRun({"reports": [], "search_log": []}, workers=workers, log=_quiet)
+
+
+def report(href, title="Report"):
+    return {"href": href, "title": title, "body": "Verified PDF Report"}
+
+
+class TestSearchPipeline:
+    def test_independent_stages_overlap(self):
+        pipeline = SearchPipeline()
+        both_running = threading.Barrier(2, timeout=2)
+        pipeline.add("a", lambda run: both_running.wait())
+        pipeline.add("b", lambda run: both_running.wait())
+        run = new_run()
+        pipeline.run(run)
+        run.close()
+        assert set(run.timings) == {"a", "b"}
+
+    def test_after_orders_stages(self):
+        order = []
+        pipeline = SearchPipeline()
+        pipeline.add("first", lambda run: (time.sleep(0.05), order.append("first")))
+        pipeline.add("second", lambda run: order.append("second"), after=["first"])
+        pipeline.run(new_run())
+        assert order == ["first", "second"]
+
+    def test_timings_and_summary_logged(self):
+        pipeline = SearchPipeline()
+        pipeline.add("scan", lambda run: "3 reports")
+        run = new_run()
+        pipeline.run(run)
+        assert any(line.startswith("Stage scan: ") and line.endswith("(3 reports)")
+                   for line in run.results["search_log"])
+
+    def test_skip_checked_when_predecessors_finish(self):
+        pipeline = SearchPipeline()
+        pipeline.add("crawl", lambda run: run.add_report(report("https://a/1.pdf")))
+        pipeline.add("fallback", lambda run: pytest.fail("should be skipped"), after=["crawl"],
+                     skip=lambda run: f"{run.report_count()} reports already" if run.report_count() else None)
+        run = new_run()
+        pipeline.run(run)
+        assert "Stage fallback: skipped (1 reports already)" in run.results["search_log"]
+
+    def test_skipped_stage_releases_dependents(self):
+        ran = []
+        pipeline = SearchPipeline()
+        pipeline.add("a", lambda run: None, skip=lambda run: "not needed")
+        pipeline.add("b", lambda run: ran.append("b"), after=["a"])
+        pipeline.run(new_run())
+        assert ran == ["b"]
+
+    def test_stop_skips_unstarted_stages(self):
+        pipeline = SearchPipeline()
+        pipeline.add("scan", lambda run: run.stop("deep scan found reports"))
+        pipeline.add("crawl", lambda run: pytest.fail("should be skipped"), after=["scan"])
+        run = new_run()
+        pipeline.run(run)
+        assert "Stage crawl: skipped (deep scan found reports)" in run.results["search_log"]
+
+    def test_failed_stage_is_logged_and_others_continue(self):
+        def boom(run):
+            raise RuntimeError("DDG down")
+        pipeline = SearchPipeline()
+        pipeline.add("a", boom)
+        pipeline.add("b", lambda run: "ok", after=["a"])
+        run = new_run()
+        pipeline.run(run)
+        log = run.results["search_log"]
+        assert any("Stage a:" in line and "RuntimeError: DDG down" in line for line in log)
+        assert any(line.startswith("Stage b:") and "(ok)" in line for line in log)
+
+    def test_unknown_or_duplicate_stage_rejected(self):
+        pipeline = SearchPipeline()
+        with pytest.raises(ValueError):
+            pipeline.add("b", lambda run: None, after=["a"])
+        pipeline.add("a", lambda run: None)
+        with pytest.raises(ValueError):
+            pipeline.add("a", lambda run: None)
+
+
+class TestSearchRun:
+    def test_add_report_dedupes_and_caps(self):
+        run = new_run()
+        assert run.add_report(report("https://a/1.pdf"), source="Official Site")
+        assert not run.add_report(report("https://a/1.pdf"))
+        assert run.add_report(report("https://a/2.pdf"), cap=2)
+        assert not run.add_report(report("https://a/3.pdf"), cap=2)
+        assert run.results["reports"][0]["source"] == "Official Site"
+        run.close()
+
+    def test_verify_runs_on_shared_executor(self):
+        active = [0]
+        peak = [0]
+        lock = threading.Lock()
+
+        def verify(href, title):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return report(href, title) if href.endswith(".pdf") else None
+
+        run = new_run(workers=2)
+        candidates = [{"href": f"https://a/{i}.pdf", "title": "r"} for i in range(5)]
+        candidates.append({"href": "https://a/page", "title": "r"})
+        assert run.verify(candidates, verify, source="Web Search") == 5
+        assert peak[0] <= 2
+        run.close()
+
+    def test_verify_skips_hrefs_claimed_by_another_stage(self):
+        calls = []
+
+        def verify(href, title):
+            calls.append(href)
+            return None
+
+        run = new_run()
+        run.verify([{"href": "https://a/1.pdf", "title": "r"}], verify)
+        run.verify([{"href": "https://a/1.pdf", "title": "r"}, {"href": "https://a/2.pdf", "title": "r"}], verify)
+        assert sorted(calls) == ["https://a/1.pdf", "https://a/2.pdf"]
+        run.close()
+
+    def test_verify_stops_at_cap(self):
+        run = new_run(workers=1)
+        candidates = [{"href": f"https://a/{i}.pdf", "title": "r"} for i in range(10)]
+        assert run.verify(candidates, lambda h, t: report(h), cap=3) == 3
+        assert run.report_count() == 3
+        run.close()
+
+    def test_domains_record_verified_and_touched_urls(self):
+        run = new_run()
+        run.verify([{"href": "https://www.Acme.com/esg.pdf", "title": "r"}], lambda h, t: None)
+        run.touch("https://ir.acme.com:443/reports")
+        assert run.domains == {"acme.com", "ir.acme.com"}
+        run.close()
+
+    def test_map_logs_failures(self):
+        lines = []
+        run = SearchRun({}, workers=2, log=lines.append)
+
+        def fn(x):
+            if x == 2:
+                raise ValueError("bad")
+            return x * 10
+
+        assert sorted(r for _, r in run.map(fn, [1, 2, 3]) if r) == [10, 30]
+        assert any("ValueError" in line for line in lines)
+        run.close()
+
+
+class TestDeadlineAndTarget:
+    def test_deadline_returns_partial_results(self):
+        release = threading.Event()
+        pipeline = SearchPipeline()
+
+        def slow(run):
+            run.add_report(report("https://a/1.pdf"))
+            release.wait(5)
+
+        pipeline.add("crawl", slow)
+        pipeline.add("ungc", lambda run: pytest.fail("should be skipped"), after=["crawl"])
+        run = SearchRun({"reports": [], "search_log": []}, deadline_s=0.2, log=_quiet)
+        start = time.monotonic()
+        pipeline.run(run)
+        run.close()
+        release.set()
+        assert time.monotonic() - start < 2
+        log = run.results["search_log"]
+        assert any(line.startswith("Stage crawl: cut off at the deadline") for line in log)
+        assert "Stage ungc: skipped (deadline reached)" in log
+        assert run.results["partial"] is True
+        assert len(run.results["reports"]) == 1
+
+    def test_closed_run_drops_late_writes(self):
+        run = new_run()
+        run.close()
+        assert not run.add_report(report("https://a/1.pdf"))
+        run.note("late")
+        run.set("description", "late")
+        assert run.results == {"reports": [], "search_log": []}
+
+    def test_verify_in_score_order(self):
+        order = []
+
+        def verify(href, title):
+            order.append(href)
+            return None
+
+        run = new_run(workers=1)
+        run.verify([
+            {"href": "https://a/contact", "title": "Contact us"},
+            {"href": "https://a/esg-report-2023.pdf", "title": "ESG Report 2023"},
+            {"href": "https://a/esg-report-2024.pdf", "title": "ESG Report 2024"},
+        ], verify)
+        run.close()
+        assert order == ["https://a/esg-report-2024.pdf", "https://a/esg-report-2023.pdf", "https://a/contact"]
+
+    def test_verify_stops_at_target(self):
+        calls = []
+
+        def verify(href, title):
+            calls.append(href)
+            time.sleep(0.05)
+            return report(href)
+
+        run = SearchRun({}, workers=1, target=2, log=_quiet)
+        candidates = [{"href": f"https://a/{i}.pdf", "title": "r"} for i in range(6)]
+        assert run.verify(candidates, verify) == 2
+        assert run.target_met()
+        assert len(calls) <= 3
+        run.close()
+
+    def test_verify_gives_up_at_deadline(self):
+        run = SearchRun({}, workers=1, deadline_s=0.2, log=_quiet)
+        start = time.monotonic()
+        added = run.verify([{"href": f"https://a/{i}.pdf", "title": "r"} for i in range(5)],
+                           lambda h, t: time.sleep(0.15) or report(h))
+        run.close()
+        assert time.monotonic() - start < 1
+        assert added < 5
+
+
+class TestEvents:
+    def test_events_for_stages_reports_and_log(self):
+        events = []
+        pipeline = SearchPipeline()
+
+        def crawl(run):
+            run.set("website", {"href": "https://a/esg"})
+            run.add_report(report("https://a/1.pdf"), source="Official Site")
+            return "1 reports"
+
+        pipeline.add("crawl", crawl)
+        pipeline.add("ungc", lambda run: None, after=["crawl"], skip=lambda run: "target met")
+        run = SearchRun({"reports": [], "search_log": []}, log=_quiet, on_event=events.append)
+        pipeline.run(run)
+        run.close()
+
+        kinds = [e["kind"] for e in events]
+        assert kinds[0] == "start" and events[0]["stages"] == ["crawl", "ungc"]
+        assert {"kind": "field", "key": "website"}.items() <= next(e for e in events if e["kind"] == "field").items()
+        reported = next(e for e in events if e["kind"] == "report")
+        assert reported["report"]["source"] == "Official Site"
+        statuses = [(e["name"], e["status"]) for e in events if e["kind"] == "stage"]
+        assert statuses == [("crawl", "running"), ("crawl", "done"), ("ungc", "skipped")]
+        assert any(e["kind"] == "log" and e["line"].startswith("Stage crawl:") for e in events)
+
+    def test_time_to_first_report_recorded(self):
+        pipeline = SearchPipeline()
+        pipeline.add("slow", lambda run: (time.sleep(0.1), run.add_report(report("https://a/1.pdf"))))
+        run = new_run()
+        pipeline.run(run)
+        run.close()
+        assert run.results["time_to_first_report_s"] >= 0.1
+        assert any(line.startswith("First report after") for line in run.results["search_log"])
+        assert set(run.results["stage_timings"]) == {"slow"}
+
+    def test_failing_callback_does_not_break_run(self):
+        def broken(event):
+            raise RuntimeError("UI gone")
+        run = SearchRun({}, log=_quiet, on_event=broken)
+        assert run.add_report(report("https://a/1.pdf"))
+        run.close()
+
+    def test_stream_events_yields_then_done(self):
+        def search(name, on_event=None):
+            on_event({"kind": "log", "line": f"searching {name}"})
+            return {"company": name}
+
+        events = list(stream_events(search, "Acme"))
+        assert events[0] == {"kind": "log", "line": "searching Acme"}
+        assert events[-1]["kind"] == "done" and events[-1]["results"] == {"company": "Acme"}
+
+    def test_stream_events_reraises(self):
+        def search(on_event=None):
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            list(stream_events(search))
@@ -0,0 +1,106 @@
+"""Unit tests for the per-host TLS policy memory."""
+
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from tls_policy import TlsPolicyStore, host_key
+from circuit_breaker import DomainCircuitBreaker
+from rate_limiter import HostRateLimiter
+
+URL = "https://ir.example-utility.com/reports/2024.pdf"
+
+
+class TestTlsPolicyStore:
+    def test_host_key_is_exact_host(self):
+        assert host_key("https://WWW.Example.com:8443/a") == "www.example.com"
+
+    def test_unknown_host_verifies(self, tmp_path):
+        store = TlsPolicyStore(path=str(tmp_path / "tls.json"))
+        assert store.should_verify(URL)
+
+    def test_insecure_host_remembered_across_runs(self, tmp_path):
+        path = str(tmp_path / "tls.json")
+        TlsPolicyStore(path=path).record_insecure(URL, "CERTIFICATE_VERIFY_FAILED")
+        store = TlsPolicyStore(path=path)
+        assert not store.should_verify("https://ir.example-utility.com/other")
+        assert store.should_verify("https://www.example-utility.com/")
+        audit = store.insecure_hosts()
+        assert audit["ir.example-utility.com"]["reason"] == "CERTIFICATE_VERIFY_FAILED"
+        assert audit["ir.example-utility.com"]["failures"] == 1
+
+    def test_reprobe_after_interval(self, tmp_path):
+        path = tmp_path / "tls.json"
+        old = (datetime.now() - timedelta(days=31)).strftime("%Y-%m-%d %H:%M:%S")
+        path.write_text(json.dumps({"ir.example-utility.com": {
+            "since": old, "last_probe": old, "failures": 1, "reason": "x"}}))
+        store = TlsPolicyStore(path=str(path), reprobe_days=30)
+        assert store.should_verify(URL)          # one re-probe...
+        assert not store.should_verify(URL)      # ...then back to insecure until it succeeds
+
+    def test_verified_success_clears_host(self, tmp_path):
+        store = TlsPolicyStore(path=str(tmp_path / "tls.json"))
+        store.record_insecure(URL, "bad chain")
+        store.record_verified(URL)
+        assert store.insecure_hosts() == {}
+        assert store.should_verify(URL)
+
+
+class TestRobustGetTls:
+    def test_fallback_remembered(self, tmp_path):
+        store = TlsPolicyStore(path=str(tmp_path / "tls.json"))
+        ok = MagicMock(status_code=200, headers={})
+        calls = []
+
+        def fake_get(url, verify, **kwargs):
+            calls.append(verify)
+            if verify:
+                raise requests.exceptions.SSLError("CERTIFICATE_VERIFY_FAILED")
+            return ok
+
+        session = MagicMock()
+        session.get.side_effect = fake_get
+        with patch.object(utils, "get_session", return_value=session), \
+                patch.object(utils, "get_tls_policy", return_value=store), \
+                patch.object(utils, "get_rate_limiter", return_value=HostRateLimiter(default_rps=1000, burst=1000)), \
+                patch.object(utils, "get_circuit_breaker", return_value=DomainCircuitBreaker(log=lambda *_: None)):
+            assert utils.robust_get(URL, use_cache=False) is ok
+            assert utils.robust_get(URL, use_cache=False) is ok
+        # First call: failed verified handshake + unverified retry; second: straight to unverified
+        assert [bool(v) for v in calls] == [True, False, False]
+        assert "ir.example-utility.com" in store.insecure_hosts()
+
+    def test_insecure_retry_goes_through_status_handling(self, tmp_path):
+        store = TlsPolicyStore(path=str(tmp_path / "tls.json"))
+        limited = MagicMock(status_code=429, headers={"Retry-After": "0"})
+        ok = MagicMock(status_code=200, headers={})
+        responses = iter([limited, ok])
+        calls = []
+
+        def fake_get(url, verify, **kwargs):
+            calls.append(verify)
+            if verify:
+                raise requests.exceptions.SSLError("CERTIFICATE_VERIFY_FAILED")
+            return next(responses)
+
+        session = MagicMock()
+        session.get.side_effect = fake_get
+        limiter = HostRateLimiter(default_rps=1000, burst=1000)
+        with patch.object(utils, "get_session", return_value=session), \
+                patch.object(utils, "get_tls_policy", return_value=store), \
+                patch.object(utils, "get_rate_limiter", return_value=limiter), \
+                patch.object(limiter, "penalize", wraps=limiter.penalize) as penalize, \
+                patch.object(limiter, "record_success", wraps=limiter.record_success) as success, \
+                patch.object(utils, "get_circuit_breaker", return_value=DomainCircuitBreaker(log=lambda *_: None)):
+            assert utils.robust_get(URL, use_cache=False) is ok
+        # The unverified 429 is penalized and retried like any other, then success is recorded
+        assert [bool(v) for v in calls] == [True, False, False]
+        assert penalize.call_args[0][1] == 429
+        success.assert_called_once()
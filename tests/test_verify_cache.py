@@ -0,0 +1,133 @@
+"""Unit tests for the verification-result cache."""
+
+import sys
+import os
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from verify_cache import VerificationCache, normalize_url, validator_for
+
+URL = "https://www.Acme.com/reports/esg-2024.pdf?utm_source=x&v=2#page=3"
+RESULT = {"title": "Acme ESG Report 2024", "href": URL, "body": "Verified PDF Report"}
+
+
+class FakeCollection:
+    """The slice of a pymongo collection the cache uses."""
+
+    def __init__(self):
+        self.docs = {}
+        self.indexes = []
+
+    def create_index(self, field, **kwargs):
+        self.indexes.append((field, kwargs))
+
+    def find(self, query):
+        return [dict(self.docs[k]) for k in query["_id"]["$in"] if k in self.docs]
+
+    def replace_one(self, query, doc, upsert=False):
+        self.docs[query["_id"]] = dict(doc)
+
+    def update_one(self, query, update):
+        self.docs[query["_id"]].update(update["$set"])
+
+
+class TestNormalizeUrl:
+    def test_host_case_fragment_and_tracking(self):
+        assert normalize_url(URL) == "https://www.acme.com/reports/esg-2024.pdf?v=2"
+
+    def test_default_port_dropped(self):
+        assert normalize_url("https://acme.com:443/a.pdf") == "https://acme.com/a.pdf"
+        assert normalize_url("http://acme.com:8080/a.pdf") == "http://acme.com:8080/a.pdf"
+
+
+class TestValidator:
+    def test_etag_preferred(self):
+        assert validator_for({"ETag": '"abc"', "Content-Length": "10"}) == 'etag:"abc"'
+
+    def test_length_fallback(self):
+        assert validator_for({"Content-Length": "123456"}) == "len:123456"
+        assert validator_for({}) is None
+
+
+class TestVerificationCache:
+    def test_miss_then_hit(self):
+        cache = VerificationCache()
+        assert cache.lookup(URL, "Acme Corp") == (None, False)
+        cache.put(URL, "Acme Corp", "verified", result=RESULT, validator="len:1", pages=80, year="2024")
+        entry, fresh = cache.lookup("https://www.acme.com/reports/esg-2024.pdf?v=2", "Acme Corp")
+        assert fresh
+        assert entry["result"] == RESULT
+        assert (entry["pages"], entry["year"]) == (80, "2024")
+        assert cache.stats["local_hits"] == 1
+
+    def test_company_specific_outcomes(self):
+        cache = VerificationCache()
+        cache.put(URL, "Acme Corp", "verified", result=RESULT)
+        cache.put(URL, "Globex Inc", "wrong_company", reason="token not found")
+        assert cache.lookup(URL, "Acme Corp")[0]["outcome"] == "verified"
+        assert cache.lookup(URL, "Globex Inc")[0]["outcome"] == "wrong_company"
+        assert cache.lookup(URL, "Initech")[0] is None
+
+    def test_url_wide_negative_shared_by_companies(self):
+        cache = VerificationCache()
+        cache.put(URL, "Acme Corp", "not_found", reason="HTTP 404")
+        entry, fresh = cache.lookup(URL, "Globex Inc")
+        assert fresh and entry["outcome"] == "not_found"
+        assert entry["result"] is None
+
+    def test_per_outcome_ttl(self):
+        cache = VerificationCache(ttls={"verified": 3600, "fetch_error": 60})
+        cache.put(URL, "Acme Corp", "fetch_error", reason="Timeout")
+        doc = cache._local[normalize_url(URL)]
+        assert doc["expires_at"] - doc["checked_at"] == timedelta(seconds=60)
+        # Outcomes without a TTL aren't stored
+        assert cache.put(URL, "Acme Corp", "not_pdf") is None
+
+    def test_expired_entry_returned_stale_and_revalidated(self):
+        cache = VerificationCache()
+        cache.put(URL, "Acme Corp", "verified", result=RESULT, validator='etag:"v1"')
+        key = f"{normalize_url(URL)}|acme"
+        cache._local[key]["expires_at"] -= timedelta(days=365)
+        entry, fresh = cache.lookup(URL, "Acme Corp")
+        assert entry["validator"] == 'etag:"v1"' and not fresh
+        refreshed = cache.revalidated(entry)
+        assert cache.lookup(URL, "Acme Corp")[1]
+        assert refreshed["result"] == RESULT
+
+    def test_local_lru_bounded(self):
+        cache = VerificationCache(local_size=2)
+        for i in range(3):
+            cache.put(f"https://acme.com/{i}.pdf", None, "not_found")
+        assert len(cache._local) == 2
+        assert cache.lookup("https://acme.com/0.pdf")[0] is None
+
+
+class TestMongoBacked:
+    def test_shared_through_collection(self):
+        collection = FakeCollection()
+        writer = VerificationCache()
+        writer.attach(collection)
+        assert collection.indexes == [("purge_at", {"expireAfterSeconds": 0})]
+        writer.put(URL, "Acme Corp", "verified", result=RESULT)
+
+        reader = VerificationCache(collection=collection)
+        entry, fresh = reader.lookup(URL, "Acme Corp")
+        assert fresh and entry["result"] == RESULT
+        assert reader.stats["db_hits"] == 1
+        # Second lookup is served from the local LRU
+        reader.lookup(URL, "Acme Corp")
+        assert reader.stats["local_hits"] == 1
+
+    def test_database_errors_fall_back_to_local(self):
+        class Broken(FakeCollection):
+            def find(self, query):
+                raise RuntimeError("no server")
+
+            def replace_one(self, query, doc, upsert=False):
+                raise RuntimeError("no server")
+
+        cache = VerificationCache(collection=Broken())
+        cache.put(URL, None, "not_found")
+        assert cache.lookup(URL)[0]["outcome"] == "not_found"
+        assert cache.lookup("https://acme.com/other.pdf") == (None, False)
@@ -0,0 +1,124 @@
+"""
+Per-host TLS policy memory for robust_get and the async fetcher.
+
+When a host's certificate chain doesn't verify (missing intermediates,
+expired or self-signed certificates are common on utility sites,
+investor-relations CDNs and older corporate hosts), the fetch is retried
+without verification. Without memory, every later request to that host
+paid for a failed TLS handshake first. Hosts that needed the fallback are
+recorded here, persisted across runs (TLS_POLICY_FILE), and fetched
+unverified straight away. After TLS_POLICY_REPROBE_DAYS a host is tried
+with verification again, and it leaves the list once verification works.
+
+`insecure_hosts()` lists the hosts on the insecure path for auditing.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from config import TLS_POLICY_FILE, TLS_POLICY_REPROBE_DAYS
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def host_key(url):
+    """Exact hostname (certificates are per host, so no www/domain folding)."""
+    try:
+        return (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+class TlsPolicyStore:
+    """Thread-safe, file-backed set of hosts that need unverified TLS."""
+
+    def __init__(self, path=TLS_POLICY_FILE, reprobe_days=TLS_POLICY_REPROBE_DAYS):
+        self.path = path
+        self.reprobe_days = reprobe_days
+        self._lock = threading.Lock()
+        self._data = self._load()
+        self.skipped_handshakes = 0
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self._data, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[TlsPolicy] Could not persist TLS policy table: {e}")
+
+    def should_verify(self, url):
+        """False if the host is known to need the insecure path (and isn't due a re-probe)."""
+        host = host_key(url)
+        with self._lock:
+            entry = self._data.get(host)
+            if entry is None:
+                return True
+            probed = datetime.strptime(entry["last_probe"], _TS_FORMAT)
+            if datetime.now() - probed >= timedelta(days=self.reprobe_days):
+                # Re-probe once; record_insecure() pushes the next probe out again
+                entry["last_probe"] = datetime.now().strftime(_TS_FORMAT)
+                self._save()
+                return True
+            self.skipped_handshakes += 1
+            return False
+
+    def record_insecure(self, url, error):
+        """A verified handshake failed for this host: use the insecure path from now on."""
+        host = host_key(url)
+        if not host:
+            return
+        now = datetime.now().strftime(_TS_FORMAT)
+        reason = str(error)[:200]
+        with self._lock:
+            entry = self._data.get(host)
+            if entry is None:
+                print(f"[TlsPolicy] {host}: certificate verification failed, using unverified TLS from now on")
+                entry = {"since": now, "failures": 0}
+                self._data[host] = entry
+            entry.update(last_probe=now, reason=reason)
+            entry["failures"] += 1
+            self._save()
+
+    def record_verified(self, url):
+        """A verified request succeeded: drop the host from the insecure list."""
+        host = host_key(url)
+        with self._lock:
+            if self._data.pop(host, None) is not None:
+                print(f"[TlsPolicy] {host}: certificate verifies again, back to verified TLS")
+                self._save()
+
+    def is_insecure(self, url):
+        with self._lock:
+            return host_key(url) in self._data
+
+    def insecure_hosts(self):
+        """{host: {"since", "last_probe", "failures", "reason"}} for auditing."""
+        with self._lock:
+            return json.loads(json.dumps(self._data))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_tls_policy():
+    """Process-wide TLS policy store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TlsPolicyStore()
+        return _store
@@ -5,15 +5,19 @@ Eliminates duplication between app.py and esg_scraper.py.
 
 import re
 import random
-import time
 import requests
 import certifi
 from urllib.parse import urlparse
 from config import (
     COMPANY_STOPWORDS, JUNK_PHRASES, BLOCKED_DOMAINS,
     GENERIC_LINK_TERMS, JUNK_PATTERNS,
-    USER_AGENTS, REQUEST_HEADERS_BASE, MAX_RETRIES, RETRY_BACKOFF_S,
+    USER_AGENTS, REQUEST_HEADERS_BASE, MAX_RETRIES, HTTP_CACHE_ENABLED,
 )
+from http_session import get_session
+from rate_limiter import get_rate_limiter
+from circuit_breaker import get_circuit_breaker, CircuitOpenError
+from http_cache import HttpCache, get_http_cache
+from tls_policy import get_tls_policy
 
 
 def get_significant_token(name):
@@ -121,36 +125,232 @@ def filter_relevant_links(links, pdfs_only=False):
     return pdf_links, relevant_non_pdfs
 
 
-def robust_get(url, timeout=10, stream=False):
+def verify_pdf_bytes(pdf_data, url, title, company_name):
+    """
+    Check a downloaded PDF: company name and report keywords on pages 1-3.
+    `pdf_data` is the file's bytes, a file path or a seekable file object (range_file).
+    Returns {"title", "href", "body"} with a cleaned-up title, or None.
+    Shared by app.verify_pdf_content and async_fetch.verify_pdf_content.
+    """
+    return inspect_pdf(pdf_data, url, title, company_name)[0]
+
+
+def inspect_pdf(pdf_data, url, title, company_name):
+    """
+    verify_pdf_bytes with the details: (result, reason, page_count).
+    reason is None when verified, else "unreadable", "wrong_company" or "no_keywords".
+    Parsing and text extraction run in the PDF worker pool (pdf_pool.py).
+    """
+    from pdf_pool import get_pdf_pool, PdfParseError
+
+    try:
+        parsed = get_pdf_pool().parse(pdf_data, max_pages=3)
+    except PdfParseError as e:
+        print(f"[VERIFY] [SKIP] Unreadable PDF ({e}): {url}")
+        return None, "unreadable", None
+    return inspect_parsed_pdf(parsed, url, title, company_name)
+
+
+def inspect_parsed_pdf(parsed, url, title, company_name):
+    """
+    inspect_pdf's checks on already-extracted text: a pdf_pool.read_pdf_text
+    result or a text sidecar (pdf_sidecar.py). Only the first 3 pages are read.
+    """
+    import os
+
+    page_count = parsed["pages"]
+    if page_count == 0:
+        return None, "unreadable", 0
+
+    # --- TITLE ENHANCEMENT LOGIC ---
+    final_title = title  # Default to link text
+
+    # 1. Try PDF Metadata
+    pdf_title = None
+    meta_t = parsed["title"] or ""
+    if len(meta_t) > 5 and "micros" not in meta_t.lower() and "untitled" not in meta_t.lower():
+        pdf_title = meta_t
+
+    # 2. Try Filename from URL
+    url_filename = os.path.basename(urlparse(url).path)
+    clean_filename = url_filename.replace('.pdf', '').replace('-', ' ').replace('_', ' ').title()
+
+    # 3. Decision Logic
+    # Is the original link text generic?
+    generic_terms = ['report', 'download', 'pdf', 'click here', 'view', 'full report', 'read more', 'file']
+    is_generic = len(title) < 10 or any(title.lower() == g for g in generic_terms)
+
+    if pdf_title:
+        # Metadata is usually best if it exists
+        final_title = pdf_title
+    elif is_generic and len(clean_filename) > 5:
+        # Fallback to filename if link text is bad
+        final_title = clean_filename
+
+    # Refine: Ensure year is present if possible
+    if not re.search(r'(20[12][0-9])', final_title):
+        # Try to find year in URL to append
+        y_url = re.search(r'(20[12][0-9])', url)
+        if y_url:
+            final_title = f"{final_title} ({y_url.group(1)})"
+
+    # Check first 3 pages
+    text_content = " ".join(page.lower() for page in parsed["text"][:3]) + " "
+
+    # Check Company Name (SMARTER)
+    sig_token = get_significant_token(company_name)
+    if sig_token not in text_content:
+        print(f"[VERIFY] [SKIP] Company token '{sig_token}' not found.")
+        return None, "wrong_company", page_count
+
+    # Check Keywords (Context specific)
+    report_keywords = ['report', 'sustainability', 'esg', 'annual', 'review', 'fiscal', 'summary']
+    if not any(k in text_content for k in report_keywords):
+        return None, "no_keywords", page_count
+
+    print(f"[VERIFY] [MATCH] Verified: {url}")
+    return {
+        "title": final_title,
+        "href": url,
+        "body": "Verified PDF Report"
+    }, None, page_count
+
+
+def find_report_pdf_links(html, page_url, default_title, limit=5):
+    """
+    Direct report-PDF links on a landing/hub page.
+    Returns up to `limit` {title, url} dicts.
+    """
+    from bs4 import BeautifulSoup
+    from urllib.parse import urljoin
+
+    soup = BeautifulSoup(html, "html.parser")
+    parsed = urlparse(page_url)
+    base = f"{parsed.scheme}://{parsed.netloc}"
+
+    found = []
+    seen = set()
+    for link in soup.find_all("a", href=True):
+        href = link["href"].strip()
+        text = link.get_text(strip=True)
+
+        # Resolve relative URLs
+        if href.startswith("//"):
+            href = f"{parsed.scheme}:{href}"
+        elif href.startswith("/"):
+            href = base + href
+        elif not href.startswith("http"):
+            # relative to current path
+            href = urljoin(page_url, href)
+
+        if not href.lower().split("?")[0].endswith(".pdf") or href in seen:
+            continue
+        seen.add(href)
+
+        # Keep only links that look like a report (by anchor text or URL)
+        if is_report_link(text or href, href):
+            found.append({"title": text or default_title, "url": href})
+
+    # Cap per page to avoid grabbing dozens of ancillary PDFs
+    return found[:limit]
+
+
+def robust_get(url, timeout=10, stream=False, use_cache=None):
     """
     Make an HTTP GET with rotating user-agents, realistic headers, and retry
-    with exponential backoff on 403/429/5xx responses.
+    on 403/429/5xx responses. Pacing and backoff go through the shared
+    per-host rate limiter (rate_limiter.py), which honors Retry-After.
+    Uses the shared keep-alive connection pools (http_session.py).
+
+    Domains that keep failing are cut off by the circuit breaker
+    (circuit_breaker.py): calls raise CircuitOpenError without fetching.
+
+    Bodies are cached on disk (http_cache.py): fresh entries are served
+    without a request, stale ones are revalidated with If-None-Match /
+    If-Modified-Since, and a stale copy is served if the fetch fails.
+    Streamed requests skip the cache unless `use_cache` is set, and even
+    then only read entries that are already cached: downloads are never
+    pulled into memory to be cached.
     """
-    headers = {**REQUEST_HEADERS_BASE, "User-Agent": random.choice(USER_AGENTS)}
+    if use_cache is None:
+        use_cache = HTTP_CACHE_ENABLED and not stream
+    cache = get_http_cache() if use_cache else None
+    entry = cache.lookup(url) if cache else None
+    if entry and cache.is_fresh(entry):
+        resp = cache.serve(url, entry)
+        if resp is not None:
+            return resp
+        entry = None
+    if cache and entry is None:
+        cache.miss()
+
+    breaker = get_circuit_breaker()
+    try:
+        breaker.before_request(url)
+        resp = _get_with_retries(url, timeout, stream, HttpCache.conditional_headers(entry))
+    except Exception as e:
+        if not isinstance(e, CircuitOpenError):
+            status = getattr(e, "status_code", None)
+            breaker.record_failure(url, f"HTTP {status}" if status else type(e).__name__)
+        stale = cache.serve(url, entry, counter="stale_served") if entry else None
+        if stale is not None:
+            print(f"[robust_get] {type(e).__name__} on {url}, serving cached copy")
+            return stale
+        raise
+    if resp.status_code >= 500:
+        breaker.record_failure(url, f"HTTP {resp.status_code}")
+    else:
+        breaker.record_success(url)
+    if cache:
+        resp = cache.update(url, resp, entry, stream)
+    return resp
+
+
+def _get_with_retries(url, timeout, stream, extra_headers=None):
+    """robust_get's retry loop (without the circuit breaker or cache)."""
+    headers = {**REQUEST_HEADERS_BASE, **(extra_headers or {}), "User-Agent": random.choice(USER_AGENTS)}
+    session = get_session()
+    limiter = get_rate_limiter()
+    tls = get_tls_policy()
+    # Hosts with broken certificate chains go straight to unverified TLS
+    verify = certifi.where() if tls.should_verify(url) else False
     last_exc = None
-    for attempt in range(MAX_RETRIES + 1):
+    last_status = None
+    attempt = 0
+    while attempt <= MAX_RETRIES:
+        limiter.acquire(url)
         try:
-            resp = requests.get(
+            resp = session.get(
                 url, headers=headers, timeout=timeout,
-                stream=stream, verify=certifi.where(),
+                stream=stream, verify=verify,
             )
+            if verify and resp.status_code < 500:
+                tls.record_verified(url)
             if resp.status_code in (403, 429, 503):
-                wait = RETRY_BACKOFF_S * (2 ** attempt) + random.uniform(0.5, 1.5)
-                print(f"[robust_get] {resp.status_code} on {url}, retrying in {wait:.1f}s")
-                time.sleep(wait)
+                resp.close()
+                last_status = resp.status_code
+                pause = limiter.penalize(url, resp.status_code, resp.headers.get("Retry-After"), attempt)
+                print(f"[robust_get] {resp.status_code} on {url}, host paused {pause:.1f}s")
                 headers["User-Agent"] = random.choice(USER_AGENTS)
+                attempt += 1
                 continue
+            limiter.record_success(url)
             return resp
-        except requests.exceptions.SSLError:
-            try:
-                resp = requests.get(
-                    url, headers=headers, timeout=timeout, stream=stream,
-                )
-                return resp
-            except Exception as e:
-                last_exc = e
+        except requests.exceptions.SSLError as e:
+            if verify:
+                # Broken certificate chain: repeat this attempt without verification,
+                # through the same pacing and status handling
+                tls.record_insecure(url, e)
+                verify = False
+                continue
+            last_exc = e
         except Exception as e:
             last_exc = e
             if attempt < MAX_RETRIES:
-                time.sleep(RETRY_BACKOFF_S * (2 ** attempt))
+                limiter.penalize(url, attempt=attempt)
+        attempt += 1
+    if last_exc is None and last_status:
+        blocked = requests.exceptions.ConnectionError(f"HTTP {last_status} after {MAX_RETRIES + 1} attempts: {url}")
+        blocked.status_code = last_status
+        raise blocked
     raise last_exc or requests.exceptions.ConnectionError(f"Failed after {MAX_RETRIES + 1} attempts: {url}")
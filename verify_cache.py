@@ -0,0 +1,187 @@
+"""
+Persistent cache of PDF verification results, positive and negative.
+
+Every search ran verify_pdf_content on the same candidate URLs again
+(download, pypdf parse, company-token check) and re-tried URLs already
+known to be 404s, HTML pages or other companies' PDFs. Outcomes are stored
+here keyed by normalized URL, with the response validator (ETag, else
+Content-Length) they were computed for:
+
+- Fresh entries (per-outcome TTL, VERIFY_CACHE_TTL_S) are answered with no request.
+- Expired entries are re-checked cheaply: if the validator is unchanged,
+  the stored outcome is reused without downloading the body.
+
+Outcomes that depend on the company ("verified", "wrong_company",
+"no_keywords") are keyed by URL + company token; the rest by URL alone.
+Entries live in MongoDB (`verification_cache`, shared by app.py and the
+batch scanner) behind a local in-process LRU. Without a database the
+cache is local only.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+from config import VERIFY_CACHE_TTL_S, VERIFY_CACHE_LOCAL_SIZE, VERIFY_CACHE_STALE_KEEP_S
+from utils import get_significant_token
+
+COMPANY_OUTCOMES = ("verified", "wrong_company", "no_keywords")
+POSITIVE_OUTCOMES = ("verified", "webpage", "large_unverified")
+
+_TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid", "_ga")
+
+
+def _utcnow():
+    # Naive UTC, which is what pymongo stores and returns
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def normalize_url(url):
+    """Canonical form for cache keys: lower-case host, no fragment, default port or tracking params."""
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return url
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    port = parsed.port if parsed.port and parsed.port not in (80, 443) else None
+    netloc = f"{host}:{port}" if port else host
+    query = urlencode([(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+                       if not k.lower().startswith(_TRACKING_PARAMS)])
+    return urlunparse((scheme, netloc, parsed.path or "/", "", query, ""))
+
+
+def validator_for(headers):
+    """ETag if the server sends one, else the body length; None if neither."""
+    etag = headers.get("ETag")
+    if etag:
+        return f"etag:{etag.strip()}"
+    length = headers.get("Content-Length")
+    if length and length.isdigit():
+        return f"len:{length}"
+    return None
+
+
+class VerificationCache:
+    """Local LRU in front of an optional MongoDB collection."""
+
+    def __init__(self, collection=None, local_size=VERIFY_CACHE_LOCAL_SIZE, ttls=None):
+        self.collection = collection
+        self.local_size = local_size
+        self.ttls = dict(VERIFY_CACHE_TTL_S if ttls is None else ttls)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"local_hits": 0, "db_hits": 0, "misses": 0, "revalidated": 0, "stored": 0}
+
+    def attach(self, collection):
+        """Use a MongoDB collection as the shared store (idempotent)."""
+        if collection is None or self.collection is not None:
+            return
+        try:
+            # Expired entries are kept a while longer (purge_at) for validator checks
+            collection.create_index("purge_at", expireAfterSeconds=0)
+        except Exception as e:
+            print(f"[VerifyCache] Could not create TTL index: {e}")
+        self.collection = collection
+
+    @staticmethod
+    def _keys(url, company_name):
+        norm = normalize_url(url)
+        token = get_significant_token(company_name) if company_name else None
+        return norm, (f"{norm}|{token}" if token else None)
+
+    def _remember(self, doc):
+        with self._lock:
+            self._local[doc["_id"]] = doc
+            self._local.move_to_end(doc["_id"])
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def lookup(self, url, company_name=None):
+        """
+        (entry, fresh) for a URL; entry is None on a miss. Expired entries are
+        returned with fresh=False so the caller can compare validators.
+        """
+        keys = [k for k in self._keys(url, company_name) if k]
+        now = _utcnow()
+        found = []
+        with self._lock:
+            for key in keys:
+                doc = self._local.get(key)
+                if doc:
+                    self._local.move_to_end(key)
+                    found.append(doc)
+        source = "local_hits"
+        if not found and self.collection is not None:
+            try:
+                found = list(self.collection.find({"_id": {"$in": keys}}))
+                for doc in found:
+                    self._remember(doc)
+                source = "db_hits"
+            except Exception as e:
+                print(f"[VerifyCache] Lookup failed: {e}")
+        if not found:
+            self.stats["misses"] += 1
+            return None, False
+        # A company-specific outcome beats the URL-wide one
+        found.sort(key=lambda d: d["_id"] != keys[-1])
+        entry = found[0]
+        fresh = entry["expires_at"] > now
+        if fresh:
+            self.stats[source] += 1
+        return entry, fresh
+
+    def put(self, url, company_name, outcome, reason=None, result=None, validator=None, pages=None, year=None):
+        """Store an outcome (see VERIFY_CACHE_TTL_S for the names)."""
+        ttl = self.ttls.get(outcome)
+        if not ttl:
+            return None
+        url_key, company_key = self._keys(url, company_name)
+        key = company_key if outcome in COMPANY_OUTCOMES and company_key else url_key
+        now = _utcnow()
+        doc = {
+            "_id": key,
+            "url": url_key,
+            "outcome": outcome,
+            "reason": reason,
+            "result": result,
+            "validator": validator,
+            "pages": pages,
+            "year": year,
+            "checked_at": now,
+            "expires_at": now + timedelta(seconds=ttl),
+            "purge_at": now + timedelta(seconds=ttl + VERIFY_CACHE_STALE_KEEP_S),
+        }
+        self._remember(doc)
+        self.stats["stored"] += 1
+        if self.collection is not None:
+            try:
+                self.collection.replace_one({"_id": key}, doc, upsert=True)
+            except Exception as e:
+                print(f"[VerifyCache] Could not store {url[:80]}: {e}")
+        return doc
+
+    def revalidated(self, entry):
+        """The stored outcome still holds (same validator): extend it."""
+        self.stats["revalidated"] += 1
+        ttl = self.ttls.get(entry["outcome"], 0)
+        now = _utcnow()
+        entry = dict(entry, checked_at=now, expires_at=now + timedelta(seconds=ttl),
+                     purge_at=now + timedelta(seconds=ttl + VERIFY_CACHE_STALE_KEEP_S))
+        self._remember(entry)
+        if self.collection is not None:
+            try:
+                self.collection.update_one({"_id": entry["_id"]}, {"$set": {
+                    key: entry[key] for key in ("checked_at", "expires_at", "purge_at")}})
+            except Exception as e:
+                print(f"[VerifyCache] Could not refresh {entry['url'][:80]}: {e}")
+        return entry
+
+
+_cache = VerificationCache()
+
+
+def get_verification_cache():
+    """Process-wide cache; call .attach(db.verification_cache) once a database is connected."""
+    return _cache